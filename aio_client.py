@@ -0,0 +1,141 @@
+import asyncio
+import uuid
+
+import grpc
+import movies_management_pb2
+import movies_management_pb2_grpc
+from client import SERVER_ADDRESS
+
+
+class AsyncMoviesClient:
+    """
+    grpc.aio counterpart of client.MoviesClient.
+
+    All calls share one channel and are pipelined over it; at most
+    `max_concurrency` are in flight at once. `timeout` is the default deadline,
+    in seconds, for every call and can be overridden per call. Methods return the
+    response and raise grpc.aio.AioRpcError on failure.
+    """
+
+    def __init__(self, target=SERVER_ADDRESS, metadata=None, max_concurrency=100, timeout=None, options=None):
+        self._channel = grpc.aio.insecure_channel(target, options=options)
+        self._stub = movies_management_pb2_grpc.MoviesServiceStub(self._channel)
+        self._metadata = tuple(metadata or ())
+        self._limit = asyncio.Semaphore(max_concurrency)
+        self._timeout = timeout
+
+    def _call_metadata(self, metadata):
+        return self._metadata + tuple(metadata or ()) + (('trace-id', str(uuid.uuid4())),)
+
+    async def _unary(self, method, request, metadata, timeout):
+        async with self._limit:
+            return await method(request, metadata=self._call_metadata(metadata),
+                                timeout=self._timeout if timeout is None else timeout)
+
+    async def get_movie(self, name, metadata=None, timeout=None):
+        request = movies_management_pb2.GetMovieRequest(name=name)
+        return await self._unary(self._stub.GetMovie, request, metadata, timeout)
+
+    async def get_actor(self, name, metadata=None, timeout=None):
+        request = movies_management_pb2.GetActorRequest(actor_name=name)
+        return await self._unary(self._stub.GetActor, request, metadata, timeout)
+
+    async def get_movies(self, names, metadata=None, timeout=None, return_exceptions=False):
+        """
+        Looks up many movies concurrently, returns the responses in the order of `names`.
+        With return_exceptions, failed lookups are returned as their AioRpcError instead of raising.
+        """
+        return await asyncio.gather(*(self.get_movie(name, metadata, timeout) for name in names),
+                                    return_exceptions=return_exceptions)
+
+    async def get_actors(self, names, metadata=None, timeout=None, return_exceptions=False):
+        """
+        Looks up many actors concurrently, returns the responses in the order of `names`
+        """
+        return await asyncio.gather(*(self.get_actor(name, metadata, timeout) for name in names),
+                                    return_exceptions=return_exceptions)
+
+    async def add_movie(self, id, movie_name, actors, director, rating, metadata=None, timeout=None):
+        request = movies_management_pb2.AddMovieRequest(id=id, name=movie_name, actors=actors, director=director,
+                                                        rating=rating)
+        return await self._unary(self._stub.AddMovie, request, metadata, timeout)
+
+    async def change_rating(self, movie_name, rating, metadata=None, timeout=None):
+        request = movies_management_pb2.ScoreRequest(movie_name=movie_name, rating=rating)
+        return await self._unary(self._stub.ChangeRating, request, metadata, timeout)
+
+    async def get_movies_by_director(self, director_name, metadata=None, timeout=None):
+        """
+        Async iterator over the streamed movies. The deadline covers the whole stream.
+        """
+        request = movies_management_pb2.GetMoviesByDirectorRequest(director=director_name)
+        async with self._limit:
+            call = self._stub.GetMoviesByDirector(request, metadata=self._call_metadata(metadata),
+                                                  timeout=self._timeout if timeout is None else timeout)
+            try:
+                async for response in call:
+                    yield response
+            finally:
+                call.cancel()
+
+    async def get_movies_by_actor(self, actor_name, metadata=None, timeout=None):
+        """
+        Async iterator over the streamed movies. The deadline covers the whole stream.
+        """
+        request = movies_management_pb2.GetMoviesByActorRequest(actor_name=actor_name)
+        async with self._limit:
+            call = self._stub.GetMoviesByActor(request, metadata=self._call_metadata(metadata),
+                                               timeout=self._timeout if timeout is None else timeout)
+            try:
+                async for chunk in call:
+                    for response in chunk.movies:
+                        yield response
+            finally:
+                call.cancel()
+
+    async def search_movies(self, query, limit=0, prefix_only=False, metadata=None, timeout=None):
+        """
+        Async iterator over the streamed SearchResults, best match first
+        """
+        request = movies_management_pb2.SearchMoviesRequest(query=query, limit=limit, prefix_only=prefix_only)
+        async with self._limit:
+            call = self._stub.SearchMovies(request, metadata=self._call_metadata(metadata),
+                                           timeout=self._timeout if timeout is None else timeout)
+            try:
+                async for response in call:
+                    yield response
+            finally:
+                call.cancel()
+
+    async def list_movies(self, director='', actor='', min_rating=None, max_rating=None,
+                          order=movies_management_pb2.NAME, page_size=0, cursor='', metadata=None, timeout=None):
+        """
+        Returns one page of movies; pass its next_cursor back as `cursor` for the next one
+        """
+        request = movies_management_pb2.ListMoviesRequest(director=director, actor=actor, min_rating=min_rating,
+                                                          max_rating=max_rating, order=order, page_size=page_size,
+                                                          cursor=cursor)
+        return await self._unary(self._stub.ListMovies, request, metadata, timeout)
+
+    async def top_rated_movies(self, director='', limit=0, metadata=None, timeout=None):
+        """
+        Async iterator over the streamed movies, highest rated first
+        """
+        request = movies_management_pb2.TopRatedMoviesRequest(director=director, limit=limit)
+        async with self._limit:
+            call = self._stub.TopRatedMovies(request, metadata=self._call_metadata(metadata),
+                                             timeout=self._timeout if timeout is None else timeout)
+            try:
+                async for response in call:
+                    yield response
+            finally:
+                call.cancel()
+
+    async def close(self):
+        await self._channel.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+
+import grpc
+
+import movies_management_pb2
+import movies_management_pb2_grpc
+from errors import CustomError, InternalServerError
+from interceptor import AsyncAuthInterceptor, AsyncLoggingInterceptor
+from metrics import AsyncMetricsInterceptor, registry
+from server import MoviesService, ADD_MOVIES_BATCH_SIZE, SERVER_OPTIONS, add_movies_service_to_server
+
+
+class AsyncMoviesService(movies_management_pb2_grpc.MoviesServiceServicer):
+    """
+    grpc.aio implementation of MoviesService.
+
+    The handlers delegate to the synchronous MoviesService and get the same
+    storage, error handling and logging. With the in-memory MovieStore they only
+    do in-memory work and run on the event loop. Stores whose calls may wait on
+    I/O (MovieStorage.blocking: SQLite, or a persistent MovieStore) are called
+    from threads instead, so one query or log sync doesn't stall every call in
+    flight. Either way, a slow stream consumer parks a coroutine instead of
+    pinning a worker thread.
+    """
+
+    def __init__(self, store=None):
+        self._service = MoviesService(store=store)
+
+    async def _call(self, handler, *args):
+        """
+        Runs a method of the synchronous service, in a thread if the store may block
+        """
+        if self._service.store.blocking:
+            return await asyncio.to_thread(handler, *args)
+        return handler(*args)
+
+    async def _stream(self, handler, request, context):
+        """
+        Streams the responses of a streaming handler of the synchronous service. If
+        the store may block, the handler runs to completion in a thread first; the
+        store returns the streamed movies as a list anyway.
+        """
+        responses = handler(request, context)
+        if self._service.store.blocking:
+            responses = await asyncio.to_thread(list, responses)
+        for response in responses:
+            yield response
+
+    async def GetMovie(self, request, context):
+        return await self._call(self._service.GetMovie, request, context)
+
+    async def GetActor(self, request, context):
+        return await self._call(self._service.GetActor, request, context)
+
+    async def AddMovie(self, request, context):
+        return await self._call(self._service.AddMovie, request, context)
+
+    async def ChangeRating(self, request, context):
+        return await self._call(self._service.ChangeRating, request, context)
+
+    async def GetMoviesByDirector(self, request, context):
+        async for response in self._stream(self._service.GetMoviesByDirector, request, context):
+            yield response
+
+    async def GetMoviesByActor(self, request, context):
+        async for response in self._stream(self._service.GetMoviesByActor, request, context):
+            yield response
+
+    async def SearchMovies(self, request, context):
+        async for response in self._stream(self._service.SearchMovies, request, context):
+            yield response
+
+    async def ListMovies(self, request, context):
+        return await self._call(self._service.ListMovies, request, context)
+
+    async def TopRatedMovies(self, request, context):
+        async for response in self._stream(self._service.TopRatedMovies, request, context):
+            yield response
+
+    async def AddMovies(self, request_iterator, context):
+        metadata = self._service.get_metadata(context)
+        self._service.log_trace(metadata, "Received request to add a stream of movies by user: %s",
+                                self._service.get_user_id())
+
+        try:
+            response = movies_management_pb2.AddMoviesResponse()
+            batch = []
+            async for request in request_iterator:
+                batch.append(request)
+                if len(batch) == ADD_MOVIES_BATCH_SIZE:
+                    await self._call(self._service.add_batch, batch, response)
+                    batch = []
+            if batch:
+                await self._call(self._service.add_batch, batch, response)
+
+            self._service.log_trace(metadata, "Added %s movies, %s failed", response.added, response.failed)
+            return response
+        except CustomError as e:
+            context.set_code(e.code)
+            context.set_details(e.message)
+            return movies_management_pb2.AddMoviesResponse()
+        except Exception as e:
+            self._service.log_error(metadata, "Error while adding Movies: %s", e)
+            raise InternalServerError() from e
+
+    async def BatchGetMovies(self, request, context):
+        return await self._call(self._service.BatchGetMovies, request, context)
+
+    async def BatchGetActors(self, request, context):
+        return await self._call(self._service.BatchGetActors, request, context)
+
+
+def create_server(address='[::]:50051', options=None, store=None, metrics=registry):
+    """
+    Builds the grpc.aio server with the service and interceptors registered, without starting it.
+    `store` is the storage.MovieStorage to serve, db_mimic.db by default.
+    Calls are recorded in the metrics.Metrics `metrics`, or not at all with None.
+    Returns the server and the port it is bound to.
+    """
+    interceptors = (AsyncAuthInterceptor(), AsyncLoggingInterceptor())
+    if metrics is not None:
+        interceptors = (AsyncMetricsInterceptor(metrics),) + interceptors
+    server = grpc.aio.server(interceptors=interceptors,
+                             options=SERVER_OPTIONS + list(options or []))
+    add_movies_service_to_server(AsyncMoviesService(store), server)
+    port = server.add_insecure_port(address)
+    return server, port
+
+
+async def serve(address='[::]:50051', store=None):
+    logging.basicConfig(level=logging.INFO)
+    server, _ = create_server(address, store=store)
+    await server.start()
+    await server.wait_for_termination()
+
+
+if __name__ == '__main__':
+    asyncio.run(serve())
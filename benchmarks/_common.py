@@ -0,0 +1,21 @@
+"""
+Helpers shared by the benchmarks that need a running server.
+"""
+import logging
+
+from jwt_utils import create_jwt
+from server import create_server
+
+
+def start_server():
+    """
+    Starts an in-process server on a free local port and returns it with its target
+    """
+    logging.disable(logging.INFO)
+    server, port = create_server('localhost:0')
+    server.start()
+    return server, f'localhost:{port}'
+
+
+def auth_metadata():
+    return [('authorization', create_jwt(user_id='bench')), ('trace-id', 'bench')]
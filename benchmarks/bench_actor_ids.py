@@ -0,0 +1,56 @@
+"""
+Microbenchmark of actor insert cost as the actor table grows.
+
+Compares the old "materialize every key and take the last one" id lookup with
+the O(1) IdAllocator used by MovieStore. The allocator's cost per insert should
+stay flat while the old lookup grows linearly with the table.
+
+Run from the repository root:
+    python -m benchmarks.bench_actor_ids --checkpoints 10000 100000 1000000
+"""
+import argparse
+import time
+
+from db_mimic import Actor, IdAllocator
+
+
+def last_key_insert(actors, name):
+    last_actor_id = 0
+    if actors:
+        last_actor = list(actors.keys())[-1]
+        last_actor_id = int(actors[last_actor].id)
+    actors[name] = Actor(str(last_actor_id + 1), name, [])
+
+
+def allocator_insert(actors, name, allocator):
+    actors[name] = Actor(str(allocator.next_id()), name, [])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--checkpoints', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--sample', type=int, default=200, help='inserts timed at each checkpoint')
+    args = parser.parse_args()
+
+    allocator = IdAllocator()
+    actors = {}
+    print(f"{'actors':>10} {'last-key (us/insert)':>22} {'allocator (us/insert)':>22}")
+    for checkpoint in args.checkpoints:
+        while len(actors) < checkpoint:
+            allocator_insert(actors, f'actor {len(actors)}', allocator)
+
+        start = time.perf_counter()
+        for i in range(args.sample):
+            last_key_insert(actors, f'timed last-key {checkpoint} {i}')
+        last_key_us = (time.perf_counter() - start) / args.sample * 1e6
+
+        start = time.perf_counter()
+        for i in range(args.sample):
+            allocator_insert(actors, f'timed allocator {checkpoint} {i}', allocator)
+        allocator_us = (time.perf_counter() - start) / args.sample * 1e6
+
+        print(f"{checkpoint:>10} {last_key_us:>22.2f} {allocator_us:>22.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Actors with thousands of credits: linking new movies to them, and fetching their
+movies with full details.
+
+    link       add_movies of one more movie for an actor who already has N credits,
+               and the linear filmography scan it used to do for comparison
+    fetch      an actor's movies over gRPC: GetActor then one GetMovie per title,
+               GetActor then BatchGetMovies, and one GetMoviesByActor stream
+
+Run from the repository root:
+    python -m benchmarks.bench_actor_movies --credits 100 1000 5000
+"""
+import argparse
+import time
+
+import grpc
+
+import movies_management_pb2
+import movies_management_pb2_grpc
+from benchmarks._common import start_server, auth_metadata
+from db_mimic import db, Movie, names
+
+
+def seed(credits):
+    """
+    Gives 'Actor <n>' n credits for every n in `credits`, with a co-star per movie
+    """
+    for count in credits:
+        for first in range(0, count, 1000):
+            db.add_movies([Movie(f'{count}-{i}', f'Credit {count} {i}', [f'Actor {count}', f'Co-star {i}'],
+                                 f'Director {i % 50}', 3.0)
+                           for i in range(first, min(first + 1000, count))])
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def link(count, repeat):
+    """
+    Microseconds to add one movie to 'Actor <count>', and for the old membership scan
+    """
+    added = iter(range(repeat * 2))
+
+    def add():
+        i = next(added)
+        db.add_movies([Movie(f'extra-{count}-{i}', f'Extra {count} {i}', [f'Actor {count}'], 'Director', 3.0)])
+
+    movie_ids = db.get_actor(f'Actor {count}')._movie_ids
+    missing = names.intern('Not a credit')
+    return timed(add, repeat) * 1e6, timed(lambda: missing in movie_ids, repeat) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--credits', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    seed(args.credits)
+    print(f"{'credits':>8} {'add movie (us)':>15} {'old scan (us)':>14}")
+    for count in args.credits:
+        add_us, scan_us = link(count, args.repeat)
+        print(f"{count:>8} {add_us:>15.1f} {scan_us:>14.1f}")
+
+    server, target = start_server()
+    metadata = auth_metadata()
+    print(f"\n{'credits':>8} {'GetMovie x N (ms)':>18} {'BatchGetMovies (ms)':>20} {'GetMoviesByActor (ms)':>22}")
+    with grpc.insecure_channel(target) as channel:
+        stub = movies_management_pb2_grpc.MoviesServiceStub(channel)
+        for count in args.credits:
+            actor_request = movies_management_pb2.GetActorRequest(actor_name=f'Actor {count}')
+
+            def per_movie():
+                actor = stub.GetActor(actor_request, metadata=metadata)
+                for name in actor.movie_names:
+                    stub.GetMovie(movies_management_pb2.GetMovieRequest(name=name), metadata=metadata)
+
+            def batched():
+                actor = stub.GetActor(actor_request, metadata=metadata)
+                stub.BatchGetMovies(movies_management_pb2.BatchGetMoviesRequest(names=actor.movie_names),
+                                    metadata=metadata)
+
+            def streamed():
+                request = movies_management_pb2.GetMoviesByActorRequest(actor_name=f'Actor {count}')
+                for _ in stub.GetMoviesByActor(request, metadata=metadata):
+                    pass
+
+            print(f"{count:>8} {timed(per_movie, 1) * 1000:>18.1f} {timed(batched, args.repeat) * 1000:>20.1f} "
+                  f"{timed(streamed, args.repeat) * 1000:>22.1f}")
+    server.stop(None)
+
+
+if __name__ == '__main__':
+    main()
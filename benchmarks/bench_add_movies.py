@@ -0,0 +1,54 @@
+"""
+Ingestion throughput: unary AddMovie calls vs the client-streaming AddMovies RPC.
+
+Both paths reuse a single channel so the comparison isolates per-call overhead;
+the per-call-channel client.add_movie helper is slower still.
+
+Run from the repository root:
+    python -m benchmarks.bench_add_movies --count 100000
+"""
+import argparse
+import time
+
+import grpc
+
+import movies_management_pb2
+import movies_management_pb2_grpc
+from benchmarks._common import start_server, auth_metadata
+
+
+def make_requests(prefix, count):
+    for i in range(count):
+        yield movies_management_pb2.AddMovieRequest(
+            id=str(i), name=f'{prefix} {i}', actors=[f'Actor {i % 10000}', f'Actor {(i * 3) % 10000}'],
+            director=f'Director {i % 1000}', rating=3.5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=20_000)
+    args = parser.parse_args()
+
+    server, target = start_server()
+    metadata = auth_metadata()
+    with grpc.insecure_channel(target) as channel:
+        stub = movies_management_pb2_grpc.MoviesServiceStub(channel)
+
+        start = time.perf_counter()
+        for request in make_requests('Unary', args.count):
+            stub.AddMovie(request, metadata=metadata)
+        unary_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        response = stub.AddMovies(make_requests('Streamed', args.count), metadata=metadata)
+        stream_s = time.perf_counter() - start
+        assert response.added == args.count, response.failed
+    server.stop(None)
+
+    print(f"{'path':>10} {'seconds':>10} {'movies/s':>12}")
+    print(f"{'AddMovie':>10} {unary_s:>10.2f} {args.count / unary_s:>12,.0f}")
+    print(f"{'AddMovies':>10} {stream_s:>10.2f} {args.count / stream_s:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
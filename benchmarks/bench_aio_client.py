@@ -0,0 +1,50 @@
+"""
+1k GetMovie lookups: sequential MoviesClient vs concurrent AsyncMoviesClient fan-out.
+
+Run from the repository root:
+    python -m benchmarks.bench_aio_client --lookups 1000 --concurrency 10 50 200
+"""
+import argparse
+import asyncio
+import time
+
+from aio_client import AsyncMoviesClient
+from benchmarks._common import start_server, auth_metadata
+from client import MoviesClient
+
+
+async def fan_out(target, metadata, names, concurrency):
+    async with AsyncMoviesClient(target, metadata=metadata, max_concurrency=concurrency, timeout=30) as movies:
+        await movies.get_movie(names[0])
+        start = time.perf_counter()
+        await movies.get_movies(names)
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--lookups', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 50, 200])
+    args = parser.parse_args()
+
+    server, target = start_server()
+    metadata = [auth_metadata()[0]]
+    names = ['Avengers'] * args.lookups
+
+    with MoviesClient([target], metadata=metadata) as movies:
+        movies.get_movie(names[0])
+        start = time.perf_counter()
+        for name in names:
+            movies.get_movie(name)
+        sequential_s = time.perf_counter() - start
+
+    print(f"{'client':>20} {'total (ms)':>12} {'lookups/s':>12}")
+    print(f"{'sequential':>20} {sequential_s * 1e3:>12.0f} {args.lookups / sequential_s:>12,.0f}")
+    for concurrency in args.concurrency:
+        elapsed = asyncio.run(fan_out(target, metadata, names, concurrency))
+        print(f"{f'async x{concurrency}':>20} {elapsed * 1e3:>12.0f} {args.lookups / elapsed:>12,.0f}")
+    server.stop(None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Per-item latency of the unary GetMovie/GetActor RPCs vs BatchGetMovies/BatchGetActors.
+
+Simulates rendering a page: N movies plus their cast, fetched one RPC per item or
+one RPC per batch over the same channel.
+
+Run from the repository root:
+    python -m benchmarks.bench_batch_get --page-sizes 50 100 200
+"""
+import argparse
+import time
+
+import grpc
+
+import movies_management_pb2
+import movies_management_pb2_grpc
+from benchmarks._common import start_server, auth_metadata
+from db_mimic import db, Movie
+
+
+def seed(size):
+    db.add_movies([Movie(str(i), f'Page Movie {i}', [f'Page Actor {i}'], f'Director {i % 100}', 3.0)
+                   for i in range(size)])
+
+
+def per_item(stub, movie_names, actor_names, metadata):
+    for name in movie_names:
+        stub.GetMovie(movies_management_pb2.GetMovieRequest(name=name), metadata=metadata)
+    for name in actor_names:
+        stub.GetActor(movies_management_pb2.GetActorRequest(actor_name=name), metadata=metadata)
+
+
+def batched(stub, movie_names, actor_names, metadata):
+    stub.BatchGetMovies(movies_management_pb2.BatchGetMoviesRequest(names=movie_names), metadata=metadata)
+    stub.BatchGetActors(movies_management_pb2.BatchGetActorsRequest(actor_names=actor_names), metadata=metadata)
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--page-sizes', type=int, nargs='+', default=[50, 100, 200])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    seed(max(args.page_sizes))
+    server, target = start_server()
+    metadata = auth_metadata()
+    print(f"{'page':>6} {'per-item (us/item)':>20} {'batched (us/item)':>20}")
+    with grpc.insecure_channel(target) as channel:
+        stub = movies_management_pb2_grpc.MoviesServiceStub(channel)
+        for size in args.page_sizes:
+            movie_names = [f'Page Movie {i}' for i in range(size)]
+            actor_names = [f'Page Actor {i}' for i in range(size)]
+            items = 2 * size
+            unary_s = timed(lambda: per_item(stub, movie_names, actor_names, metadata), args.repeat)
+            batch_s = timed(lambda: batched(stub, movie_names, actor_names, metadata), args.repeat)
+            print(f"{size:>6} {unary_s / items * 1e6:>20.1f} {batch_s / items * 1e6:>20.1f}")
+    server.stop(None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+Compares GetMoviesByDirector lookup latency: full catalog scan vs director index.
+
+Run from the repository root:
+    python -m benchmarks.bench_director_index --sizes 10000 100000 1000000
+"""
+import argparse
+import timeit
+
+from db_mimic import Movie, MovieStore
+
+
+def populate(size, directors):
+    store = MovieStore()
+    for i in range(size):
+        store.add_movie(Movie(str(i), f'Movie {i}', ['Actor A', 'Actor B'], f'Director {i % directors}', 3.0))
+    return store
+
+
+def scan(store, director):
+    return [movie for movie in store._movies.values() if movie.director == director]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--directors', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'movies':>10} {'scan (ms)':>12} {'index (ms)':>12} {'speedup':>10}")
+    for size in args.sizes:
+        store = populate(size, args.directors)
+        director = 'Director 7'
+        assert len(scan(store, director)) == len(store.get_movies_by_director(director))
+        scan_s = min(timeit.repeat(lambda: scan(store, director), number=1, repeat=args.repeat))
+        index_s = min(timeit.repeat(lambda: store.get_movies_by_director(director), number=1, repeat=args.repeat))
+        print(f"{size:>10} {scan_s * 1e3:>12.3f} {index_s * 1e3:>12.4f} {scan_s / index_s:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Encode cost per MovieResponse: building and serializing the message on every read
+vs sending the bytes MovieStore keeps pre-encoded.
+
+Run from the repository root:
+    python -m benchmarks.bench_encoded_movies --reads 1000000
+"""
+import argparse
+import time
+
+from db_mimic import Movie, MovieStore, encode_movie
+from server import serialize_response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--reads', type=int, default=1_000_000)
+    parser.add_argument('--actors', type=int, default=8, help='cast size per movie')
+    args = parser.parse_args()
+
+    store = MovieStore()
+    store.add_movie(Movie('1', 'Encoded Movie', [f'Cast Member {i}' for i in range(args.actors)],
+                          'Some Director', 4.1))
+
+    start = time.perf_counter()
+    for _ in range(args.reads):
+        encode_movie(store.get_movie('encoded movie'))
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.reads):
+        serialize_response(store.get_movie_bytes('encoded movie'))
+    stored_s = time.perf_counter() - start
+
+    print(f"{'path':>12} {'ns/response':>12}")
+    print(f"{'build+encode':>12} {build_s / args.reads * 1e9:>12.0f}")
+    print(f"{'pre-encoded':>12} {stored_s / args.reads * 1e9:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+Auth cost per RPC with and without the verified-token cache.
+
+"uncached" is the full HS256 decode and signature check that every RPC used to
+pay; "cached" is verify_jwt with the token already verified once.
+
+Run from the repository root:
+    python -m benchmarks.bench_jwt_cache --calls 100000
+"""
+import argparse
+import timeit
+import warnings
+
+from jwt_utils import create_jwt, decode_jwt, verify_jwt, token_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=100_000)
+    parser.add_argument('--tokens', type=int, default=100, help='distinct tokens cycled through')
+    args = parser.parse_args()
+
+    warnings.simplefilter('ignore')
+    tokens = [create_jwt(user_id=f'user{i}') for i in range(args.tokens)]
+    token_cache.clear()
+
+    def uncached():
+        for i in range(args.calls):
+            decode_jwt(tokens[i % len(tokens)])
+
+    def cached():
+        for i in range(args.calls):
+            verify_jwt(tokens[i % len(tokens)])
+
+    uncached_s = min(timeit.repeat(uncached, number=1, repeat=3))
+    cached_s = min(timeit.repeat(cached, number=1, repeat=3))
+
+    print(f"{'uncached':>10} {uncached_s / args.calls * 1e6:>8.2f} us/call")
+    print(f"{'cached':>10} {cached_s / args.calls * 1e6:>8.2f} us/call")
+    print(f"cache stats: {token_cache.stats()}")
+
+
+if __name__ == '__main__':
+    main()
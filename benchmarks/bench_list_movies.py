@@ -0,0 +1,94 @@
+"""
+ListMovies page latency by depth: walks every page of a listing, following the
+position each page returns, and reports the median and p99 latency of the pages
+at depths 1-9, 10-99, 100-999, ... With keyset pagination a page deep in the
+listing costs the same as the first one.
+
+Listings:
+    all        every movie, by name
+    director   the movies of the most prolific director (--director-share of the catalog)
+    rating     every movie rated 4 or more, by name
+    desc       every movie, by name descending
+
+Run from the repository root:
+    python -m benchmarks.bench_list_movies --movies 1000000 --backends memory sqlite
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks.bench_server_modes import percentile
+from db_mimic import MovieStore, Movie
+from sqlite_store import SQLiteMovieStore
+
+LISTINGS = {
+    'all': {},
+    'director': {'director': 'Director 0'},
+    'rating': {'min_rating': 4.0},
+    'desc': {'descending': True},
+}
+
+
+def load(store, args):
+    rng = random.Random(0)
+    for first in range(0, args.movies, 10000):
+        store.add_movies([Movie(str(i), f'Movie {rng.randrange(10 ** 9):09d} {i}',
+                                [f'Actor {rng.randrange(args.movies // 10 or 1)}' for _ in range(3)],
+                                'Director 0' if rng.random() < args.director_share
+                                else f'Director {rng.randrange(1, 10000)}',
+                                rng.choice((1.0, 2.0, 3.0, 3.5, 4.0, 4.5, 5.0)))
+                          for i in range(first, min(first + 10000, args.movies))])
+
+
+def walk(store, page_size, filters):
+    """
+    Lists every page, returns the latency of each in milliseconds
+    """
+    latencies = []
+    after = None
+    while True:
+        start = time.perf_counter()
+        _, after = store.list_movies(limit=page_size, after=after, **filters)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if after is None:
+            return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--movies', type=int, default=200_000)
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--director-share', type=float, default=0.05)
+    parser.add_argument('--backends', nargs='+', choices=('memory', 'sqlite'), default=['memory', 'sqlite'])
+    parser.add_argument('--dir', default=None)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(dir=args.dir)
+    try:
+        for backend in args.backends:
+            if backend == 'memory':
+                store = MovieStore()
+            else:
+                store = SQLiteMovieStore(os.path.join(directory, 'list.db'))
+            start = time.perf_counter()
+            load(store, args)
+            print(f"\n{backend}: loaded {args.movies:,} movies in {time.perf_counter() - start:.1f}s")
+            print(f"{'listing':>10} {'pages':>12} {'p50 ms':>8} {'p99 ms':>8}")
+            for name, filters in LISTINGS.items():
+                latencies = walk(store, args.page_size, filters)
+                first = 1
+                while first <= len(latencies):
+                    depth = sorted(latencies[first - 1:first * 10 - 1])
+                    print(f"{name:>10} {f'{first}-{min(first * 10 - 1, len(latencies))}':>12} "
+                          f"{percentile(depth, 0.5):>8.3f} {percentile(depth, 0.99):>8.3f}")
+                    first *= 10
+            store.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Cost of the MetricsInterceptor per RPC.
+
+    handler    a unary and a streaming handler called directly, plain and wrapped
+               by the interceptor, from --threads threads at once; the difference
+               is what the metrics add to every call
+    server     GetMovie round trips against in-process servers built with and
+               without metrics, from --clients client threads
+
+Run from the repository root:
+    python -m benchmarks.bench_metrics --calls 200000 --threads 1 8
+"""
+import argparse
+import logging
+import threading
+import time
+
+import grpc
+
+import movies_management_pb2
+import movies_management_pb2_grpc
+from benchmarks._common import auth_metadata
+from metrics import Metrics, MetricsInterceptor
+from server import create_server
+
+METHOD = '/movies_management.MoviesService/GetMovie'
+
+
+class Context:
+    """
+    The part of grpc.ServicerContext the interceptor reads
+    """
+
+    def code(self):
+        return None
+
+
+class Details:
+    method = METHOD
+    invocation_metadata = ()
+
+
+def handlers(metrics):
+    """
+    Plain and instrumented (unary, stream of 3) behaviours
+    """
+    def unary(request, context):
+        return request
+
+    def stream(request, context):
+        yield request
+        yield request
+        yield request
+
+    plain = (grpc.unary_unary_rpc_method_handler(unary), grpc.unary_stream_rpc_method_handler(stream))
+    interceptor = MetricsInterceptor(metrics)
+    wrapped = tuple(interceptor.intercept_service(lambda _, handler=handler: handler, Details()) for handler in plain)
+    return ((plain[0].unary_unary, plain[1].unary_stream),
+            (wrapped[0].unary_unary, wrapped[1].unary_stream))
+
+
+def per_call(behavior, calls, threads, streaming):
+    """
+    Microseconds per call of `behavior`, with `threads` threads each making `calls` calls
+    """
+    context = Context()
+
+    def worker():
+        if streaming:
+            for i in range(calls):
+                for _ in behavior(i, context):
+                    pass
+        else:
+            for i in range(calls):
+                behavior(i, context)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return (time.perf_counter() - start) / (calls * threads) * 1e6
+
+
+def server_qps(metrics, clients, seconds):
+    server, port = create_server('localhost:0', metrics=metrics)
+    server.start()
+    metadata = auth_metadata()
+    request = movies_management_pb2.GetMovieRequest(name='Avengers')
+    counts = []
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        count = 0
+        with grpc.insecure_channel(f'localhost:{port}') as channel:
+            stub = movies_management_pb2_grpc.MoviesServiceStub(channel)
+            while time.perf_counter() < deadline:
+                stub.GetMovie(request, metadata=metadata)
+                count += 1
+        counts.append(count)
+
+    pool = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    server.stop(None)
+    return sum(counts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=200_000)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 8])
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    print(f"{'handler':>8} {'threads':>8} {'plain (us)':>11} {'metrics (us)':>13} {'overhead (us)':>14}")
+    for threads in args.threads:
+        metrics = Metrics()
+        plain, wrapped = handlers(metrics)
+        for kind, streaming in (('unary', False), ('stream', True)):
+            index = int(streaming)
+            calls = args.calls // threads
+            base = per_call(plain[index], calls, threads, streaming)
+            instrumented = per_call(wrapped[index], calls, threads, streaming)
+            print(f"{kind:>8} {threads:>8} {base:>11.2f} {instrumented:>13.2f} {instrumented - base:>14.2f}")
+        metrics.exposition()
+
+    print(f"\n{'server':>8} {'GetMovie/s':>11}")
+    for label, metrics in (('plain', None), ('metrics', Metrics())):
+        print(f"{label:>8} {server_qps(metrics, args.clients, args.seconds):>11,.0f}")
+
+
+if __name__ == '__main__':
+    main()
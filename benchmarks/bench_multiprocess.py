@@ -0,0 +1,84 @@
+"""
+GetMovie QPS against `server.py --workers N` for increasing N.
+
+Load comes from several client processes (the client is GIL-bound too), each with
+its own connection so SO_REUSEPORT spreads them across the server workers. On a
+multi-core box QPS should scale close to linearly until clients or cores run out.
+
+Run from the repository root:
+    python -m benchmarks.bench_multiprocess --workers 1 2 4 8 --client-processes 16
+"""
+import argparse
+import multiprocessing
+import subprocess
+import sys
+import threading
+import time
+import warnings
+
+import grpc
+
+import movies_management_pb2
+import movies_management_pb2_grpc
+from benchmarks.bench_server_modes import free_port
+
+
+def client_process(target, threads, duration, results):
+    warnings.simplefilter('ignore')
+    from benchmarks._common import auth_metadata
+
+    metadata = auth_metadata()
+    counts = [0] * threads
+    with grpc.insecure_channel(target) as channel:
+        grpc.channel_ready_future(channel).result(timeout=10)
+        stub = movies_management_pb2_grpc.MoviesServiceStub(channel)
+        request = movies_management_pb2.GetMovieRequest(name='Avengers')
+        deadline = time.perf_counter() + duration
+
+        def run(slot):
+            while time.perf_counter() < deadline:
+                stub.GetMovie(request, metadata=metadata)
+                counts[slot] += 1
+
+        workers = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    results.put(sum(counts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--client-processes', type=int, default=8)
+    parser.add_argument('--client-threads', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    print(f"{'workers':>8} {'GetMovie/s':>12}")
+    for workers in args.workers:
+        port = free_port()
+        target = f'localhost:{port}'
+        server = subprocess.Popen([sys.executable, 'server.py', '--workers', str(workers), '--address', target],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            time.sleep(1 + 0.5 * workers)
+            results = context.Queue()
+            clients = [context.Process(target=client_process,
+                                       args=(target, args.client_threads, args.duration, results))
+                       for _ in range(args.client_processes)]
+            for client in clients:
+                client.start()
+            total = sum(results.get() for _ in clients)
+            for client in clients:
+                client.join()
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"{workers:>8} {total / args.duration:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
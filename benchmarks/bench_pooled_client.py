@@ -0,0 +1,50 @@
+"""
+GetMovie latency: the per-call-channel helpers in client.py vs the pooled MoviesClient.
+
+Run from the repository root:
+    python -m benchmarks.bench_pooled_client --calls 2000
+"""
+import argparse
+import contextlib
+import io
+import time
+
+import client
+from benchmarks._common import start_server, auth_metadata
+
+
+def timed_calls(fn, calls):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--channels', type=int, default=2)
+    args = parser.parse_args()
+
+    server, target = start_server()
+    metadata = [auth_metadata()[0]]
+
+    client.SERVER_ADDRESS = target
+    with contextlib.redirect_stdout(io.StringIO()):
+        helper = timed_calls(lambda: client.get_movies('Avengers', metadata=metadata), args.calls)
+
+    with client.MoviesClient([target], channels_per_target=args.channels, metadata=metadata) as pooled:
+        pooled.get_movie('Avengers')
+        pool = timed_calls(lambda: pooled.get_movie('Avengers'), args.calls)
+    server.stop(None)
+
+    print(f"{'client':>14} {'p50 (us)':>10} {'p99 (us)':>10}")
+    print(f"{'per-call':>14} {helper[0] * 1e6:>10.0f} {helper[1] * 1e6:>10.0f}")
+    print(f"{'MoviesClient':>14} {pool[0] * 1e6:>10.0f} {pool[1] * 1e6:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
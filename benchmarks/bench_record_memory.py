@@ -0,0 +1,93 @@
+"""
+Bytes per movie and per actor: plain dataclass records vs the compact slotted
+records (interned names, integer-id arrays) in db_mimic.
+
+Builds the same synthetic catalog both ways and measures allocations with
+tracemalloc. The compact figures include the name table: movies pay for interning
+actor and director names, actors pay for interning the movie titles in their
+filmographies.
+
+Run from the repository root:
+    python -m benchmarks.bench_record_memory --movies 1000000
+"""
+import argparse
+import gc
+import tracemalloc
+from dataclasses import dataclass
+from typing import List
+
+import db_mimic
+from db_mimic import Movie, Actor
+
+
+@dataclass
+class DataclassMovie:
+    id: str
+    name: str
+    actors: List[str]
+    director: str
+    rating: float
+
+
+@dataclass
+class DataclassActor:
+    id: str
+    actor_name: str
+    movie_names: List[str]
+
+
+def catalog(movies, actors, cast_size):
+    """
+    Yields (id, name, cast, director, rating) with names built fresh every time,
+    as they would arrive off the wire
+    """
+    for i in range(movies):
+        cast = [f'Actor {(i * 31 + j) % actors}' for j in range(cast_size)]
+        yield str(i), f'Movie {i}', cast, f'Director {i % (movies // 20 + 1)}', 3.5
+
+
+def measure(build):
+    """
+    Returns what build() returns and the bytes it left allocated
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def build_movies(movie_class, args):
+    return [movie_class(*row) for row in catalog(args.movies, args.actors, args.cast)]
+
+
+def build_actors(actor_class, movies):
+    filmographies = {}
+    for movie in movies:
+        for actor in movie.actors:
+            filmographies.setdefault(actor, []).append(movie.name)
+    return [actor_class(str(i), name, films) for i, (name, films) in enumerate(filmographies.items())]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--movies', type=int, default=1_000_000)
+    parser.add_argument('--actors', type=int, default=200_000)
+    parser.add_argument('--cast', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'layout':>10} {'bytes/movie':>12} {'bytes/actor':>12} {'total (MB)':>12}")
+    for label, movie_class, actor_class in (('dataclass', DataclassMovie, DataclassActor),
+                                            ('compact', Movie, Actor)):
+        # Start from an empty name table so its size is counted in the compact figures
+        db_mimic.names = db_mimic.NameTable()
+        movies, movie_bytes = measure(lambda: build_movies(movie_class, args))
+        actors, actor_bytes = measure(lambda: build_actors(actor_class, movies))
+        print(f"{label:>10} {movie_bytes / len(movies):>12.0f} {actor_bytes / len(actors):>12.0f} "
+              f"{(movie_bytes + actor_bytes) / 1e6:>12.1f}")
+        del movies, actors
+
+
+if __name__ == '__main__':
+    main()
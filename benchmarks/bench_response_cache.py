@@ -0,0 +1,97 @@
+"""
+Serialization work saved by the GetActor response cache under Zipf traffic.
+
+Calls the MoviesService handlers directly (no network) and serializes each
+response, as gRPC would, with the response cache disabled and enabled. GetMovie
+is part of the mix but is always served from the store's pre-encoded bytes. A
+share of the traffic is ChangeRating writes so invalidation is exercised too.
+
+Run from the repository root:
+    python -m benchmarks.bench_response_cache --movies 100000 --requests 200000 --zipf 1.1
+"""
+import argparse
+import bisect
+import itertools
+import logging
+import random
+import time
+
+import movies_management_pb2
+from db_mimic import db, Movie
+from server import MoviesService, serialize_response
+
+
+class BenchContext:
+    """
+    Bare-bones stand-in for grpc.ServicerContext
+    """
+
+    def invocation_metadata(self):
+        return (('trace-id', 'bench'),)
+
+    def set_code(self, code):
+        pass
+
+    def set_details(self, details):
+        pass
+
+
+def zipf_sampler(size, exponent, rng):
+    weights = [1 / (rank ** exponent) for rank in range(1, size + 1)]
+    cumulative = list(itertools.accumulate(weights))
+    total = cumulative[-1]
+    return lambda: bisect.bisect_left(cumulative, rng.random() * total)
+
+
+def run(service, keys, write_ratio, rng):
+    context = BenchContext()
+    start = time.perf_counter()
+    for key in keys:
+        if rng.random() < write_ratio:
+            service.ChangeRating(movies_management_pb2.ScoreRequest(movie_name=f'Zipf Movie {key}',
+                                                                    rating=rng.uniform(1, 5)), context)
+        else:
+            serialize_response(service.GetMovie(movies_management_pb2.GetMovieRequest(name=f'Zipf Movie {key}'),
+                                                context))
+            serialize_response(service.GetActor(movies_management_pb2.GetActorRequest(actor_name=f'Zipf Actor {key}'),
+                                                context))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--movies', type=int, default=100_000)
+    parser.add_argument('--requests', type=int, default=200_000)
+    parser.add_argument('--zipf', type=float, default=1.1)
+    parser.add_argument('--write-ratio', type=float, default=0.01)
+    parser.add_argument('--cache-size', type=int, default=10_000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    db.add_movies([Movie(str(i), f'Zipf Movie {i}', [f'Zipf Actor {i}', 'Zipf Regular'], f'Director {i % 100}',
+                         3.0) for i in range(args.movies)])
+    sample = zipf_sampler(args.movies, args.zipf, random.Random(1))
+    keys = [sample() for _ in range(args.requests)]
+
+    uncached = MoviesService(response_cache_size=0)
+    cached = MoviesService(response_cache_size=args.cache_size)
+
+    # Sanity check: a rating change must never be served stale
+    context = BenchContext()
+    cached.GetMovie(movies_management_pb2.GetMovieRequest(name='Zipf Movie 0'), context)
+    cached.ChangeRating(movies_management_pb2.ScoreRequest(movie_name='Zipf Movie 0', rating=1.5), context)
+    response = cached.GetMovie(movies_management_pb2.GetMovieRequest(name='Zipf Movie 0'), context)
+    assert movies_management_pb2.MovieResponse.FromString(serialize_response(response)).rating == 1.5
+
+    uncached_s = run(uncached, keys, args.write_ratio, random.Random(2))
+    cached_s = run(cached, keys, args.write_ratio, random.Random(2))
+
+    print(f"{'cache':>10} {'us/request':>12}")
+    print(f"{'off':>10} {uncached_s / len(keys) * 1e6:>12.2f}")
+    print(f"{'on':>10} {cached_s / len(keys) * 1e6:>12.2f}")
+    for table, stats in cached.cache_stats().items():
+        print(f"{table}: hit rate {stats['hit_rate']:.1%} ({stats['hits']} hits, {stats['misses']} misses)")
+
+
+if __name__ == '__main__':
+    main()
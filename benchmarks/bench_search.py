@@ -0,0 +1,108 @@
+"""
+SearchMovies latency at catalog scale: prefix, multi-word prefix and misspelled
+queries against a store of --movies synthetic titles (plus their actors).
+
+Titles are 1-4 words drawn with a log-uniform skew from a generated vocabulary and
+a few very common words ("the", "of", ...), so common prefixes have long posting
+lists. Queries are derived from random titles: the start of a word, the first
+words with the last one cut short, and a word with two letters swapped.
+
+Run from the repository root:
+    python -m benchmarks.bench_search --movies 1000000 --backends memory sqlite
+"""
+import argparse
+import os
+import random
+import shutil
+import string
+import tempfile
+import time
+
+from benchmarks.bench_server_modes import percentile
+from db_mimic import MovieStore, Movie
+from sqlite_store import SQLiteMovieStore
+
+COMMON_WORDS = ['the', 'of', 'a', 'and', 'in', 'last', 'night', 'return', 'love', 'man']
+
+
+def vocabulary(rng, size):
+    return [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9))) for _ in range(size)]
+
+
+def make_titles(rng, count, words):
+    titles = []
+    for i in range(count):
+        title = [rng.choice(COMMON_WORDS) if rng.random() < 0.2 else words[int(len(words) ** rng.random()) - 1]
+                 for _ in range(rng.randint(1, 4))]
+        titles.append(' '.join(title).title() + f' {i}')
+    return titles
+
+
+def make_queries(rng, titles, count):
+    queries = {'prefix': [], 'multi-word': [], 'typo': []}
+    for _ in range(count):
+        title_words = rng.choice(titles).lower().split()[:-1]
+        word = rng.choice(title_words)
+        queries['prefix'].append(word[:rng.randint(min(2, len(word)), len(word))])
+        last = title_words[-1]
+        queries['multi-word'].append(' '.join(title_words[:-1] + [last[:max(1, len(last) // 2)]]))
+        if len(word) > 3:
+            i = rng.randrange(len(word) - 1)
+            word = word[:i] + word[i + 1] + word[i] + word[i + 2:]
+        queries['typo'].append(word)
+    return queries
+
+
+def load(store, titles, actors):
+    start = time.perf_counter()
+    batch = 10000
+    for first in range(0, len(titles), batch):
+        store.add_movies([Movie(str(i), titles[i], [actors[(i * 7 + j) % len(actors)] for j in range(2)],
+                                f'Director {i % 10000}', 3.5)
+                          for i in range(first, min(first + batch, len(titles)))])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--movies', type=int, default=200_000)
+    parser.add_argument('--actors', type=int, default=50_000)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--backends', nargs='+', choices=('memory', 'sqlite'), default=['memory'])
+    parser.add_argument('--dir', default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    words = vocabulary(rng, 50_000)
+    titles = make_titles(rng, args.movies, words)
+    actors = [f'{rng.choice(words).title()} {rng.choice(words).title()}' for _ in range(args.actors)]
+    queries = make_queries(rng, titles, args.queries)
+
+    directory = tempfile.mkdtemp(dir=args.dir)
+    try:
+        for backend in args.backends:
+            if backend == 'memory':
+                store = MovieStore()
+            else:
+                store = SQLiteMovieStore(os.path.join(directory, 'search.db'))
+            load_s = load(store, titles, actors)
+            print(f"\n{backend}: loaded and indexed {args.movies:,} movies in {load_s:.1f}s")
+            print(f"{'query':>12} {'p50 ms':>8} {'p99 ms':>8} {'hits':>6}")
+            for kind, kind_queries in queries.items():
+                latencies = []
+                hits = 0
+                for query in kind_queries:
+                    start = time.perf_counter()
+                    hits += len(store.search(query, args.limit)) > 0
+                    latencies.append((time.perf_counter() - start) * 1000)
+                latencies.sort()
+                print(f"{kind:>12} {percentile(latencies, 0.5):>8.2f} {percentile(latencies, 0.99):>8.2f} "
+                      f"{hits / len(kind_queries):>6.0%}")
+            store.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Load test comparing the thread-pool server with the grpc.aio server.
+
+Starts `server.py --mode <mode>` in a subprocess, optionally pins it with slow
+GetMoviesByDirector consumers, then drives GetMovie from many concurrent clients
+and reports throughput and latency percentiles for each mode.
+
+Run from the repository root:
+    python -m benchmarks.bench_server_modes --clients 1000 --slow-streams 20
+"""
+import argparse
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+
+import grpc
+
+import movies_management_pb2
+import movies_management_pb2_grpc
+from benchmarks._common import auth_metadata
+
+SLOW_DIRECTOR = 'Slow Director'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+async def seed_slow_director(stub, metadata, count):
+    async def requests():
+        for i in range(count):
+            yield movies_management_pb2.AddMovieRequest(id=str(i), name=f'Slow Movie {i}', actors=['Extra'],
+                                                         director=SLOW_DIRECTOR, rating=3.0)
+    await stub.AddMovies(requests(), metadata=metadata)
+
+
+async def slow_consumer(stub, metadata, stop):
+    call = stub.GetMoviesByDirector(
+        movies_management_pb2.GetMoviesByDirectorRequest(director=SLOW_DIRECTOR), metadata=metadata)
+    try:
+        async for _ in call:
+            if stop.is_set():
+                break
+            await asyncio.sleep(1)
+    finally:
+        call.cancel()
+
+
+async def client(stub, metadata, deadline, latencies, errors):
+    request = movies_management_pb2.GetMovieRequest(name='Avengers')
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            await stub.GetMovie(request, metadata=metadata, timeout=30)
+            latencies.append(time.perf_counter() - start)
+        except grpc.aio.AioRpcError:
+            errors.append(1)
+
+
+async def load(target, args):
+    metadata = auth_metadata()
+    channels = [grpc.aio.insecure_channel(target, options=[('grpc.use_local_subchannel_pool', 1)])
+                for _ in range(args.channels)]
+    stubs = [movies_management_pb2_grpc.MoviesServiceStub(channel) for channel in channels]
+    await asyncio.wait_for(channels[0].channel_ready(), timeout=10)
+
+    stop = asyncio.Event()
+    slow = []
+    if args.slow_streams:
+        await seed_slow_director(stubs[0], metadata, args.slow_movies)
+        slow = [asyncio.create_task(slow_consumer(stubs[i % len(stubs)], metadata, stop))
+                for i in range(args.slow_streams)]
+        await asyncio.sleep(0.5)
+
+    latencies, errors = [], []
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(client(stubs[i % len(stubs)], metadata, deadline, latencies, errors)
+                           for i in range(args.clients)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    for task in slow:
+        task.cancel()
+    await asyncio.gather(*slow, return_exceptions=True)
+    for channel in channels:
+        await channel.close()
+
+    latencies.sort()
+    return len(latencies) / elapsed, percentile(latencies, 0.5), percentile(latencies, 0.99), len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--modes', nargs='+', default=['thread', 'aio'])
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--channels', type=int, default=8)
+    parser.add_argument('--slow-streams', type=int, default=0)
+    parser.add_argument('--slow-movies', type=int, default=20_000)
+    parser.add_argument('--duration', type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(f"{'mode':>8} {'clients':>8} {'rpc/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10} {'errors':>8}")
+    for mode in args.modes:
+        port = free_port()
+        process = subprocess.Popen([sys.executable, 'server.py', '--mode', mode, '--address', f'localhost:{port}'],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            rps, p50, p99, errors = asyncio.run(load(f'localhost:{port}', args))
+        finally:
+            process.terminate()
+            process.wait()
+        print(f"{mode:>8} {args.clients:>8} {rps:>10,.0f} {p50 * 1e3:>10.2f} {p99 * 1e3:>10.2f} {errors:>8}")
+
+
+if __name__ == '__main__':
+    main()
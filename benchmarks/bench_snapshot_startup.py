@@ -0,0 +1,119 @@
+"""
+Startup time and RSS: building the catalog eagerly into Movie/Actor records vs
+memory-mapping a snapshot written by MovieStore.write_snapshot.
+
+Each variant runs in a fresh interpreter. "eager" reads movie rows from a
+JSON-lines file and inserts them with add_movies, as a rebuild from scratch does;
+"mapped" calls load_snapshot. Both then serve --reads random GetMovie lookups
+(the encoded bytes, as the server does) and report RSS again, since the mapped
+store grows as records are touched.
+
+Run from the repository root:
+    python -m benchmarks.bench_snapshot_startup --movies 1000000
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from db_mimic import MovieStore, Movie, movie_row
+
+BATCH_SIZE = 10000
+
+
+def rss_mb():
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return float('nan')
+
+
+def make_movie(i, actors):
+    return Movie(str(i), f'Movie {i}', [f'Actor {(i * 31 + j) % actors}' for j in range(4)],
+                 f'Director {i % 20000}', 3.5)
+
+
+def prepare(directory, movies, actors):
+    """
+    Writes the catalog as JSON-lines rows and as a mapped snapshot
+    """
+    store = MovieStore()
+    rows_path = os.path.join(directory, 'movies.jsonl')
+    with open(rows_path, 'w') as rows:
+        for start in range(0, movies, BATCH_SIZE):
+            batch = [make_movie(i, actors) for i in range(start, min(start + BATCH_SIZE, movies))]
+            store.add_movies(batch)
+            for movie in batch:
+                rows.write(json.dumps(movie_row(movie)) + '\n')
+    snapshot_path = os.path.join(directory, 'catalog.mvs')
+    store.write_snapshot(snapshot_path)
+    return rows_path, snapshot_path
+
+
+def child(mode, path, movies, reads):
+    baseline = rss_mb()
+    start = time.perf_counter()
+    store = MovieStore()
+    if mode == 'eager':
+        with open(path) as rows:
+            batch = []
+            for line in rows:
+                batch.append(Movie(*json.loads(line)))
+                if len(batch) == BATCH_SIZE:
+                    store.add_movies(batch)
+                    batch = []
+            store.add_movies(batch)
+    else:
+        store.load_snapshot(path)
+    startup_s = time.perf_counter() - start
+    startup_rss = rss_mb() - baseline
+
+    keys = [f'movie {random.randrange(movies)}' for _ in range(reads)]
+    start = time.perf_counter()
+    for key in keys:
+        assert store.get_movie_bytes(key) is not None
+    reads_s = time.perf_counter() - start
+
+    print(json.dumps({'startup_s': startup_s, 'startup_rss_mb': startup_rss,
+                      'read_us': reads_s / reads * 1e6, 'rss_after_reads_mb': rss_mb() - baseline}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--movies', type=int, default=200_000)
+    parser.add_argument('--actors', type=int, default=50_000)
+    parser.add_argument('--reads', type=int, default=100_000)
+    parser.add_argument('--dir', default=None)
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], args.child[1], args.movies, args.reads)
+        return
+
+    directory = tempfile.mkdtemp(dir=args.dir)
+    try:
+        rows_path, snapshot_path = prepare(directory, args.movies, args.actors)
+        print(f"snapshot: {os.path.getsize(snapshot_path) / 2 ** 20:.1f} MB, "
+              f"rows: {os.path.getsize(rows_path) / 2 ** 20:.1f} MB")
+        print(f"{'mode':>8} {'startup s':>10} {'RSS MB':>8} {'read us':>8} {'RSS after reads':>16}")
+        for mode, path in (('eager', rows_path), ('mapped', snapshot_path)):
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_snapshot_startup', '--movies', str(args.movies),
+                 '--reads', str(args.reads), '--child', mode, path],
+                check=True, capture_output=True, text=True).stdout
+            result = json.loads(output)
+            print(f"{mode:>8} {result['startup_s']:>10.3f} {result['startup_rss_mb']:>8.1f} "
+                  f"{result['read_us']:>8.2f} {result['rss_after_reads_mb']:>16.1f}")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
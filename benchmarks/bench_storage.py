@@ -0,0 +1,115 @@
+"""
+The same workload against every storage backend: the in-memory MovieStore and
+SQLiteMovieStore (a file in --dir, a temporary directory by default).
+
+Phases, each timed separately:
+    load         --movies movies through add_movies in batches of --batch
+    get_movie    random get_movie_bytes lookups
+    get_actor    random get_actor lookups
+    director     get_movie_bytes_by_director scans
+    rating       random change_rating updates
+    mixed        --threads threads doing 90% get_movie_bytes / 10% change_rating
+
+Run from the repository root:
+    python -m benchmarks.bench_storage --movies 100000 --threads 10
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from db_mimic import MovieStore, Movie
+from server import MAX_WORKERS
+from sqlite_store import SQLiteMovieStore
+
+
+def make_movie(i, actors, directors):
+    return Movie(str(i), f'Movie {i}', [f'Actor {(i * 31 + j) % actors}' for j in range(3)],
+                 f'Director {i % directors}', 3.5)
+
+
+def timed(operation, count):
+    """
+    Runs operation(i) for i in range(count), returns operations per second
+    """
+    start = time.perf_counter()
+    for i in range(count):
+        operation(i)
+    return count / (time.perf_counter() - start)
+
+
+def mixed(store, movies, threads, operations):
+    def worker(seed):
+        rng = random.Random(seed)
+        for _ in range(operations):
+            name = f'Movie {rng.randrange(movies)}'
+            if rng.random() < 0.9:
+                store.get_movie_bytes(name)
+            else:
+                store.change_rating(name, rng.uniform(1, 5))
+
+    pool = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return threads * operations / (time.perf_counter() - start)
+
+
+def run(store, args):
+    rng = random.Random(0)
+    results = {}
+
+    start = time.perf_counter()
+    for first in range(0, args.movies, args.batch):
+        store.add_movies([make_movie(i, args.actors, args.directors)
+                          for i in range(first, min(first + args.batch, args.movies))])
+    results['load'] = args.movies / (time.perf_counter() - start)
+
+    results['get_movie'] = timed(lambda _: store.get_movie_bytes(f'movie {rng.randrange(args.movies)}'),
+                                 args.operations)
+    results['get_actor'] = timed(lambda _: store.get_actor(f'actor {rng.randrange(args.actors)}'),
+                                 args.operations)
+    results['director'] = timed(lambda _: store.get_movie_bytes_by_director(
+        f'Director {rng.randrange(args.directors)}'), args.operations // 10)
+    results['rating'] = timed(lambda _: store.change_rating(f'movie {rng.randrange(args.movies)}', 4.0),
+                              args.operations // 10)
+    results['mixed'] = mixed(store, args.movies, args.threads, args.operations // args.threads)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--movies', type=int, default=100_000)
+    parser.add_argument('--actors', type=int, default=20_000)
+    parser.add_argument('--directors', type=int, default=5_000)
+    parser.add_argument('--batch', type=int, default=500)
+    parser.add_argument('--operations', type=int, default=50_000)
+    parser.add_argument('--threads', type=int, default=MAX_WORKERS)
+    parser.add_argument('--dir', default=None)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(dir=args.dir)
+    try:
+        backends = {
+            'memory': MovieStore(),
+            'sqlite': SQLiteMovieStore(os.path.join(directory, 'movies.db'), pool_size=args.threads),
+        }
+        results = {}
+        for name, store in backends.items():
+            results[name] = run(store, args)
+            store.close()
+    finally:
+        shutil.rmtree(directory)
+
+    print(f"{'phase':>10} " + ' '.join(f'{name + " ops/s":>14}' for name in results))
+    for phase in results['memory']:
+        print(f"{phase:>10} " + ' '.join(f'{results[name][phase]:>14,.0f}' for name in results))
+
+
+if __name__ == '__main__':
+    main()
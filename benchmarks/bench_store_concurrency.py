@@ -0,0 +1,84 @@
+"""
+Multi-threaded stress benchmark for MovieStore.
+
+A fixed pool of reader threads hammers get_movie/get_actor while the number of
+writer threads (add_movie/change_rating) is increased. Reads are lock-free, so
+read throughput should hold up as writers are added instead of collapsing behind
+a global lock.
+
+Run from the repository root:
+    python -m benchmarks.bench_store_concurrency --readers 4 --writers 0 1 2 4 8
+"""
+import argparse
+import itertools
+import random
+import threading
+import time
+
+from db_mimic import Movie, MovieStore
+
+
+def seed(store, size):
+    for i in range(size):
+        store.add_movie(Movie(str(i), f'Movie {i}', [f'Actor {i % 5000}', f'Actor {(i * 7) % 5000}'],
+                              f'Director {i % 500}', 3.0))
+
+
+def run(store, size, readers, writers, duration):
+    stop = threading.Event()
+    reads = [0] * readers
+    writes = [0] * writers
+    new_ids = itertools.count(size)
+
+    def reader(slot):
+        rng = random.Random(slot)
+        count = 0
+        while not stop.is_set():
+            i = rng.randrange(size)
+            store.get_movie(f'movie {i}')
+            store.get_actor(f'actor {i % 5000}')
+            count += 2
+        reads[slot] = count
+
+    def writer(slot):
+        rng = random.Random(1000 + slot)
+        count = 0
+        while not stop.is_set():
+            if rng.random() < 0.5:
+                store.change_rating(f'movie {rng.randrange(size)}', rng.uniform(1, 5))
+            else:
+                i = next(new_ids)
+                store.add_movie(Movie(str(i), f'Movie {i}', [f'Actor {i % 5000}'], f'Director {i % 500}', 3.0))
+            count += 1
+        writes[slot] = count
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(reads) / duration, sum(writes) / duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=100_000)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, nargs='+', default=[0, 1, 2, 4, 8])
+    parser.add_argument('--stripes', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{'writers':>8} {'reads/s':>14} {'writes/s':>14}")
+    for writers in args.writers:
+        store = MovieStore(stripes=args.stripes)
+        seed(store, args.size)
+        reads, writes = run(store, args.size, args.readers, writers, args.duration)
+        print(f"{writers:>8} {reads:>14,.0f} {writes:>14,.0f}")
+
+
+if __name__ == '__main__':
+    main()
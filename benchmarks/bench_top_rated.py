@@ -0,0 +1,142 @@
+"""
+Top-N by rating under a mixed stream of rating updates and top-N reads.
+
+Phases, per backend:
+    sort       the old way for comparison: every movie of a director fetched and
+               sorted by rating, and the whole catalog for the global top N
+    top-n      top --top movies from the rating index, globally and per director
+    mixed      --threads threads each doing --operations operations, --update-share
+               of them change_rating on a random movie and the rest top-N reads
+
+Directors get a power-law share of the movies, so some have thousands.
+
+Run from the repository root:
+    python -m benchmarks.bench_top_rated --movies 1000000 --update-share 0.5
+"""
+import argparse
+import heapq
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_server_modes import percentile
+from db_mimic import MovieStore, Movie
+from server import MAX_WORKERS
+from sqlite_store import SQLiteMovieStore
+from storage import BY_RATING
+
+
+def load(store, args):
+    rng = random.Random(0)
+    for first in range(0, args.movies, 10000):
+        store.add_movies([Movie(str(i), f'Movie {i}', [f'Actor {rng.randrange(args.movies // 10 or 1)}'],
+                                f'Director {int(args.directors ** rng.random()) - 1}', round(rng.uniform(1, 5), 2))
+                          for i in range(first, min(first + 10000, args.movies))])
+
+
+def top_rated(store, top, director=None):
+    return store.list_movies(director=director, order=BY_RATING, descending=True, limit=top)[0]
+
+
+def measure(operation, count):
+    """
+    Runs operation(i) for i in range(count), returns the sorted latencies in milliseconds
+    """
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        operation(i)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return sorted(latencies)
+
+
+def mixed(store, args):
+    """
+    Returns updates/s, top-N reads/s and the sorted top-N read latencies
+    """
+    counts = {'update': 0, 'read': 0}
+    read_latencies = []
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        updates = 0
+        latencies = []
+        for _ in range(args.operations):
+            if rng.random() < args.update_share:
+                store.change_rating(f'Movie {rng.randrange(args.movies)}', round(rng.uniform(1, 5), 2))
+                updates += 1
+            else:
+                director = f'Director {rng.randrange(args.directors)}' if rng.random() < 0.5 else None
+                start = time.perf_counter()
+                top_rated(store, args.top, director)
+                latencies.append((time.perf_counter() - start) * 1000)
+        with lock:
+            counts['update'] += updates
+            counts['read'] += len(latencies)
+            read_latencies.extend(latencies)
+
+    pool = [threading.Thread(target=worker, args=(seed,)) for seed in range(args.threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return counts['update'] / elapsed, counts['read'] / elapsed, sorted(read_latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--movies', type=int, default=200_000)
+    parser.add_argument('--directors', type=int, default=10_000)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--reads', type=int, default=2000)
+    parser.add_argument('--operations', type=int, default=2000)
+    parser.add_argument('--update-share', type=float, default=0.5)
+    parser.add_argument('--threads', type=int, default=MAX_WORKERS)
+    parser.add_argument('--backends', nargs='+', choices=('memory', 'sqlite'), default=['memory', 'sqlite'])
+    parser.add_argument('--dir', default=None)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(dir=args.dir)
+    try:
+        for backend in args.backends:
+            if backend == 'memory':
+                store = MovieStore()
+            else:
+                store = SQLiteMovieStore(os.path.join(directory, 'top.db'), pool_size=args.threads)
+            start = time.perf_counter()
+            load(store, args)
+            print(f"\n{backend}: loaded {args.movies:,} movies in {time.perf_counter() - start:.1f}s")
+            print(f"{'phase':>22} {'p50 ms':>9} {'p99 ms':>9}")
+            rng = random.Random(1)
+
+            def report(phase, latencies):
+                print(f"{phase:>22} {percentile(latencies, 0.5):>9.3f} {percentile(latencies, 0.99):>9.3f}")
+
+            # The most prolific director is 'Director 0'
+            report('sort director 0', measure(lambda _: heapq.nlargest(
+                args.top, store.get_movies_by_director('Director 0'), key=lambda movie: movie.rating), 20))
+            report('sort catalog', measure(lambda _: heapq.nlargest(
+                args.top, (store.get_movie(f'Movie {i}') for i in range(args.movies)),
+                key=lambda movie: movie.rating), 2))
+            report('top-n director 0', measure(lambda _: top_rated(store, args.top, 'Director 0'), args.reads))
+            report('top-n random director', measure(
+                lambda _: top_rated(store, args.top, f'Director {rng.randrange(args.directors)}'), args.reads))
+            report('top-n catalog', measure(lambda _: top_rated(store, args.top), args.reads))
+
+            updates, reads, latencies = mixed(store, args)
+            report('mixed top-n', latencies)
+            print(f"{'mixed throughput':>22} {updates:,.0f} updates/s, {reads:,.0f} top-n reads/s "
+                  f"({args.threads} threads, {args.update_share:.0%} updates)")
+            store.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+GetMovie QPS with full, sampled and disabled trace logging.
+
+Modes, each against a fresh in-process server logging to a file:
+    sync       every call traced, records formatted and written on the handler thread
+    full       every call traced, written by the background thread
+    sampled    --sample of the calls traced
+    disabled   no call traced
+
+Run from the repository root:
+    python -m benchmarks.bench_trace_logging --clients 8 --sample 0.01
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import grpc
+
+import movies_management_pb2
+import movies_management_pb2_grpc
+import trace_logging
+from benchmarks._common import auth_metadata
+from server import create_server
+
+
+def qps(clients, seconds):
+    server, port = create_server('localhost:0', metrics=None)
+    server.start()
+    metadata = auth_metadata()
+    request = movies_management_pb2.GetMovieRequest(name='Avengers')
+    counts = []
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        count = 0
+        with grpc.insecure_channel(f'localhost:{port}') as channel:
+            stub = movies_management_pb2_grpc.MoviesServiceStub(channel)
+            while time.perf_counter() < deadline:
+                stub.GetMovie(request, metadata=metadata)
+                count += 1
+        counts.append(count)
+
+    pool = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    server.stop(None)
+    return sum(counts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--sample', type=float, default=0.01)
+    parser.add_argument('--log-format', choices=('text', 'json'), default='text')
+    args = parser.parse_args()
+
+    modes = (
+        ('sync', dict(rate=1.0, background=False)),
+        ('full', dict(rate=1.0)),
+        ('sampled', dict(rate=args.sample)),
+        ('disabled', dict(rate=0.0)),
+    )
+    print(f"{'mode':>9} {'GetMovie/s':>11} {'log lines':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for mode, options in modes:
+            path = os.path.join(directory, f'{mode}.log')
+            with open(path, 'w') as stream:
+                trace_logging.configure(args.log_format, stream=stream, **options)
+                try:
+                    result = qps(args.clients, args.seconds)
+                finally:
+                    trace_logging.shutdown()
+            with open(path) as log:
+                lines = sum(1 for _ in log)
+            print(f"{mode:>9} {result:>11,.0f} {lines:>10,}")
+
+
+if __name__ == '__main__':
+    main()
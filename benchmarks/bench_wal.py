@@ -0,0 +1,92 @@
+"""
+Write-ahead log costs: AddMovie/ChangeRating throughput with persistence off and
+at several sync_every values, then cold-start time (snapshot load + log replay)
+for a store of --movies movies.
+
+The data directories are created under --dir (a temporary directory by default);
+point it at the disk the server would use, fsync latency is what dominates
+sync_every=1.
+
+Run from the repository root:
+    python -m benchmarks.bench_wal --writes 20000 --movies 1000000
+"""
+import argparse
+import shutil
+import tempfile
+import time
+
+from db_mimic import MovieStore, Movie
+
+
+def make_movie(i):
+    return Movie(str(i), f'Movie {i}', [f'Actor {i % 50000}', f'Actor {(i * 7) % 50000}'],
+                 f'Director {i % 5000}', 3.5)
+
+
+def write_throughput(directory, writes, sync_every):
+    """
+    Returns writes/s for a mix of one AddMovie per ChangeRating
+    """
+    store = MovieStore()
+    if sync_every is not None:
+        store.enable_persistence(directory, sync_every=sync_every)
+
+    start = time.perf_counter()
+    for i in range(0, writes, 2):
+        store.add_movie(make_movie(i))
+        store.change_rating(f'Movie {i}', 4.0)
+    elapsed = time.perf_counter() - start
+    store.close()
+    return writes / elapsed
+
+
+def cold_start(directory, movies, tail):
+    """
+    Fills a persistent store with `movies` movies, snapshots it, logs `tail` more
+    writes and returns (seconds to restore, movies restored)
+    """
+    store = MovieStore()
+    store.enable_persistence(directory, sync_every=0, snapshot_every=0)
+    batch = 10000
+    for start in range(0, movies, batch):
+        store.add_movies([make_movie(i) for i in range(start, min(start + batch, movies))])
+    store.snapshot()
+    for i in range(movies, movies + tail):
+        store.add_movie(make_movie(i))
+    store.close()
+    del store
+
+    start = time.perf_counter()
+    restored = MovieStore()
+    restored.enable_persistence(directory, snapshot_every=0)
+    elapsed = time.perf_counter() - start
+    count = restored.movie_count()
+    restored.close()
+    return elapsed, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--writes', type=int, default=20_000)
+    parser.add_argument('--sync-every', type=int, nargs='+', default=[1, 10, 100, 0])
+    parser.add_argument('--movies', type=int, default=100_000)
+    parser.add_argument('--tail', type=int, default=10_000, help="writes logged after the snapshot")
+    parser.add_argument('--dir', default=None)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(dir=args.dir)
+    try:
+        print(f"{'sync_every':>12} {'writes/s':>12}")
+        print(f"{'no log':>12} {write_throughput(None, args.writes, None):>12,.0f}")
+        for sync_every in args.sync_every:
+            directory = tempfile.mkdtemp(dir=root)
+            print(f"{sync_every:>12} {write_throughput(directory, args.writes, sync_every):>12,.0f}")
+
+        elapsed, count = cold_start(tempfile.mkdtemp(dir=root), args.movies, args.tail)
+        print(f"\ncold start: {count:,} movies restored in {elapsed:.2f}s ({count / elapsed:,.0f} movies/s)")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Bounded, thread-safe least-recently-used cache. Entries can carry an absolute
+    expiry time, after which they are treated as missing.
+
+    `version` changes on every invalidation. A reader that builds a value from a
+    source of truth can read `version` first and pass it to put(), which then drops
+    the value if an invalidation happened in between, so a stale value built
+    before a write can't be cached after it.
+    """
+
+    def __init__(self, maxsize=1024, clock=time.time):
+        self.maxsize = maxsize
+        self._clock = clock
+        self._data = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.version = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > self._clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value, expires_at=None, version=None):
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self.version += 1
+            self._data.pop(key, None)
+
+    def invalidate_many(self, keys):
+        with self._lock:
+            self.version += 1
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Returns the hit/miss counters and current size
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+            }
+
+    def __len__(self):
+        return len(self._data)
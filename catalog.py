@@ -0,0 +1,261 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+from array import array
+from typing import Iterator, List, Optional, Tuple
+
+from db_mimic import Movie
+from movies_management_pb2 import ActorResponse, MovieResponse
+from snapshot import write_mapped_snapshot
+from storage import MovieStorage
+
+"""
+Deterministic synthetic catalogs for benchmarks and load tests.
+
+Movie, actor and director names are functions of their number, so a load test
+can address the catalog without holding it. Directors and actors get their
+movies from a power law: a few of them have thousands of credits, many have one
+or two, as in real catalogs. The same arguments always generate the same catalog.
+
+Catalogs go straight into the storage layer, with no RPC per movie: into any
+storage.MovieStorage in large add_movies batches, or, for the in-memory store,
+written directly as a snapshot file that MovieStore.load_snapshot maps:
+    python catalog.py --movies 1M
+    python catalog.py --movies 10M --snapshot catalog.mvs
+    python catalog.py --movies 1M --storage sqlite --sqlite-path movies.db
+"""
+
+# Words of the generated titles and names; a number keeps them unique
+TITLE_WORDS = ('Silent', 'Crimson', 'Last', 'Hidden', 'Broken', 'Golden', 'Midnight', 'Wild', 'Lost', 'Iron',
+               'Frozen', 'Burning', 'Distant', 'Secret', 'Endless', 'Savage')
+TITLE_NOUNS = ('River', 'Empire', 'Horizon', 'Garden', 'Signal', 'Harbor', 'Kingdom', 'Storm', 'Mirror', 'Frontier',
+               'Letter', 'Engine', 'Island', 'Winter', 'Shadow', 'Voyage')
+FIRST_NAMES = ('Ava', 'Noah', 'Mia', 'Liam', 'Zoe', 'Omar', 'Ines', 'Kai', 'Lena', 'Ravi', 'Yuki', 'Nia', 'Hugo',
+               'Sara', 'Theo', 'Maya')
+LAST_NAMES = ('Stone', 'Reyes', 'Novak', 'Okafor', 'Larsen', 'Moreau', 'Tanaka', 'Costa', 'Walsh', 'Ibrahim',
+              'Fischer', 'Silva', 'Kowalski', 'Haddad', 'Quinn', 'Sato')
+
+# Exponent of the power law of actor and director credits
+SKEW = 0.8
+
+# Most actors per movie
+MAX_CAST = 5
+
+# Movies per add_movies call
+BATCH_SIZE = 10_000
+
+# Accepted suffixes of catalog sizes on the command line
+SIZE_SUFFIXES = {'k': 1_000, 'm': 1_000_000}
+
+
+def movie_name(i: int) -> str:
+    return f'{TITLE_WORDS[i % 16]} {TITLE_NOUNS[i // 16 % 16]} {i}'
+
+
+def actor_name(i: int) -> str:
+    return f'{FIRST_NAMES[i % 16]} {LAST_NAMES[i // 16 % 16]} {i}'
+
+
+def director_name(i: int) -> str:
+    return f'Director {LAST_NAMES[i % 16]} {i}'
+
+
+def zipf_cumulative(size: int, exponent: float) -> List[float]:
+    """
+    Cumulative weights of ranks 0..size-1 where rank k weighs 1 / (k + 1) ** exponent
+    """
+    return list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, size + 1)))
+
+
+def default_actors(movies: int) -> int:
+    return max(1, movies // 2)
+
+
+def default_directors(movies: int) -> int:
+    return max(1, movies // 20)
+
+
+def _generate_ranks(movies: int, actors: int, directors: int, seed: int,
+                    skew: float) -> Iterator[Tuple[int, List[int], int, float]]:
+    """
+    Yields (movie number, cast actor numbers, director number, rating) per movie.
+    The random draws are made BATCH_SIZE movies at a time, whatever batches the
+    caller wants, so the catalog only depends on the arguments.
+    """
+    rng = random.Random(seed)
+    actor_ranks, director_ranks = range(actors), range(directors)
+    actor_weights = zipf_cumulative(actors, skew)
+    director_weights = zipf_cumulative(directors, skew)
+    for first in range(0, movies, BATCH_SIZE):
+        count = min(BATCH_SIZE, movies - first)
+        cast_sizes = rng.choices(range(1, MAX_CAST + 1), k=count)
+        cast = iter(rng.choices(actor_ranks, cum_weights=actor_weights, k=sum(cast_sizes)))
+        drawn_directors = rng.choices(director_ranks, cum_weights=director_weights, k=count)
+        for offset, cast_size in enumerate(cast_sizes):
+            i = first + offset
+            if i < actors:
+                cast_ranks = {i}.union(itertools.islice(cast, cast_size - 1))
+            else:
+                cast_ranks = set(itertools.islice(cast, cast_size))
+            director = i if i < directors else drawn_directors[offset]
+            yield i, sorted(cast_ranks), director, round(1 + rng.random() * 4, 1)
+
+
+def generate(movies: int, actors: Optional[int] = None, directors: Optional[int] = None, seed: int = 0,
+             skew: float = SKEW, batch_size: int = BATCH_SIZE) -> Iterator[List[Movie]]:
+    """
+    Yields the catalog in batches of `batch_size` Movies. Movie i is named
+    movie_name(i), with 1 to MAX_CAST actors and one director drawn from power laws
+    over actor_name(n) and director_name(n), and a rating between 1 and 5. The
+    first movies go to each actor and director in turn, so all of them exist when
+    there are enough movies.
+    """
+    actors = actors or default_actors(movies)
+    directors = directors or default_directors(movies)
+    records = _generate_ranks(movies, actors, directors, seed, skew)
+    while True:
+        batch = [Movie(str(i), movie_name(i), [actor_name(rank) for rank in cast], director_name(director), rating)
+                 for i, cast, director, rating in itertools.islice(records, batch_size)]
+        if not batch:
+            return
+        yield batch
+
+
+def write_snapshot(path: str, movies: int, actors: Optional[int] = None, directors: Optional[int] = None,
+                   seed: int = 0, skew: float = SKEW):
+    """
+    Writes the catalog generate() would yield as a snapshot file for
+    MovieStore.load_snapshot, encoding the records directly instead of adding them
+    to a store and snapshotting it. Actors get the ids add_movies would give them:
+    1, 2, ... in the order of their first movie.
+    """
+    actors = actors or default_actors(movies)
+    directors = directors or default_directors(movies)
+    # Movie numbers per actor and director, in the order the movies are added
+    filmographies: List[Optional[array]] = [None] * actors
+    director_movies: List[Optional[array]] = [None] * directors
+    actor_ids = array('I', bytes(4 * actors))
+    actors_seen = 0
+
+    def movie_records():
+        nonlocal actors_seen
+        for i, cast, director, rating in _generate_ranks(movies, actors, directors, seed, skew):
+            for rank in cast:
+                if filmographies[rank] is None:
+                    filmographies[rank] = array('I')
+                    actors_seen += 1
+                    actor_ids[rank] = actors_seen
+                filmographies[rank].append(i)
+            if director_movies[director] is None:
+                director_movies[director] = array('I')
+            director_movies[director].append(i)
+            name = movie_name(i)
+            yield name.lower().encode(), MovieResponse(
+                id=str(i), name=name, actors=[actor_name(rank) for rank in cast],
+                director=director_name(director), rating=rating).SerializeToString()
+
+    def actor_records():
+        for rank, movie_numbers in enumerate(filmographies):
+            if movie_numbers is not None:
+                name = actor_name(rank)
+                yield name.lower().encode(), ActorResponse(
+                    id=str(actor_ids[rank]), actor_name=name,
+                    movie_names=[movie_name(i) for i in movie_numbers]).SerializeToString()
+
+    def director_records():
+        for rank, movie_numbers in enumerate(director_movies):
+            if movie_numbers is not None:
+                keys = '\0'.join(movie_name(i).lower() for i in movie_numbers)
+                yield director_name(rank).encode(), keys.encode()
+
+    # The header is packed before the records are generated: `actors` bounds the ids
+    # given, and is their maximum whenever every actor has a movie
+    write_mapped_snapshot(path, (movie_records(), actor_records(), director_records()), max_actor_id=actors)
+
+
+def load(store: MovieStorage, batches: Iterator[List[Movie]]) -> dict:
+    """
+    Adds the batches to `store`. Returns the movies added and the seconds spent
+    generating them and in add_movies.
+    """
+    generate_seconds = load_seconds = 0.0
+    added = 0
+    batches = iter(batches)
+    while True:
+        start = time.perf_counter()
+        batch = next(batches, None)
+        generated = time.perf_counter()
+        generate_seconds += generated - start
+        if batch is None:
+            break
+        added += sum(store.add_movies(batch))
+        load_seconds += time.perf_counter() - generated
+    return {'movies': added, 'generate_s': round(generate_seconds, 3), 'load_s': round(load_seconds, 3)}
+
+
+def parse_count(text: str) -> int:
+    """
+    Parses catalog sizes such as 10000, 10k, 1M or 10M
+    """
+    suffix = SIZE_SUFFIXES.get(text[-1:].lower())
+    try:
+        return int(float(text[:-1]) * suffix) if suffix else int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a count such as 10000, 10k or 1M, got {text!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generates a synthetic catalog into a movie store",
+                                     formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__)
+    parser.add_argument('--movies', type=parse_count, default=10_000, help="catalog size, e.g. 10k, 1M, 10M")
+    parser.add_argument('--actors', type=parse_count, default=None, help="movies / 2 by default")
+    parser.add_argument('--directors', type=parse_count, default=None, help="movies / 20 by default")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skew', type=float, default=SKEW, help="power-law exponent of actor and director credits")
+    parser.add_argument('--storage', choices=('memory', 'sqlite'), default='memory')
+    parser.add_argument('--sqlite-path', default='movies.db')
+    parser.add_argument('--snapshot',
+                        help="write the catalog directly to this snapshot file, for server.py --snapshot")
+    parser.add_argument('--index', action='store_true',
+                        help="with --snapshot, also time building the search and sorted indexes of the mapped store")
+    args = parser.parse_args()
+
+    if args.snapshot and args.storage != 'memory':
+        parser.error("--snapshot only applies to --storage memory")
+
+    if args.snapshot:
+        from db_mimic import MovieStore
+        start = time.perf_counter()
+        write_snapshot(args.snapshot, args.movies, args.actors, args.directors, args.seed, args.skew)
+        report = {'movies': args.movies, 'write_s': round(time.perf_counter() - start, 3),
+                  'size_mb': round(os.path.getsize(args.snapshot) / 2 ** 20, 1)}
+        store = MovieStore()
+        start = time.perf_counter()
+        store.load_snapshot(args.snapshot)
+        report['load_s'] = round(time.perf_counter() - start, 3)
+        if args.index:
+            start = time.perf_counter()
+            store.search(movie_name(0), limit=1)
+            report['index_s'] = round(time.perf_counter() - start, 3)
+    elif args.storage == 'sqlite':
+        from sqlite_store import SQLiteMovieStore
+        store = SQLiteMovieStore(args.sqlite_path)
+    else:
+        from db_mimic import MovieStore
+        store = MovieStore()
+
+    try:
+        if not args.snapshot:
+            report = load(store, generate(args.movies, args.actors, args.directors, args.seed, args.skew))
+            report['movies_per_s'] = round(report['movies'] / (report['load_s'] or 1e-9))
+        report['actors'] = store.actor_count()
+    finally:
+        store.close()
+    print(json.dumps(report))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 # Created by NaveenPiedy at 6/18/2024 6:32 AM
+import itertools
 import uuid
 
 import grpc
@@ -6,16 +7,134 @@ import movies_management_pb2
 import movies_management_pb2_grpc
 from jwt_utils import create_jwt
 
+# Server used by the helper functions below
+SERVER_ADDRESS = 'localhost:50051'
+
 
 def generate_trace_id():
     return str(uuid.uuid4())
 
 
+class MoviesClient:
+    """
+    Client holding a pool of long-lived channels and stubs, so calls don't pay a
+    TCP + HTTP/2 handshake each. Calls are spread round-robin over the channels.
+
+    `metadata` is sent with every call; per-call metadata is added on top of it
+    and never modifies the client or the caller's list. Unlike the helper
+    functions below, methods return the response and raise grpc.RpcError.
+    """
+
+    def __init__(self, targets=(SERVER_ADDRESS,), channels_per_target=1, metadata=None,
+                 keepalive_time_ms=60000, keepalive_timeout_ms=20000, options=None):
+        channel_options = [
+            ('grpc.keepalive_time_ms', keepalive_time_ms),
+            ('grpc.keepalive_timeout_ms', keepalive_timeout_ms),
+            ('grpc.keepalive_permit_without_calls', 1),
+            # Give each channel its own connection instead of sharing one per target
+            ('grpc.use_local_subchannel_pool', 1),
+        ] + list(options or [])
+        self._metadata = tuple(metadata or ())
+        self._channels = [grpc.insecure_channel(target, options=channel_options)
+                          for target in targets for _ in range(channels_per_target)]
+        self._stubs = [movies_management_pb2_grpc.MoviesServiceStub(channel) for channel in self._channels]
+        self._round_robin = itertools.count()
+
+    def _stub(self):
+        return self._stubs[next(self._round_robin) % len(self._stubs)]
+
+    def _call_metadata(self, metadata):
+        return self._metadata + tuple(metadata or ()) + (('trace-id', generate_trace_id()),)
+
+    def get_movie(self, name, metadata=None, timeout=None):
+        request = movies_management_pb2.GetMovieRequest(name=name)
+        return self._stub().GetMovie(request, metadata=self._call_metadata(metadata), timeout=timeout)
+
+    def get_actor(self, name, metadata=None, timeout=None):
+        request = movies_management_pb2.GetActorRequest(actor_name=name)
+        return self._stub().GetActor(request, metadata=self._call_metadata(metadata), timeout=timeout)
+
+    def batch_get_movies(self, names, metadata=None, timeout=None):
+        request = movies_management_pb2.BatchGetMoviesRequest(names=names)
+        return self._stub().BatchGetMovies(request, metadata=self._call_metadata(metadata), timeout=timeout)
+
+    def batch_get_actors(self, names, metadata=None, timeout=None):
+        request = movies_management_pb2.BatchGetActorsRequest(actor_names=names)
+        return self._stub().BatchGetActors(request, metadata=self._call_metadata(metadata), timeout=timeout)
+
+    def add_movie(self, id, movie_name, actors, director, rating, metadata=None, timeout=None):
+        request = movies_management_pb2.AddMovieRequest(id=id, name=movie_name, actors=actors, director=director,
+                                                        rating=rating)
+        return self._stub().AddMovie(request, metadata=self._call_metadata(metadata), timeout=timeout)
+
+    def add_movies(self, movies, metadata=None, timeout=None):
+        """
+        Streams (id, movie_name, actors, director, rating) tuples to the server in one call
+        """
+        requests = (movies_management_pb2.AddMovieRequest(id=id, name=movie_name, actors=actors,
+                                                          director=director, rating=rating)
+                    for id, movie_name, actors, director, rating in movies)
+        return self._stub().AddMovies(requests, metadata=self._call_metadata(metadata), timeout=timeout)
+
+    def change_rating(self, movie_name, rating, metadata=None, timeout=None):
+        request = movies_management_pb2.ScoreRequest(movie_name=movie_name, rating=rating)
+        return self._stub().ChangeRating(request, metadata=self._call_metadata(metadata), timeout=timeout)
+
+    def get_movies_by_director(self, director_name, metadata=None, timeout=None):
+        """
+        Returns an iterator over the streamed movies
+        """
+        request = movies_management_pb2.GetMoviesByDirectorRequest(director=director_name)
+        return self._stub().GetMoviesByDirector(request, metadata=self._call_metadata(metadata), timeout=timeout)
+
+    def get_movies_by_actor(self, actor_name, metadata=None, timeout=None):
+        """
+        Returns an iterator over the streamed movies
+        """
+        request = movies_management_pb2.GetMoviesByActorRequest(actor_name=actor_name)
+        chunks = self._stub().GetMoviesByActor(request, metadata=self._call_metadata(metadata), timeout=timeout)
+        return (movie for chunk in chunks for movie in chunk.movies)
+
+    def search_movies(self, query, limit=0, prefix_only=False, metadata=None, timeout=None):
+        """
+        Returns an iterator over the streamed SearchResults, best match first
+        """
+        request = movies_management_pb2.SearchMoviesRequest(query=query, limit=limit, prefix_only=prefix_only)
+        return self._stub().SearchMovies(request, metadata=self._call_metadata(metadata), timeout=timeout)
+
+    def list_movies(self, director='', actor='', min_rating=None, max_rating=None,
+                    order=movies_management_pb2.NAME, page_size=0, cursor='', metadata=None, timeout=None):
+        """
+        Returns one page of movies; pass its next_cursor back as `cursor` for the next one
+        """
+        request = movies_management_pb2.ListMoviesRequest(director=director, actor=actor, min_rating=min_rating,
+                                                          max_rating=max_rating, order=order, page_size=page_size,
+                                                          cursor=cursor)
+        return self._stub().ListMovies(request, metadata=self._call_metadata(metadata), timeout=timeout)
+
+    def top_rated_movies(self, director='', limit=0, metadata=None, timeout=None):
+        """
+        Returns an iterator over the streamed movies, highest rated first
+        """
+        request = movies_management_pb2.TopRatedMoviesRequest(director=director, limit=limit)
+        return self._stub().TopRatedMovies(request, metadata=self._call_metadata(metadata), timeout=timeout)
+
+    def close(self):
+        for channel in self._channels:
+            channel.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
 def get_movies(name, metadata=None):
     trace_id = generate_trace_id()
-    metadata.append(('trace-id', trace_id))
+    metadata = list(metadata or []) + [('trace-id', trace_id)]
     try:
-        with grpc.insecure_channel('localhost:50051') as channel:
+        with grpc.insecure_channel(SERVER_ADDRESS) as channel:
             stub = movies_management_pb2_grpc.MoviesServiceStub(channel)
             request = movies_management_pb2.GetMovieRequest(name=name)
             response = stub.GetMovie(request, metadata=metadata)
@@ -31,9 +150,9 @@ def get_movies(name, metadata=None):
 
 def get_actors(name, metadata=None):
     trace_id = generate_trace_id()
-    metadata.append(('trace-id', trace_id))
+    metadata = list(metadata or []) + [('trace-id', trace_id)]
     try:
-        with grpc.insecure_channel('localhost:50051') as channel:
+        with grpc.insecure_channel(SERVER_ADDRESS) as channel:
             stub = movies_management_pb2_grpc.MoviesServiceStub(channel)
             request = movies_management_pb2.GetActorRequest(actor_name=name)
             response = stub.GetActor(request, metadata=metadata)
@@ -45,11 +164,41 @@ def get_actors(name, metadata=None):
             print(f"Unexpected error: {e}")
 
 
+def batch_get_movies(names, metadata=None):
+    trace_id = generate_trace_id()
+    metadata = list(metadata or []) + [('trace-id', trace_id)]
+    try:
+        with grpc.insecure_channel(SERVER_ADDRESS) as channel:
+            stub = movies_management_pb2_grpc.MoviesServiceStub(channel)
+            request = movies_management_pb2.BatchGetMoviesRequest(names=names)
+            response = stub.BatchGetMovies(request, metadata=metadata)
+            print(f"Movies found \n {response.movies} \nMissing: {list(response.missing)} \n")
+
+            return response
+    except grpc.RpcError as e:
+        print(f"Unexpected error: {e}")
+
+
+def batch_get_actors(names, metadata=None):
+    trace_id = generate_trace_id()
+    metadata = list(metadata or []) + [('trace-id', trace_id)]
+    try:
+        with grpc.insecure_channel(SERVER_ADDRESS) as channel:
+            stub = movies_management_pb2_grpc.MoviesServiceStub(channel)
+            request = movies_management_pb2.BatchGetActorsRequest(actor_names=names)
+            response = stub.BatchGetActors(request, metadata=metadata)
+            print(f"Actors found \n {response.actors} \nMissing: {list(response.missing)} \n")
+
+            return response
+    except grpc.RpcError as e:
+        print(f"Unexpected error: {e}")
+
+
 def add_movie(id, movie_name, actors, director, rating, metadata=None):
     trace_id = generate_trace_id()
-    metadata.append(('trace-id', trace_id))
+    metadata = list(metadata or []) + [('trace-id', trace_id)]
     try:
-        with grpc.insecure_channel('localhost:50051') as channel:
+        with grpc.insecure_channel(SERVER_ADDRESS) as channel:
             stub = movies_management_pb2_grpc.MoviesServiceStub(channel)
             request = movies_management_pb2.AddMovieRequest(id=id, name=movie_name, actors=actors, director=director,
                                                             rating=rating)
@@ -62,10 +211,29 @@ def add_movie(id, movie_name, actors, director, rating, metadata=None):
             print(f"Failed to add Movie: {e}")
 
 
+def add_movies(movies, metadata=None):
+    """
+    Streams (id, movie_name, actors, director, rating) tuples to the server in one call
+    """
+    trace_id = generate_trace_id()
+    metadata = list(metadata or []) + [('trace-id', trace_id)]
+    try:
+        with grpc.insecure_channel(SERVER_ADDRESS) as channel:
+            stub = movies_management_pb2_grpc.MoviesServiceStub(channel)
+            requests = (movies_management_pb2.AddMovieRequest(id=id, name=movie_name, actors=actors,
+                                                              director=director, rating=rating)
+                        for id, movie_name, actors, director, rating in movies)
+            response = stub.AddMovies(requests, metadata=metadata)
+            print(f"Added {response.added} movies, {response.failed} failed")
+            return response
+    except grpc.RpcError as e:
+        print(f"Failed to add Movies: {e}")
+
+
 def get_movie_by_director(director_name, metadata=None):
     trace_id = generate_trace_id()
-    metadata.append(('trace-id', trace_id))
-    with grpc.insecure_channel('localhost:50051') as channel:
+    metadata = list(metadata or []) + [('trace-id', trace_id)]
+    with grpc.insecure_channel(SERVER_ADDRESS) as channel:
         stub = movies_management_pb2_grpc.MoviesServiceStub(channel)
 
         # Test GetMoviesByDirector with streaming
@@ -77,11 +245,70 @@ def get_movie_by_director(director_name, metadata=None):
             print(f"Error: {e.code()} - {e.details()}")
 
 
+def get_movies_by_actor(actor_name, metadata=None):
+    trace_id = generate_trace_id()
+    metadata = list(metadata or []) + [('trace-id', trace_id)]
+    with grpc.insecure_channel(SERVER_ADDRESS) as channel:
+        stub = movies_management_pb2_grpc.MoviesServiceStub(channel)
+        request = movies_management_pb2.GetMoviesByActorRequest(actor_name=actor_name)
+        try:
+            for chunk in stub.GetMoviesByActor(request, metadata=metadata):
+                for response in chunk.movies:
+                    print(f"Movie with {actor_name}: {response.name}, directed by {response.director}")
+        except grpc.RpcError as e:
+            print(f"Error: {e.code()} - {e.details()}")
+
+
+def search_movies(query, limit=0, metadata=None):
+    trace_id = generate_trace_id()
+    metadata = list(metadata or []) + [('trace-id', trace_id)]
+    with grpc.insecure_channel(SERVER_ADDRESS) as channel:
+        stub = movies_management_pb2_grpc.MoviesServiceStub(channel)
+        request = movies_management_pb2.SearchMoviesRequest(query=query, limit=limit)
+        try:
+            for result in stub.SearchMovies(request, metadata=metadata):
+                print(f"{result.score:.2f} {result.WhichOneof('result')}: {result.matched_name}")
+        except grpc.RpcError as e:
+            print(f"Error: {e.code()} - {e.details()}")
+
+
+def list_movies(director='', actor='', page_size=0, metadata=None):
+    trace_id = generate_trace_id()
+    metadata = list(metadata or []) + [('trace-id', trace_id)]
+    with grpc.insecure_channel(SERVER_ADDRESS) as channel:
+        stub = movies_management_pb2_grpc.MoviesServiceStub(channel)
+        request = movies_management_pb2.ListMoviesRequest(director=director, actor=actor, page_size=page_size)
+        try:
+            page = 1
+            while True:
+                response = stub.ListMovies(request, metadata=metadata)
+                print(f"Page {page}: {', '.join(movie.name for movie in response.movies)}")
+                if not response.next_cursor:
+                    break
+                request.cursor = response.next_cursor
+                page += 1
+        except grpc.RpcError as e:
+            print(f"Error: {e.code()} - {e.details()}")
+
+
+def top_rated_movies(director='', limit=0, metadata=None):
+    trace_id = generate_trace_id()
+    metadata = list(metadata or []) + [('trace-id', trace_id)]
+    with grpc.insecure_channel(SERVER_ADDRESS) as channel:
+        stub = movies_management_pb2_grpc.MoviesServiceStub(channel)
+        request = movies_management_pb2.TopRatedMoviesRequest(director=director, limit=limit)
+        try:
+            for movie in stub.TopRatedMovies(request, metadata=metadata):
+                print(f"{movie.rating:.1f} {movie.name}")
+        except grpc.RpcError as e:
+            print(f"Error: {e.code()} - {e.details()}")
+
+
 def change_rating(movie_name, rating, metadata=None):
     trace_id = generate_trace_id()
-    metadata.append(('trace-id', trace_id))
+    metadata = list(metadata or []) + [('trace-id', trace_id)]
     try:
-        with grpc.insecure_channel('localhost:50051') as channel:
+        with grpc.insecure_channel(SERVER_ADDRESS) as channel:
             stub = movies_management_pb2_grpc.MoviesServiceStub(channel)
             request = movies_management_pb2.ScoreRequest(movie_name=movie_name, rating=rating)
             response = stub.ChangeRating(request, metadata=metadata)
@@ -215,6 +442,31 @@ def run():
     message: "Movie created successfully"
     """
 
+    # Add several Movies in one streaming call
+    add_movies([('8', 'Nayakan', ['Kamal Haasan', 'Saranya'], 'Mani Ratnam', 4.8),
+                ('3', 'Alaipayuthey', ['Madhavan', 'Shalini'], 'Mani Ratnam', 5.0)], metadata=metadata)
+    """
+    Response:
+    Added 1 movies, 1 failed
+    """
+
+    # Get several Movies and Actors in one call each
+    batch_get_movies(['Avengers', 'Minnale', 'John Wick'], metadata=metadata)
+    """
+    Response:
+    Movies found
+     [id: "1"
+    name: "Avengers"
+    ...
+    , id: "4"
+    name: "Minnale"
+    ...
+    ]
+    Missing: ['John Wick']
+    """
+
+    batch_get_actors(['Robert', 'Madhavan'], metadata=metadata)
+
     get_movie_by_director('Joss Wheadon', metadata=metadata)
     """
     Movie by Joss Whedon: id: "1"
@@ -232,6 +484,44 @@ def run():
     rating: 4
     """
 
+    get_movies_by_actor('Madhavan', metadata=metadata)
+    """
+    Movie with Madhavan: Alaipayuthey, directed by Mani Ratnam
+    Movie with Madhavan: Minnale, directed by Gautham Vasudev Menon
+    """
+
+    # Search by prefix, and with a typo
+    search_movies('mad', metadata=metadata)
+    """
+    1.38 actor: Madhavan
+    """
+
+    search_movies('serenty', metadata=metadata)
+    """
+    0.75 movie: Serenity
+    """
+
+    # List a director's movies one page at a time
+    list_movies(director='Mani Ratnam', page_size=1, metadata=metadata)
+    """
+    Page 1: Alaipayuthey
+    Page 2: Nayakan
+    """
+
+    # The highest rated movies, and those of one director
+    top_rated_movies(limit=3, metadata=metadata)
+    """
+    5.0 Minnale
+    5.0 Alaipayuthey
+    4.8 Nayakan
+    """
+
+    top_rated_movies(director='Joss Wheadon', metadata=metadata)
+    """
+    4.2 Avengers
+    4.0 Serenity
+    """
+
 
 if __name__ == '__main__':
     run()
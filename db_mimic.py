@@ -1,31 +1,739 @@
 # Created by NaveenPiedy at 6/18/2024 8:43 AM
-from dataclasses import dataclass
-from typing import Dict, List
+import math
+import os
+import threading
+from array import array
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from movies_management_pb2 import ActorResponse, MovieResponse
+from search import ACTOR, MOVIE, SearchHit, SearchIndex
+from snapshot import MappedSnapshot, write_mapped_snapshot
+from sorted_list import SortedList
+from storage import BY_NAME, BY_RATING, MovieStorage
+from wal import WriteAheadLog, read_records
 
 """
-The dataclass and dicts are to mimic a database. 
+The record classes and the MovieStore are to mimic a database.
 """
-@dataclass
+
+
+class NameTable:
+    """
+    Interns names: every distinct name is stored once and referred to by a small
+    integer id. Lookups are lock-free; only adding a new name takes the lock.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._lock = threading.Lock()
+
+    def intern(self, name: str) -> int:
+        name_id = self._ids.get(name)
+        if name_id is None:
+            with self._lock:
+                name_id = self._ids.get(name)
+                if name_id is None:
+                    name_id = len(self._names)
+                    self._names.append(name)
+                    self._ids[name] = name_id
+        return name_id
+
+    def canonical(self, name: str) -> str:
+        """
+        Returns the single stored copy of `name`
+        """
+        return self._names[self.intern(name)]
+
+    def name(self, name_id: int) -> str:
+        return self._names[name_id]
+
+    def __len__(self):
+        return len(self._names)
+
+
+# Process-wide table of actor, movie and director names shared by all records
+names = NameTable()
+
+
 class Movie:
-    id: str
-    name: str
-    actors: List[str]
-    director: str
-    rating: float
+    """
+    Compact movie record: no per-instance __dict__, the cast is an array of name
+    ids and the director is the interned copy of their name.
+    """
+    __slots__ = ('id', 'name', '_actor_ids', 'director', 'rating')
+
+    def __init__(self, id: str, name: str, actors: Iterable[str], director: str, rating: float):
+        self.id = id
+        self.name = name
+        self._actor_ids = array('I', map(names.intern, actors))
+        self.director = names.canonical(director)
+        self.rating = rating
+
+    @property
+    def actors(self) -> List[str]:
+        return [names.name(actor_id) for actor_id in self._actor_ids]
+
+    def with_rating(self, rating: float) -> 'Movie':
+        """
+        Returns a copy of the movie with a new rating
+        """
+        movie = Movie.__new__(Movie)
+        movie.id = self.id
+        movie.name = self.name
+        movie._actor_ids = self._actor_ids
+        movie.director = self.director
+        movie.rating = rating
+        return movie
+
+    def __eq__(self, other):
+        if not isinstance(other, Movie):
+            return NotImplemented
+        return (self.id, self.name, self._actor_ids, self.director, self.rating) == \
+            (other.id, other.name, other._actor_ids, other.director, other.rating)
+
+    def __repr__(self):
+        return (f"Movie(id={self.id!r}, name={self.name!r}, actors={self.actors!r}, "
+                f"director={self.director!r}, rating={self.rating!r})")
 
 
-@dataclass
 class Actor:
-    id: str
-    actor_name: str
-    movie_names: List[str]
+    """
+    Compact actor record: the filmography is an array of movie name ids
+    """
+    __slots__ = ('id', 'actor_name', '_movie_ids')
+
+    def __init__(self, id: str, actor_name: str, movie_names: Iterable[str]):
+        self.id = id
+        self.actor_name = actor_name
+        self._movie_ids = array('I', map(names.intern, movie_names))
+
+    @property
+    def movie_names(self) -> List[str]:
+        return [names.name(movie_id) for movie_id in self._movie_ids]
+
+    def add_movie_names(self, movie_names: Iterable[str]):
+        """
+        Appends movies to the filmography. MovieStore links a movie to an actor only
+        once (see its actor -> movies index), so there is no duplicate check here.
+        """
+        self._movie_ids.extend(map(names.intern, movie_names))
+
+    def __eq__(self, other):
+        if not isinstance(other, Actor):
+            return NotImplemented
+        return (self.id, self.actor_name, self._movie_ids) == (other.id, other.actor_name, other._movie_ids)
+
+    def __repr__(self):
+        return f"Actor(id={self.id!r}, actor_name={self.actor_name!r}, movie_names={self.movie_names!r})"
+
+
+def encode_movie(movie: Movie) -> bytes:
+    """
+    Serializes a movie as the MovieResponse sent by GetMovie and GetMoviesByDirector
+    """
+    return MovieResponse(
+        id=movie.id,
+        name=movie.name,
+        actors=movie.actors,
+        director=movie.director,
+        rating=movie.rating
+    ).SerializeToString()
+
+
+def decode_movie(data) -> Movie:
+    response = MovieResponse.FromString(data)
+    return Movie(response.id, response.name, response.actors, response.director, response.rating)
+
+
+def encode_actor(actor: Actor, movie_count: Optional[int] = None) -> bytes:
+    """
+    Serializes an actor as an ActorResponse, optionally with only the first `movie_count` movies
+    """
+    movie_ids = actor._movie_ids if movie_count is None else actor._movie_ids[:movie_count]
+    return ActorResponse(
+        id=actor.id,
+        actor_name=actor.actor_name,
+        movie_names=[names.name(movie_id) for movie_id in movie_ids]
+    ).SerializeToString()
+
+
+def decode_actor(data) -> Actor:
+    response = ActorResponse.FromString(data)
+    return Actor(response.id, response.actor_name, response.movie_names)
+
+
+# Name of the snapshot in a persistence directory
+SNAPSHOT_FILE = 'snapshot.mvs'
+
+
+def movie_row(movie: Movie) -> list:
+    """
+    Plain list form of a movie, as written to the write-ahead log
+    """
+    return [movie.id, movie.name, movie.actors, movie.director, movie.rating]
+
+
+class IdAllocator:
+    """
+    Hands out unique, increasing integer ids in O(1).
+
+    With block_size > 1 every thread reserves a block of ids at a time and hands
+    them out without touching the shared lock again until the block runs out. Ids
+    are then increasing per thread rather than globally, but still never reused.
+    """
+
+    def __init__(self, start: int = 1, block_size: int = 1):
+        self._next = start
+        self._block_size = block_size
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def allocate_block(self, size: int) -> range:
+        """
+        Reserves `size` consecutive ids
+        """
+        with self._lock:
+            start = self._next
+            self._next += size
+        return range(start, start + size)
+
+    def advance(self, used_id: int):
+        """
+        Makes sure ids up to `used_id` are never handed out, e.g. after restoring them from disk
+        """
+        with self._lock:
+            self._next = max(self._next, used_id + 1)
+
+    def next_id(self) -> int:
+        if self._block_size == 1:
+            return self.allocate_block(1).start
+
+        local = self._local
+        if not getattr(local, 'remaining', 0):
+            local.next = self.allocate_block(self._block_size).start
+            local.remaining = self._block_size
+        value = local.next
+        local.next += 1
+        local.remaining -= 1
+        return value
+
+
+class MovieStore(MovieStorage):
+    """
+    Thread-safe in-memory storage for movies and actors.
+
+    Writers take striped locks for the keys they touch, always in stripe order, so
+    writes to unrelated keys proceed in parallel and never deadlock. Readers never
+    lock: updates swap in a new record instead of mutating the stored one, and the
+    list-valued fields (filmographies, director index) are only ever appended to.
+
+    The store can also be backed by a MappedSnapshot (see load_snapshot). Records
+    are then decoded from the snapshot the first time they are read and kept in
+    the dicts, which act as an overlay: writes only ever go to the dicts.
+    """
+
+    def __init__(self, stripes: int = 64, id_block_size: int = 1):
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._id_block_size = id_block_size
+        self._wal: Optional[WriteAheadLog] = None
+        self._snapshot_every = 0
+        self._snapshot_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._movies: Dict[str, Movie] = {}
+        # Encoded MovieResponse of every movie, rebuilt only when the movie changes
+        self._encoded_movies: Dict[str, bytes] = {}
+        self._actors: Dict[str, Actor] = {}
+        # Secondary index: director -> sanitized names of the movies they directed
+        self._movies_by_director: Dict[str, List[str]] = {}
+        self._actor_ids = IdAllocator(block_size=self._id_block_size)
+        self._base: Optional[MappedSnapshot] = None
+        # Movies and actors added on top of the base snapshot
+        self._added_movies = 0
+        self._added_actors = 0
+        self._count_lock = threading.Lock()
+        self._search = SearchIndex()
+        # Sorted movie keys serving list_movies: all of them, and per director
+        self._sorted_keys = SortedList()
+        self._sorted_by_director: Dict[str, SortedList] = {}
+        # The actor <-> movie relation: actor key -> sorted keys of their movies, a set
+        # that links every pair once; the other way is each Movie's cast. Also serves list_movies.
+        self._actor_movies: Dict[str, SortedList] = {}
+        # (rating, key) of every movie, and per director, moved by change_rating
+        self._by_rating = SortedList()
+        self._rating_by_director: Dict[str, SortedList] = {}
+        self._index_lock = threading.Lock()
+        # Records of the base snapshot are indexed on the first search or listing, not at load
+        self._base_indexed = True
+
+    @contextmanager
+    def _locked(self, *keys):
+        """
+        Holds the stripe locks for the given keys
+        """
+        stripes = sorted({hash(key) % len(self._locks) for key in keys})
+        for stripe in stripes:
+            self._locks[stripe].acquire()
+        try:
+            yield
+        finally:
+            for stripe in reversed(stripes):
+                self._locks[stripe].release()
+
+    @contextmanager
+    def _locked_all(self):
+        """
+        Holds every stripe lock, pausing all writers
+        """
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+    # The lookups below fall back to the base snapshot. Decoded records are stored
+    # with setdefault, so a reader never replaces a record a writer put there.
+
+    def _movie(self, key: str) -> Optional[Movie]:
+        movie = self._movies.get(key)
+        if movie is None and self._base is not None:
+            data = self._base.movies.get(key.encode())
+            if data is not None:
+                movie = self._movies.setdefault(key, decode_movie(data))
+        return movie
+
+    def _movie_bytes(self, key: str) -> Optional[bytes]:
+        data = self._encoded_movies.get(key)
+        if data is None and self._base is not None:
+            data = self._base.movies.get(key.encode())
+            if data is not None:
+                data = bytes(data)
+        return data
+
+    def _actor(self, key: str) -> Optional[Actor]:
+        actor = self._actors.get(key)
+        if actor is None and self._base is not None:
+            data = self._base.actors.get(key.encode())
+            if data is not None:
+                actor = self._actors.setdefault(key, decode_actor(data))
+        return actor
+
+    def _director_keys(self, director: str) -> Optional[List[str]]:
+        keys = self._movies_by_director.get(director)
+        if keys is None and self._base is not None:
+            data = self._base.directors.get(director.encode())
+            if data is not None:
+                keys = self._movies_by_director.setdefault(director, bytes(data).decode().split('\0'))
+        return keys
+
+    def _has_movie(self, key: str) -> bool:
+        return key in self._movies or (self._base is not None and key.encode() in self._base.movies)
+
+    def get_movie(self, name: str) -> Optional[Movie]:
+        return self._movie(name.lower())
+
+    def get_movie_bytes(self, name: str) -> Optional[bytes]:
+        """
+        Returns the encoded MovieResponse of a movie
+        """
+        return self._movie_bytes(name.lower())
+
+    def get_actor(self, name: str) -> Optional[Actor]:
+        return self._actor(name.lower())
+
+    def get_movies_by_director(self, director: str) -> List[Movie]:
+        """
+        Returns the movies of a director using the index, O(results)
+        """
+        return [self._movie(key) for key in self._director_keys(director) or ()]
+
+    def get_movie_bytes_by_director(self, director: str) -> List[bytes]:
+        """
+        Returns the encoded MovieResponses of a director's movies
+        """
+        return [self._movie_bytes(key) for key in self._director_keys(director) or ()]
+
+    def get_movie_bytes_by_actor(self, name: str) -> List[bytes]:
+        """
+        Returns the encoded MovieResponses of an actor's movies, following the filmography
+        """
+        actor = self._actor(name.lower())
+        if actor is None:
+            return []
+        return [self._movie_bytes(names.name(movie_id).lower()) for movie_id in actor._movie_ids]
+
+    def movie_count(self) -> int:
+        return (self._base.movies.count if self._base is not None else 0) + self._added_movies
+
+    def actor_count(self) -> int:
+        return (self._base.actors.count if self._base is not None else 0) + self._added_actors
+
+    def add_movies(self, movies: List[Movie], actor_ids: Optional[Dict[str, str]] = None) -> List[bool]:
+        """
+        Stores a batch of movies under one acquisition of the locks they need. The
+        director index and filmographies are updated once per director/actor for
+        the whole batch. Returns, per movie, whether it was added.
+
+        `actor_ids` maps sanitized actor names to the ids to give them if they are
+        new; it is used when restoring from disk. Other new actors get fresh ids.
+        """
+        lock_keys = set()
+        for movie in movies:
+            lock_keys.add(('movie', movie.name.lower()))
+            lock_keys.add(('director', movie.director))
+            lock_keys.update(('actor', actor.lower()) for actor in movie.actors)
+
+        added = []
+        director_keys: Dict[str, List[str]] = {}
+        director_ratings: Dict[str, List[Tuple[float, str]]] = {}
+        actor_movies: Dict[str, Tuple[str, List[str]]] = {}
+        with self._locked(*lock_keys):
+            for movie in movies:
+                key = movie.name.lower()
+                if self._has_movie(key):
+                    added.append(False)
+                    continue
+
+                self._encoded_movies[key] = encode_movie(movie)
+                self._movies[key] = movie
+                added.append(True)
+                director_keys.setdefault(movie.director, []).append(key)
+                director_ratings.setdefault(movie.director, []).append((movie.rating, key))
+                for actor_name in movie.actors:
+                    actor_movies.setdefault(actor_name.lower(), (actor_name, []))[1].append(movie.name)
+
+            for director, keys in director_keys.items():
+                if self._director_keys(director) is None:
+                    self._movies_by_director[director] = []
+                self._movies_by_director[director].extend(keys)
+                self._sorted_index(self._sorted_by_director, director).update(keys)
+                self._sorted_index(self._rating_by_director, director).update(director_ratings[director])
+                self._by_rating.update(director_ratings[director])
+
+            new_actors = []
+            for actor_key, (actor_name, movie_names) in actor_movies.items():
+                # Only the movies newly linked to the actor, in O(log filmography) each
+                names_by_key = {movie_name.lower(): movie_name for movie_name in movie_names}
+                linked = self._sorted_index(self._actor_movies, actor_key).add_missing(names_by_key)
+                movie_names = [names_by_key[key] for key in linked]
+                actor = self._actor(actor_key)
+                if actor is None:
+                    actor_id = actor_ids.get(actor_key) if actor_ids else None
+                    if actor_id is None:
+                        actor_id = str(self._actor_ids.next_id())
+                    else:
+                        self._actor_ids.advance(int(actor_id))
+                    self._actors[actor_key] = Actor(actor_id, actor_name, movie_names)
+                    new_actors.append([actor_id, actor_name])
+                else:
+                    actor.add_movie_names(movie_names)
+
+            if director_keys:
+                with self._count_lock:
+                    self._added_movies += added.count(True)
+                    self._added_actors += len(new_actors)
+
+            if self._wal is not None and director_keys:
+                self._wal.append({
+                    'op': 'add',
+                    'movies': [movie_row(movie) for movie, was_added in zip(movies, added) if was_added],
+                    'actors': new_actors,
+                })
+        added_movies = [(MOVIE, movie.name.lower(), movie.name) for movie, was_added in zip(movies, added) if was_added]
+        self._sorted_keys.update(key for _, key, _ in added_movies)
+        self._search.add_many(added_movies + [(ACTOR, actor_name.lower(), actor_name) for _, actor_name in new_actors])
+        self._maybe_snapshot()
+        return added
+
+    def change_rating(self, name: str, rating: float) -> Optional[Tuple[float, Movie]]:
+        """
+        Updates the rating of a movie. Returns the old rating and the updated movie,
+        or None if the movie does not exist.
+        """
+        key = name.lower()
+        with self._locked(('movie', key)):
+            movie = self._movie(key)
+            if movie is None:
+                return None
+            updated = movie.with_rating(rating)
+            self._encoded_movies[key] = encode_movie(updated)
+            self._movies[key] = updated
+            self._move_rating(key, movie.director, movie.rating, rating)
+            if self._wal is not None:
+                self._wal.append({'op': 'rating', 'name': key, 'rating': rating})
+        self._maybe_snapshot()
+        return movie.rating, updated
+
+    def search(self, query: str, limit: int = 10, fuzzy: bool = True) -> List[SearchHit]:
+        if not self._base_indexed:
+            self._index_base()
+        return self._search.search(query, limit, fuzzy)
+
+    def list_movies(self, director: Optional[str] = None, actor: Optional[str] = None,
+                    min_rating: Optional[float] = None, max_rating: Optional[float] = None,
+                    order: str = BY_NAME, descending: bool = False, limit: int = 50,
+                    after: Optional[list] = None) -> Tuple[List[bytes], Optional[list]]:
+        """
+        Pages through a sorted index, resuming at `after` in O(log n): the actor's
+        movie keys if an actor is given, else the director's, else all of them, or the
+        (rating, key) index of the director or of all movies when ordered by rating,
+        which also serves the rating range. The other filters are checked per movie,
+        so a page costs O(limit) unless most movies are filtered out. There is no
+        rating index per actor: their movies are sorted by rating for every page.
+        """
+        if not self._base_indexed:
+            self._index_base()
+        by_rating = order == BY_RATING
+        low = high = None
+        if by_rating and min_rating is not None:
+            low = (min_rating,)
+        if by_rating and max_rating is not None:
+            high = (math.nextafter(max_rating, math.inf),)
+        if actor is not None:
+            index = self._actor_movies.get(actor.lower())
+            if index is not None and by_rating:
+                index = SortedList((self._movie(key).rating, key) for key in index)
+        elif by_rating:
+            index = self._rating_by_director.get(director) if director is not None else self._by_rating
+        elif director is not None:
+            index = self._sorted_by_director.get(director)
+        else:
+            index = self._sorted_keys
+        if index is None:
+            return [], None
+
+        check_director = actor is not None and director is not None
+        check_rating = min_rating is not None or max_rating is not None
+        # One movie past the page tells whether there is a next one
+        page = []
+        position = (tuple(after) if by_rating else after[0]) if after else None
+        while len(page) <= limit:
+            entries = index.page(limit + 1, after=position, low=low, high=high, reverse=descending)
+            for position in entries:
+                key = position[1] if by_rating else position
+                if check_director or check_rating:
+                    movie = self._movie(key)
+                    if (check_director and movie.director != director
+                            or min_rating is not None and movie.rating < min_rating
+                            or max_rating is not None and movie.rating > max_rating):
+                        continue
+                page.append(position)
+                if len(page) > limit:
+                    break
+            if len(entries) <= limit:
+                break
+        keys = [entry[1] for entry in page] if by_rating else page
+        if len(page) > limit:
+            last = page[limit - 1]
+            return [self._movie_bytes(key) for key in keys[:limit]], list(last) if by_rating else [last]
+        return [self._movie_bytes(key) for key in keys], None
+
+    def _move_rating(self, key: str, director: str, old: float, new: float):
+        """
+        Moves a movie in the rating indexes; the caller holds its stripe lock. A movie
+        of the base snapshot that _index_base has not reached yet is left alone: its
+        rating is read when it is indexed.
+        """
+        if (old, key) in self._by_rating:
+            for index in (self._by_rating, self._rating_by_director[director]):
+                index.remove((old, key))
+                index.add((new, key))
+
+    @staticmethod
+    def _sorted_index(indexes: Dict[str, SortedList], key: str) -> SortedList:
+        index = indexes.get(key)
+        if index is None:
+            index = indexes.setdefault(key, SortedList())
+        return index
+
+    def _index_base(self):
+        """
+        Adds the records of the base snapshot to the search and sorted indexes
+        """
+        with self._index_lock:
+            if self._base_indexed:
+                return
+            movies = []
+            by_director: Dict[str, List[str]] = {}
+            by_actor: Dict[str, List[str]] = {}
+            for key, data in self._base.movies.items():
+                key = key.tobytes().decode()
+                response = MovieResponse.FromString(data)
+                movies.append((MOVIE, key, response.name))
+                by_director.setdefault(response.director, []).append(key)
+                for actor_key in {actor.lower() for actor in response.actors}:
+                    by_actor.setdefault(actor_key, []).append(key)
+                # Under the stripe lock change_rating takes (see _locked), so a rating
+                # change either happens before and is read here, or after and moves the entry
+                with self._locks[hash(('movie', key)) % len(self._locks)]:
+                    movie = self._movies.get(key)
+                    entry = (movie.rating if movie is not None else response.rating, key)
+                    self._by_rating.add(entry)
+                    self._sorted_index(self._rating_by_director, response.director).add(entry)
+            self._search.add_many(movies)
+            self._search.add_many((ACTOR, key.tobytes().decode(), ActorResponse.FromString(data).actor_name)
+                                  for key, data in self._base.actors.items())
+            self._sorted_keys.update(key for _, key, _ in movies)
+            for director, keys in by_director.items():
+                self._sorted_index(self._sorted_by_director, director).update(keys)
+            for actor_key, keys in by_actor.items():
+                self._sorted_index(self._actor_movies, actor_key).update(keys)
+            self._base_indexed = True
+
+    def load_snapshot(self, path: str):
+        """
+        Resets the store to the contents of a snapshot written by write_snapshot.
+        The file is memory-mapped and records are decoded lazily, so this takes
+        the same time whatever the size of the catalog.
+        """
+        self._reset()
+        self._base = MappedSnapshot(path)
+        self._base_indexed = False
+        self._actor_ids.advance(self._base.max_actor_id)
+
+    def write_snapshot(self, path: str, wal_seq: int = 0):
+        """
+        Writes the contents of the store to a snapshot file that load_snapshot can map
+        """
+        with self._locked_all():
+            state = self._snapshot_state()
+        self._write_snapshot_file(path, wal_seq, *state)
+
+    def _snapshot_state(self):
+        """
+        Captures what a snapshot taken now contains; the caller holds every stripe
+        lock. Filmographies and the director index are append-only, so recording
+        their current lengths is enough to pin them down.
+        """
+        movies = dict(self._encoded_movies)
+        actors = [(key, actor, len(actor._movie_ids)) for key, actor in self._actors.items()]
+        directors = [(director, keys, len(keys)) for director, keys in self._movies_by_director.items()]
+        return movies, actors, directors
+
+    def _write_snapshot_file(self, path, wal_seq, movies, actors, directors):
+        """
+        Writes the captured overlay plus the records of the base snapshot it does not replace
+        """
+        base = self._base
+        actor_keys = {key for key, _, _ in actors}
+        director_names = {director for director, _, _ in directors}
+        max_actor_id = max([int(actor.id) for _, actor, _ in actors] + [base.max_actor_id if base else 0])
+
+        def movie_records():
+            for key, data in movies.items():
+                yield key.encode(), data
+            if base is not None:
+                for key, data in base.movies.items():
+                    if key.tobytes().decode() not in movies:
+                        yield key, data
+
+        def actor_records():
+            for key, actor, movie_count in actors:
+                yield key.encode(), encode_actor(actor, movie_count)
+            if base is not None:
+                for key, data in base.actors.items():
+                    if key.tobytes().decode() not in actor_keys:
+                        yield key, data
+
+        def director_records():
+            for director, keys, length in directors:
+                yield director.encode(), '\0'.join(keys[:length]).encode()
+            if base is not None:
+                for director, data in base.directors.items():
+                    if director.tobytes().decode() not in director_names:
+                        yield director, data
+
+        write_mapped_snapshot(path, (movie_records(), actor_records(), director_records()),
+                              wal_seq=wal_seq, max_actor_id=max_actor_id)
+
+    @property
+    def blocking(self) -> bool:
+        # Once persistent, writes wait on the write-ahead log
+        return self._wal is not None
+
+    def enable_persistence(self, directory: str, sync_every: int = 1, sync_interval: Optional[float] = None,
+                           snapshot_every: int = 100_000):
+        """
+        Makes the store durable in `directory`. If the directory holds data, the store
+        is reset and restored from it; otherwise the current contents become the first
+        snapshot. From then on every write is appended to the write-ahead log (see
+        WriteAheadLog for sync_every/sync_interval), and a compacted snapshot is
+        written in the background every `snapshot_every` logged writes.
+        """
+        os.makedirs(directory, exist_ok=True)
+        snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        has_snapshot = os.path.exists(snapshot_path)
+        has_log = any(name.startswith('wal-') for name in os.listdir(directory))
+        if has_snapshot or has_log:
+            self._recover(directory, snapshot_path if has_snapshot else None)
+
+        self._wal = WriteAheadLog(directory, sync_every=sync_every, sync_interval=sync_interval)
+        self._snapshot_every = snapshot_every
+        if not has_snapshot:
+            self.snapshot()
+
+    def _recover(self, directory: str, snapshot_path: Optional[str]):
+        """
+        Maps the snapshot, if any, and replays the log written after it
+        """
+        if snapshot_path is not None:
+            self.load_snapshot(snapshot_path)
+            from_seq = self._base.wal_seq
+        else:
+            self._reset()
+            from_seq = 0
+
+        for record in read_records(directory, from_seq):
+            if record['op'] == 'add':
+                actor_ids = {actor_name.lower(): actor_id for actor_id, actor_name in record['actors']}
+                self.add_movies([Movie(*row) for row in record['movies']], actor_ids)
+            elif record['op'] == 'rating':
+                self.change_rating(record['name'], record['rating'])
+
+    def snapshot(self):
+        """
+        Writes a compacted snapshot of the store and drops the log segments it covers
+        """
+        with self._snapshot_lock:
+            self._write_snapshot()
+
+    def _maybe_snapshot(self):
+        wal = self._wal
+        if wal is None or not self._snapshot_every or wal.appended < self._snapshot_every:
+            return
+        if self._snapshot_lock.acquire(blocking=False):
+            threading.Thread(target=self._background_snapshot, daemon=True).start()
+
+    def _background_snapshot(self):
+        try:
+            self._write_snapshot()
+        finally:
+            self._snapshot_lock.release()
+
+    def _write_snapshot(self):
+        if self._wal is None:
+            return
+        # Writers pause only while the log is rotated and the records are collected
+        with self._locked_all():
+            seq = self._wal.rotate()
+            state = self._snapshot_state()
+        self._write_snapshot_file(os.path.join(self._wal.directory, SNAPSHOT_FILE), seq, *state)
+        self._wal.remove_segments_before(seq)
 
+    def close(self):
+        """
+        Syncs and closes the write-ahead log, if persistence is enabled
+        """
+        if self._wal is not None:
+            self._wal.close()
+            self._wal = None
 
-movies_db: Dict[str, Movie] = {}
-actors_db: Dict[str, Actor] = {}
 
-avengers = Movie('1', 'Avengers', ["Robert", "Chris"], 'Joss Wheadon', 4.2)
+db = MovieStore()
 
-movies_db['avengers'] = avengers
-actors_db['robert'] = Actor('1', 'Robert', ['Avengers'])
-actors_db['chris'] = Actor('2', 'Chris', ['Avengers'])
\ No newline at end of file
+db.add_movie(Movie('1', 'Avengers', ["Robert", "Chris"], 'Joss Wheadon', 4.2))
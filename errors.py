@@ -22,3 +22,8 @@ class UnauthorizedError(CustomError):
 class InternalServerError(CustomError):
     def __init__(self, message="Internal server error"):
         super().__init__(message, StatusCode.INTERNAL)
+
+
+class InvalidArgumentError(CustomError):
+    def __init__(self, message="Invalid argument"):
+        super().__init__(message, StatusCode.INVALID_ARGUMENT)
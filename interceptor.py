@@ -1,17 +1,302 @@
 # Created by NaveenPiedy at 6/19/2024 6:40 AM
+import contextvars
+from typing import Dict, NamedTuple
+
 import grpc
 import logging
 
+from errors import UnauthorizedError
+from jwt_utils import verify_jwt
+from trace_logging import TraceSampler, logger as trace_logger, sampled_call, sampler as trace_sampler, trace
+
+
+class CallInfo(NamedTuple):
+    """
+    Per-call state resolved once by the AuthInterceptor
+    """
+    metadata: Dict[str, str]
+    trace_id: str
+    user_id: str
+
+
+# Set for the duration of every handler that passed authentication
+current_call = contextvars.ContextVar('current_call')
+
+
+def metadata_value(invocation_metadata, key, default=None):
+    """
+    Looks up a single metadata value without building a dict. Like dict(), the
+    last value wins if the key is repeated.
+    """
+    result = default
+    for metadata_key, value in invocation_metadata or ():
+        if metadata_key == key:
+            result = value
+    return result
+
+
+def wrap_handler(handler, wrap_unary_response, wrap_stream_response):
+    """
+    Returns `handler` with its behaviour wrapped: by `wrap_unary_response` if the
+    call returns a single response, by `wrap_stream_response` if it streams them
+    """
+    if handler.unary_unary:
+        return handler._replace(unary_unary=wrap_unary_response(handler.unary_unary))
+    if handler.unary_stream:
+        return handler._replace(unary_stream=wrap_stream_response(handler.unary_stream))
+    if handler.stream_unary:
+        return handler._replace(stream_unary=wrap_unary_response(handler.stream_unary))
+    return handler._replace(stream_stream=wrap_stream_response(handler.stream_stream))
+
+
+def _rejecting_handler(handler, error):
+    """
+    Builds a handler of the same shape as `handler` that fails the call with `error`
+    without deserializing the request
+    """
+    def abort(request_or_iterator, context):
+        context.abort(error.code, error.message)
+
+    if handler.request_streaming and handler.response_streaming:
+        return grpc.stream_stream_rpc_method_handler(abort)
+    if handler.request_streaming:
+        return grpc.stream_unary_rpc_method_handler(abort)
+    if handler.response_streaming:
+        return grpc.unary_stream_rpc_method_handler(abort)
+    return grpc.unary_unary_rpc_method_handler(abort)
+
+
+def _with_call_info(handler, call_info):
+    """
+    Wraps the handler behaviour so it runs with `current_call` set to `call_info`
+    """
+    def wrap_unary_response(behavior):
+        def wrapper(request_or_iterator, context):
+            token = current_call.set(call_info)
+            try:
+                return behavior(request_or_iterator, context)
+            finally:
+                current_call.reset(token)
+        return wrapper
+
+    def wrap_stream_response(behavior):
+        def wrapper(request_or_iterator, context):
+            token = current_call.set(call_info)
+            try:
+                yield from behavior(request_or_iterator, context)
+            finally:
+                current_call.reset(token)
+        return wrapper
+
+    return wrap_handler(handler, wrap_unary_response, wrap_stream_response)
+
+
+def authenticate(invocation_metadata):
+    """
+    Parses the call metadata and validates its JWT.
+    Returns the CallInfo for the call, raises UnauthorizedError if the JWT is missing or invalid.
+    """
+    metadata = dict(invocation_metadata or ())
+    trace_id = metadata.get('trace-id', 'unknown')
+    token = metadata.get('authorization')
+
+    if not token:
+        logging.warning("Missing JWT for trace ID: %s", trace_id)
+        raise UnauthorizedError("Missing JWT")
+
+    user_id = verify_jwt(token)
+    if not user_id:
+        logging.warning("Invalid or expired JWT for trace ID: %s", trace_id)
+        raise UnauthorizedError("Invalid or expired JWT")
+
+    return CallInfo(metadata, trace_id, user_id)
+
+
+class AuthInterceptor(grpc.ServerInterceptor):
+    """
+    Validates the JWT once per call, before the handler runs. Rejected calls are
+    failed with UNAUTHENTICATED without deserializing the request; accepted calls
+    run with `current_call` holding the parsed metadata and the verified user_id.
+    """
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+
+        try:
+            call_info = authenticate(handler_call_details.invocation_metadata)
+        except UnauthorizedError as e:
+            return _rejecting_handler(handler, e)
+
+        return _with_call_info(handler, call_info)
+
+
+def _async_rejecting_handler(handler, error):
+    """
+    grpc.aio counterpart of _rejecting_handler. Response-streaming shapes get an
+    async generator, as the interceptors wrapping them iterate the behaviour.
+    """
+    async def abort(request_or_iterator, context):
+        await context.abort(error.code, error.message)
+
+    async def abort_stream(request_or_iterator, context):
+        await context.abort(error.code, error.message)
+        yield  # Never reached: abort raises
+
+    if handler.request_streaming and handler.response_streaming:
+        return grpc.stream_stream_rpc_method_handler(abort_stream)
+    if handler.request_streaming:
+        return grpc.stream_unary_rpc_method_handler(abort)
+    if handler.response_streaming:
+        return grpc.unary_stream_rpc_method_handler(abort_stream)
+    return grpc.unary_unary_rpc_method_handler(abort)
+
+
+def _async_with_call_info(handler, call_info):
+    """
+    grpc.aio counterpart of _with_call_info, for coroutine and async generator behaviours
+    """
+    def wrap_unary_response(behavior):
+        async def wrapper(request_or_iterator, context):
+            token = current_call.set(call_info)
+            try:
+                return await behavior(request_or_iterator, context)
+            finally:
+                current_call.reset(token)
+        return wrapper
+
+    def wrap_stream_response(behavior):
+        async def wrapper(request_or_iterator, context):
+            token = current_call.set(call_info)
+            try:
+                async for response in behavior(request_or_iterator, context):
+                    yield response
+            finally:
+                current_call.reset(token)
+        return wrapper
+
+    return wrap_handler(handler, wrap_unary_response, wrap_stream_response)
+
+
+class AsyncAuthInterceptor(grpc.aio.ServerInterceptor):
+    """
+    AuthInterceptor for the grpc.aio server
+    """
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+
+        try:
+            call_info = authenticate(handler_call_details.invocation_metadata)
+        except UnauthorizedError as e:
+            return _async_rejecting_handler(handler, e)
+
+        return _async_with_call_info(handler, call_info)
+
+
+def _traced(handler, method_name, trace_id):
+    """
+    Wraps the handler behaviour so it runs with `sampled_call` set, between the
+    trace messages of the start and the end of the call
+    """
+    def wrap_unary_response(behavior):
+        def wrapper(request_or_iterator, context):
+            token = sampled_call.set(method_name)
+            trace(trace_id, method_name, "Invoking method: %s", method_name)
+            try:
+                return behavior(request_or_iterator, context)
+            finally:
+                trace(trace_id, method_name, "Completed method: %s", method_name)
+                sampled_call.reset(token)
+        return wrapper
+
+    def wrap_stream_response(behavior):
+        def wrapper(request_or_iterator, context):
+            token = sampled_call.set(method_name)
+            trace(trace_id, method_name, "Invoking method: %s", method_name)
+            try:
+                yield from behavior(request_or_iterator, context)
+            finally:
+                trace(trace_id, method_name, "Completed method: %s", method_name)
+                sampled_call.reset(token)
+        return wrapper
+
+    return wrap_handler(handler, wrap_unary_response, wrap_stream_response)
+
+
+def _sample(handler, handler_call_details, sampler):
+    """
+    Returns the trace ID of the call if it should be traced, else None
+    """
+    if handler is None or not trace_logger.isEnabledFor(logging.INFO):
+        return None
+    if not sampler.sample(handler_call_details.method):
+        return None
+    return metadata_value(handler_call_details.invocation_metadata, 'trace-id', 'unknown')
+
 
 class LoggingInterceptor(grpc.ServerInterceptor):
+    """
+    Traces the calls picked by `sampler` (trace_logging.sampler by default): logs
+    their start and end, and runs them with `sampled_call` set so the handlers'
+    own trace messages are logged too. Other calls run untouched and log nothing.
+    """
+
+    def __init__(self, sampler: TraceSampler = trace_sampler):
+        self.sampler = sampler
+
     def intercept_service(self, continuation, handler_call_details):
-        method_name = handler_call_details.method
-        metadata = dict(handler_call_details.invocation_metadata)
-        trace_id = metadata.get('trace-id', 'unknown')
-        logging.info(f"Trace ID: {trace_id} - Invoking method: {method_name}")
+        handler = continuation(handler_call_details)
+        trace_id = _sample(handler, handler_call_details, self.sampler)
+        if trace_id is None:
+            return handler
+        return _traced(handler, handler_call_details.method, trace_id)
+
+
+def _async_traced(handler, method_name, trace_id):
+    """
+    grpc.aio counterpart of _traced
+    """
+    def wrap_unary_response(behavior):
+        async def wrapper(request_or_iterator, context):
+            token = sampled_call.set(method_name)
+            trace(trace_id, method_name, "Invoking method: %s", method_name)
+            try:
+                return await behavior(request_or_iterator, context)
+            finally:
+                trace(trace_id, method_name, "Completed method: %s", method_name)
+                sampled_call.reset(token)
+        return wrapper
+
+    def wrap_stream_response(behavior):
+        async def wrapper(request_or_iterator, context):
+            token = sampled_call.set(method_name)
+            trace(trace_id, method_name, "Invoking method: %s", method_name)
+            try:
+                async for response in behavior(request_or_iterator, context):
+                    yield response
+            finally:
+                trace(trace_id, method_name, "Completed method: %s", method_name)
+                sampled_call.reset(token)
+        return wrapper
+
+    return wrap_handler(handler, wrap_unary_response, wrap_stream_response)
+
+
+class AsyncLoggingInterceptor(grpc.aio.ServerInterceptor):
+    """
+    LoggingInterceptor for the grpc.aio server
+    """
 
-        # Call the actual RPC method
-        response = continuation(handler_call_details)
+    def __init__(self, sampler: TraceSampler = trace_sampler):
+        self.sampler = sampler
 
-        logging.info(f"Trace ID: {trace_id} - Completed method: {method_name}")
-        return response
\ No newline at end of file
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        trace_id = _sample(handler, handler_call_details, self.sampler)
+        if trace_id is None:
+            return handler
+        return _async_traced(handler, handler_call_details.method, trace_id)
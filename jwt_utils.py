@@ -3,8 +3,13 @@
 import jwt
 import datetime
 
+from cache import LRUCache
+
 SECRET_KEY = 'your_secret_key'
 
+# Verified token -> user_id, kept until the token's own expiry
+token_cache = LRUCache(maxsize=10000)
+
 
 def create_jwt(user_id):
     payload = {
@@ -14,11 +19,29 @@ def create_jwt(user_id):
     return jwt.encode(payload, SECRET_KEY, algorithm='HS256')
 
 
-def verify_jwt(token):
+def decode_jwt(token):
+    """
+    Decodes and checks the signature of a token, returns the payload or None
+    """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-        return payload['user_id']
+        return jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
+
+
+def verify_jwt(token):
+    """
+    Returns the user_id of a valid token. Verified tokens are cached until they
+    expire, so repeat validation of the same token skips the signature check.
+    """
+    user_id = token_cache.get(token)
+    if user_id is not None:
+        return user_id
+
+    payload = decode_jwt(token)
+    if payload is None or 'user_id' not in payload:
+        return None
+    token_cache.put(token, payload['user_id'], expires_at=payload.get('exp'))
+    return payload['user_id']
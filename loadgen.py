@@ -0,0 +1,406 @@
+import argparse
+import bisect
+import itertools
+import json
+import logging
+import os
+import queue
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import grpc
+
+import movies_management_pb2
+import movies_management_pb2_grpc
+from catalog import actor_name, default_actors, default_directors, director_name, generate, load, movie_name, \
+    parse_count, zipf_cumulative
+from jwt_utils import create_jwt
+
+"""
+Load generator for the Movies service, built on the generated MoviesServiceStub.
+
+Seeds a synthetic catalog (see catalog.py), straight into the store of the
+in-process server or through AddMovies into a --target, then drives a weighted
+mix of GetMovie, GetActor, AddMovie, ChangeRating and GetMoviesByDirector for a
+fixed duration and prints throughput and latency percentiles as JSON, so runs
+can be diffed in regression checks.
+
+    closed loop   --concurrency workers each send their next request as soon as
+                  the previous one completes
+    open loop     --rate requests per second are scheduled regardless of how the
+                  server keeps up, served by up to --concurrency workers; latency
+                  counts from the scheduled time, so queueing behind a slow server
+                  is measured instead of hidden
+
+Keys follow a Zipf distribution (--zipf, 0 for uniform). Without --target the
+load runs against an in-process server on a fresh store; clients and server then
+share one interpreter, so point --target at `server.py --workers N` to load a
+server with the client's CPU out of the way.
+
+Run from the repository root:
+    python loadgen.py --movies 100000 --concurrency 32 --duration 30
+    python loadgen.py --rate 2000 --mix GetMovie=90,ChangeRating=10 --output run.json
+"""
+
+OPERATIONS = ('GetMovie', 'GetActor', 'AddMovie', 'ChangeRating', 'GetMoviesByDirector')
+DEFAULT_MIX = 'GetMovie=60,GetActor=20,ChangeRating=10,AddMovie=5,GetMoviesByDirector=5'
+
+
+class ZipfKeys:
+    """
+    Draws integers in [0, size) where key k has weight 1 / (k + 1) ** exponent;
+    exponent 0 is uniform
+    """
+
+    def __init__(self, size: int, exponent: float):
+        self.size = size
+        self._cumulative = zipf_cumulative(size, exponent) if exponent > 0 and size > 1 else None
+
+    def draw(self, rng: random.Random) -> int:
+        if self._cumulative is None:
+            return rng.randrange(self.size)
+        return min(bisect.bisect_left(self._cumulative, rng.random() * self._cumulative[-1]), self.size - 1)
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """
+    Parses 'GetMovie=60,ChangeRating=10' into operation weights
+    """
+    mix = {}
+    for part in text.split(','):
+        operation, _, weight = part.partition('=')
+        operation = operation.strip()
+        if operation not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {operation!r}, expected {', '.join(OPERATIONS)}")
+        try:
+            mix[operation] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"expected {operation}=WEIGHT, got {part!r}")
+    if not any(weight > 0 for weight in mix.values()):
+        raise argparse.ArgumentTypeError("the mix needs an operation with a positive weight")
+    return mix
+
+
+def seed_catalog(args, stub=None, metadata=None, store=None) -> float:
+    """
+    Adds the catalog.generate() catalog of the arguments straight into `store`, or
+    with one AddMovies stream per batch through `stub`. Returns the seconds it took.
+    """
+    start = time.perf_counter()
+    batches = generate(args.movies, args.actors, args.directors, args.seed)
+    if store is not None:
+        load(store, batches)
+    else:
+        for batch in batches:
+            stub.AddMovies((movies_management_pb2.AddMovieRequest(id=movie.id, name=movie.name, actors=movie.actors,
+                                                                  director=movie.director, rating=movie.rating)
+                            for movie in batch), metadata=metadata)
+    return time.perf_counter() - start
+
+
+class Workload:
+    """
+    Builds and sends the requests of the mix; one instance per worker thread
+    """
+
+    def __init__(self, stub, metadata, args, movie_keys, actor_keys, director_keys, worker: int, run_id: str):
+        self.stub = stub
+        self.metadata = metadata
+        self.rng = random.Random(args.seed * 1_000_003 + worker)
+        self.movie_keys = movie_keys
+        self.actor_keys = actor_keys
+        self.director_keys = director_keys
+        self.new_movies = (f'Load New {run_id}-{worker}-{n}' for n in itertools.count())
+        operations = [operation for operation in OPERATIONS if args.mix.get(operation, 0) > 0]
+        self.operations = operations
+        self.cumulative = list(itertools.accumulate(args.mix[operation] for operation in operations))
+
+    def choose(self) -> str:
+        return self.operations[bisect.bisect_right(self.cumulative, self.rng.random() * self.cumulative[-1])
+                               if len(self.operations) > 1 else 0]
+
+    def run(self, operation: str):
+        getattr(self, operation)()
+
+    def GetMovie(self):
+        request = movies_management_pb2.GetMovieRequest(name=movie_name(self.movie_keys.draw(self.rng)))
+        self.stub.GetMovie(request, metadata=self.metadata)
+
+    def GetActor(self):
+        request = movies_management_pb2.GetActorRequest(actor_name=actor_name(self.actor_keys.draw(self.rng)))
+        self.stub.GetActor(request, metadata=self.metadata)
+
+    def AddMovie(self):
+        request = movies_management_pb2.AddMovieRequest(
+            id=str(uuid.uuid4()), name=next(self.new_movies),
+            actors=[actor_name(self.actor_keys.draw(self.rng))],
+            director=director_name(self.director_keys.draw(self.rng)), rating=round(self.rng.uniform(1, 5), 1))
+        self.stub.AddMovie(request, metadata=self.metadata)
+
+    def ChangeRating(self):
+        request = movies_management_pb2.ScoreRequest(movie_name=movie_name(self.movie_keys.draw(self.rng)),
+                                                     rating=round(self.rng.uniform(1, 5), 1))
+        self.stub.ChangeRating(request, metadata=self.metadata)
+
+    def GetMoviesByDirector(self):
+        request = movies_management_pb2.GetMoviesByDirectorRequest(
+            director=director_name(self.director_keys.draw(self.rng)))
+        for _ in self.stub.GetMoviesByDirector(request, metadata=self.metadata):
+            pass
+
+
+class Recorder:
+    """
+    Latencies and errors of one worker, per operation
+    """
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {operation: [] for operation in OPERATIONS}
+        self.errors: Dict[str, Dict[str, int]] = {operation: {} for operation in OPERATIONS}
+
+    def call(self, workload: Workload, operation: str, start: float, record: bool):
+        """
+        Runs `operation`, recording its latency from `start` unless record is False
+        """
+        try:
+            workload.run(operation)
+        except grpc.RpcError as e:
+            if record:
+                errors = self.errors[operation]
+                errors[e.code().name] = errors.get(e.code().name, 0) + 1
+            return
+        if record:
+            self.latencies[operation].append(time.perf_counter() - start)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def summary(latencies: List[float], errors: Dict[str, int], seconds: float) -> dict:
+    latencies = sorted(latencies)
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 4)
+
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors.values()),
+        'error_codes': dict(sorted(errors.items())),
+        'throughput_rps': round(len(latencies) / seconds, 1),
+        'latency_ms': {
+            'p50': ms(percentile(latencies, 0.5)),
+            'p99': ms(percentile(latencies, 0.99)),
+            'p999': ms(percentile(latencies, 0.999)),
+            'mean': ms(sum(latencies) / len(latencies) if latencies else None),
+            'max': ms(latencies[-1] if latencies else None),
+        },
+    }
+
+
+def run_closed_loop(workloads: List[Workload], warmup: float, duration: float) -> List[Recorder]:
+    measure_from = time.perf_counter() + warmup
+    end = measure_from + duration
+
+    def worker(workload, recorder):
+        while True:
+            start = time.perf_counter()
+            if start >= end:
+                return
+            recorder.call(workload, workload.choose(), start, start >= measure_from)
+
+    return _run_workers(workloads, worker)
+
+
+def run_open_loop(workloads: List[Workload], warmup: float, duration: float, rate: float,
+                  poisson: bool, seed: int) -> List[Recorder]:
+    """
+    Schedules requests `rate` per second, evenly or as a Poisson process, and hands
+    them to the workers with their scheduled start times
+    """
+    tickets = queue.SimpleQueue()
+    measure_from = time.perf_counter() + warmup
+    end = measure_from + duration
+
+    def dispatch():
+        rng = random.Random(seed)
+        scheduled = time.perf_counter()
+        while scheduled < end:
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            tickets.put(scheduled)
+            scheduled += rng.expovariate(rate) if poisson else 1 / rate
+        for _ in workloads:
+            tickets.put(None)
+
+    def worker(workload, recorder):
+        while True:
+            scheduled = tickets.get()
+            if scheduled is None:
+                return
+            recorder.call(workload, workload.choose(), scheduled, scheduled >= measure_from)
+
+    dispatcher = threading.Thread(target=dispatch, daemon=True)
+    dispatcher.start()
+    recorders = _run_workers(workloads, worker)
+    dispatcher.join()
+    return recorders
+
+
+def _run_workers(workloads: List[Workload], worker) -> List[Recorder]:
+    recorders = [Recorder() for _ in workloads]
+    pool = [threading.Thread(target=worker, args=(workload, recorder), daemon=True)
+            for workload, recorder in zip(workloads, recorders)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return recorders
+
+
+def report(recorders: List[Recorder], args, seed_seconds: float) -> dict:
+    operations = {}
+    all_latencies = []
+    all_errors: Dict[str, int] = {}
+    for operation in OPERATIONS:
+        if args.mix.get(operation, 0) <= 0:
+            continue
+        latencies = [latency for recorder in recorders for latency in recorder.latencies[operation]]
+        errors: Dict[str, int] = {}
+        for recorder in recorders:
+            for code, count in recorder.errors[operation].items():
+                errors[code] = errors.get(code, 0) + count
+                all_errors[code] = all_errors.get(code, 0) + count
+        operations[operation] = summary(latencies, errors, args.duration)
+        all_latencies.extend(latencies)
+
+    result = {
+        'config': {
+            'mode': 'open' if args.rate else 'closed',
+            'target': args.target or f'in-process ({args.storage})',
+            'concurrency': args.concurrency,
+            'rate': args.rate,
+            'arrivals': args.arrivals if args.rate else None,
+            'duration_s': args.duration,
+            'warmup_s': args.warmup,
+            'mix': args.mix,
+            'zipf': args.zipf,
+            'movies': args.movies,
+            'actors': args.actors,
+            'directors': args.directors,
+            'seed': args.seed,
+        },
+        'seed_s': round(seed_seconds, 3),
+    }
+    result.update(summary(all_latencies, all_errors, args.duration))
+    result['operations'] = operations
+    return result
+
+
+def start_in_process_server(storage: str, directory: str):
+    from server import MAX_WORKERS, create_server
+
+    if storage == 'sqlite':
+        from sqlite_store import SQLiteMovieStore
+        store = SQLiteMovieStore(os.path.join(directory, 'loadgen.db'), pool_size=MAX_WORKERS)
+    else:
+        from db_mimic import MovieStore
+        store = MovieStore()
+    server, port = create_server('localhost:0', store=store)
+    server.start()
+    return server, store, f'localhost:{port}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the Movies service",
+                                     formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__)
+    parser.add_argument('--target', help="server to load, e.g. localhost:50051; an in-process server by default")
+    parser.add_argument('--storage', choices=('memory', 'sqlite'), default='memory',
+                        help="store of the in-process server")
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"operation weights, default {DEFAULT_MIX}")
+    parser.add_argument('--concurrency', type=int, default=16,
+                        help="closed loop: concurrent requests; open loop: most requests in flight")
+    parser.add_argument('--rate', type=float, default=None,
+                        help="run open loop at this many requests per second instead of closed loop")
+    parser.add_argument('--arrivals', choices=('uniform', 'poisson'), default='poisson',
+                        help="open loop: evenly spaced or exponentially distributed request intervals")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds measured")
+    parser.add_argument('--warmup', type=float, default=2.0, help="seconds of load before measuring")
+    parser.add_argument('--zipf', type=float, default=1.0, help="skew of the keys requested, 0 for uniform")
+    parser.add_argument('--movies', type=parse_count, default=10_000,
+                        help="movies to seed, e.g. 10k or 1M; 0 to use the catalog as is")
+    parser.add_argument('--actors', type=parse_count, default=None,
+                        help="actors of the seeded catalog, movies / 2 by default")
+    parser.add_argument('--directors', type=parse_count, default=None,
+                        help="directors of the seeded catalog, movies / 20 by default")
+    parser.add_argument('--channels', type=int, default=1, help="client channels, shared round-robin by the workers")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the catalog and of the request streams")
+    parser.add_argument('--output', help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    if args.concurrency < 1 or args.channels < 1:
+        parser.error("--concurrency and --channels must be at least 1")
+    if args.rate is not None and args.rate <= 0:
+        parser.error("--rate must be positive")
+    if args.movies < 0:
+        parser.error("--movies can't be negative")
+    args.actors = args.actors or default_actors(args.movies)
+    args.directors = args.directors or default_directors(args.movies)
+
+    logging.basicConfig(level=logging.WARNING)
+    directory = tempfile.mkdtemp()
+    server = store = None
+    target = args.target
+    if target is None:
+        server, store, target = start_in_process_server(args.storage, directory)
+
+    channels = [grpc.insecure_channel(target, options=[('grpc.use_local_subchannel_pool', 1)])
+                for _ in range(args.channels)]
+    try:
+        stubs = [movies_management_pb2_grpc.MoviesServiceStub(channel) for channel in channels]
+        metadata = (('authorization', create_jwt(user_id='loadgen')), ('trace-id', 'loadgen'))
+        seed_seconds = seed_catalog(args, stubs[0], metadata, store) if args.movies else 0.0
+        print(f"Seeded {args.movies:,} movies in {seed_seconds:.1f}s", file=sys.stderr)
+
+        keyspace = max(args.movies, 1)
+        movie_keys = ZipfKeys(keyspace, args.zipf)
+        actor_keys = ZipfKeys(args.actors, args.zipf)
+        director_keys = ZipfKeys(args.directors, args.zipf)
+        run_id = uuid.uuid4().hex[:8]
+        workloads = [Workload(stubs[worker % len(stubs)], metadata, args, movie_keys, actor_keys, director_keys,
+                              worker, run_id)
+                     for worker in range(args.concurrency)]
+        if args.rate:
+            recorders = run_open_loop(workloads, args.warmup, args.duration, args.rate,
+                                      args.arrivals == 'poisson', args.seed)
+        else:
+            recorders = run_closed_loop(workloads, args.warmup, args.duration)
+        result = report(recorders, args, seed_seconds)
+    finally:
+        for channel in channels:
+            channel.close()
+        if server is not None:
+            server.stop(None)
+            store.close()
+        shutil.rmtree(directory)
+
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+import grpc
+
+from interceptor import wrap_handler
+
+"""
+Per-method RPC metrics for the servers: latency histograms, in-flight calls,
+status codes and stream message counts, served in the Prometheus text format.
+
+Every thread records into its own shard of counters, so the hot path takes no
+lock and does a handful of integer increments; a scrape sums the shards.
+"""
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class MethodStats:
+    """
+    Counters of one method in one thread's shard; only that thread writes them
+    """
+    __slots__ = ('started', 'buckets', 'latency_sum', 'codes', 'received', 'sent')
+
+    def __init__(self, bucket_count: int):
+        self.started = 0
+        # Calls per latency bucket, the last one past the largest bound
+        self.buckets = [0] * (bucket_count + 1)
+        self.latency_sum = 0.0
+        # Status code name -> calls that ended with it
+        self.codes: Dict[str, int] = {}
+        self.received = 0
+        self.sent = 0
+
+
+class Metrics:
+    """
+    Registry of the RPC metrics of a server process, sharded per thread
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._local = threading.local()
+        self._shards: List[Dict[str, MethodStats]] = []
+        self._lock = threading.Lock()
+
+    def stats(self, method: str) -> MethodStats:
+        """
+        The calling thread's counters for `method`
+        """
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+        stats = shard.get(method)
+        if stats is None:
+            stats = shard[method] = MethodStats(len(self.buckets))
+        return stats
+
+    def observe(self, stats: MethodStats, start: float, code: grpc.StatusCode):
+        """
+        Records a finished call that started at perf_counter() `start`
+        """
+        elapsed = time.perf_counter() - start
+        stats.buckets[bisect_left(self.buckets, elapsed)] += 1
+        stats.latency_sum += elapsed
+        name = code.name
+        stats.codes[name] = stats.codes.get(name, 0) + 1
+
+    def snapshot(self) -> Dict[str, MethodStats]:
+        """
+        Sums the shards into one MethodStats per method. Shards are copied first, as
+        their owners keep writing; a scrape may miss calls finishing meanwhile.
+        """
+        with self._lock:
+            shards = list(self._shards)
+        totals: Dict[str, MethodStats] = {}
+        for shard in shards:
+            for method, stats in shard.copy().items():
+                total = totals.get(method)
+                if total is None:
+                    total = totals[method] = MethodStats(len(self.buckets))
+                total.started += stats.started
+                total.buckets = [a + b for a, b in zip(total.buckets, stats.buckets)]
+                total.latency_sum += stats.latency_sum
+                for code, count in stats.codes.copy().items():
+                    total.codes[code] = total.codes.get(code, 0) + count
+                total.received += stats.received
+                total.sent += stats.sent
+        return totals
+
+    def exposition(self) -> str:
+        """
+        The metrics in the Prometheus text exposition format
+        """
+        totals = sorted(self.snapshot().items())
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(samples)
+
+        def labels(method, **extra):
+            service, _, method_name = method.lstrip('/').rpartition('/')
+            pairs = [('grpc_service', service), ('grpc_method', method_name)] + list(extra.items())
+            return '{' + ','.join(f'{key}="{value}"' for key, value in pairs) + '}'
+
+        family('grpc_server_started_total', 'counter', 'RPCs started on the server.',
+               [f'grpc_server_started_total{labels(method)} {stats.started}' for method, stats in totals])
+        family('grpc_server_handled_total', 'counter', 'RPCs completed on the server, by status code.',
+               [f'grpc_server_handled_total{labels(method, grpc_code=code)} {count}'
+                for method, stats in totals for code, count in sorted(stats.codes.items())])
+        family('grpc_server_in_flight', 'gauge', 'RPCs started and not completed yet.',
+               [f'grpc_server_in_flight{labels(method)} {stats.started - sum(stats.codes.values())}'
+                for method, stats in totals])
+        family('grpc_server_msg_received_total', 'counter', 'Request messages received.',
+               [f'grpc_server_msg_received_total{labels(method)} {stats.received}' for method, stats in totals])
+        family('grpc_server_msg_sent_total', 'counter', 'Response messages sent.',
+               [f'grpc_server_msg_sent_total{labels(method)} {stats.sent}' for method, stats in totals])
+
+        histogram = []
+        for method, stats in totals:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), stats.buckets):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                histogram.append(f'grpc_server_handling_seconds_bucket{labels(method, le=le)} {cumulative}')
+            histogram.append(f'grpc_server_handling_seconds_sum{labels(method)} {stats.latency_sum}')
+            histogram.append(f'grpc_server_handling_seconds_count{labels(method)} {cumulative}')
+        family('grpc_server_handling_seconds', 'histogram', 'Time from the start of an RPC to its completion.',
+               histogram)
+        return '\n'.join(lines) + '\n'
+
+
+# Metrics of the servers of this process
+registry = Metrics()
+
+
+def _status(context, failed: bool) -> grpc.StatusCode:
+    code = context.code()
+    if code is None:
+        return grpc.StatusCode.UNKNOWN if failed else grpc.StatusCode.OK
+    return code
+
+
+def _counted(request_iterator, stats: MethodStats):
+    for request in request_iterator:
+        stats.received += 1
+        yield request
+
+
+def _async_counted(request_iterator, stats: MethodStats):
+    async def counted():
+        async for request in request_iterator:
+            stats.received += 1
+            yield request
+    return counted()
+
+
+def _instrumented(handler, method: str, metrics: Metrics):
+    """
+    Wraps the handler behaviour so every call is recorded in `metrics`
+    """
+    def run(request_or_iterator):
+        stats = metrics.stats(method)
+        stats.started += 1
+        if handler.request_streaming:
+            request_or_iterator = _counted(request_or_iterator, stats)
+        else:
+            stats.received += 1
+        return stats, request_or_iterator
+
+    def wrap_unary_response(behavior):
+        def wrapper(request_or_iterator, context):
+            start = time.perf_counter()
+            stats, request_or_iterator = run(request_or_iterator)
+            failed = True
+            try:
+                response = behavior(request_or_iterator, context)
+                failed = False
+                return response
+            finally:
+                code = _status(context, failed)
+                if code is grpc.StatusCode.OK:
+                    stats.sent += 1
+                metrics.observe(stats, start, code)
+        return wrapper
+
+    def wrap_stream_response(behavior):
+        def wrapper(request_or_iterator, context):
+            start = time.perf_counter()
+            stats, request_or_iterator = run(request_or_iterator)
+            failed = True
+            try:
+                for response in behavior(request_or_iterator, context):
+                    stats.sent += 1
+                    yield response
+                failed = False
+            finally:
+                metrics.observe(stats, start, _status(context, failed))
+        return wrapper
+
+    return wrap_handler(handler, wrap_unary_response, wrap_stream_response)
+
+
+def _async_instrumented(handler, method: str, metrics: Metrics):
+    """
+    grpc.aio counterpart of _instrumented. All coroutines of the event loop share
+    its thread's shard, and never interleave inside an increment.
+    """
+    def run(request_or_iterator):
+        stats = metrics.stats(method)
+        stats.started += 1
+        if handler.request_streaming:
+            request_or_iterator = _async_counted(request_or_iterator, stats)
+        else:
+            stats.received += 1
+        return stats, request_or_iterator
+
+    def wrap_unary_response(behavior):
+        async def wrapper(request_or_iterator, context):
+            start = time.perf_counter()
+            stats, request_or_iterator = run(request_or_iterator)
+            failed = True
+            try:
+                response = await behavior(request_or_iterator, context)
+                failed = False
+                return response
+            finally:
+                code = _status(context, failed)
+                if code is grpc.StatusCode.OK:
+                    stats.sent += 1
+                metrics.observe(stats, start, code)
+        return wrapper
+
+    def wrap_stream_response(behavior):
+        async def wrapper(request_or_iterator, context):
+            start = time.perf_counter()
+            stats, request_or_iterator = run(request_or_iterator)
+            failed = True
+            try:
+                async for response in behavior(request_or_iterator, context):
+                    stats.sent += 1
+                    yield response
+                failed = False
+            finally:
+                metrics.observe(stats, start, _status(context, failed))
+        return wrapper
+
+    return wrap_handler(handler, wrap_unary_response, wrap_stream_response)
+
+
+class MetricsInterceptor(grpc.ServerInterceptor):
+    """
+    Records every call in a Metrics registry. Install it first, so the timings
+    include the other interceptors and calls they reject are counted.
+    """
+
+    def __init__(self, metrics: Metrics = registry):
+        self.metrics = metrics
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        return _instrumented(handler, handler_call_details.method, self.metrics)
+
+
+class AsyncMetricsInterceptor(grpc.aio.ServerInterceptor):
+    """
+    MetricsInterceptor for the grpc.aio server
+    """
+
+    def __init__(self, metrics: Metrics = registry):
+        self.metrics = metrics
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        return _async_instrumented(handler, handler_call_details.method, self.metrics)
+
+
+def start_metrics_server(port: int, address: str = '', metrics: Metrics = registry) -> ThreadingHTTPServer:
+    """
+    Serves the metrics for scraping at http://address:port/metrics from a daemon thread.
+    Returns the HTTP server; port 0 picks a free one (see server_port).
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.exposition().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    http_server = ThreadingHTTPServer((address, port), Handler)
+    threading.Thread(target=http_server.serve_forever, daemon=True).start()
+    return http_server
@@ -14,13 +14,15 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x17movies_management.proto\x12\x11movies_management\"\x1f\n\x0fGetMovieRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\"]\n\x0f\x41\x64\x64MovieRequest\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x0e\n\x06\x61\x63tors\x18\x03 \x03(\t\x12\x10\n\x08\x64irector\x18\x04 \x01(\t\x12\x0e\n\x06rating\x18\x05 \x01(\x02\"o\n\x10\x41\x64\x64MovieResponse\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x0e\n\x06\x61\x63tors\x18\x03 \x03(\t\x12\x10\n\x08\x64irector\x18\x04 \x01(\t\x12\x0e\n\x06rating\x18\x05 \x01(\x02\x12\x0f\n\x07message\x18\x06 \x01(\t\"[\n\rMovieResponse\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x0e\n\x06\x61\x63tors\x18\x03 \x03(\t\x12\x10\n\x08\x64irector\x18\x04 \x01(\t\x12\x0e\n\x06rating\x18\x05 \x01(\x02\"%\n\x0fGetActorRequest\x12\x12\n\nactor_name\x18\x01 \x01(\t\"D\n\rActorResponse\x12\n\n\x02id\x18\x01 \x01(\t\x12\x12\n\nactor_name\x18\x02 \x01(\t\x12\x13\n\x0bmovie_names\x18\x03 \x03(\t\"2\n\x0cScoreRequest\x12\x12\n\nmovie_name\x18\x01 \x01(\t\x12\x0e\n\x06rating\x18\x02 \x01(\x02\"P\n\rScoreResponse\x12\n\n\x02id\x18\x01 \x01(\t\x12\x12\n\nmovie_name\x18\x02 \x01(\t\x12\x0e\n\x06rating\x18\x03 \x01(\x02\x12\x0f\n\x07message\x18\x04 \x01(\t\".\n\x1aGetMoviesByDirectorRequest\x12\x10\n\x08\x64irector\x18\x01 \x01(\t2\xcf\x03\n\rMoviesService\x12R\n\x08GetMovie\x12\".movies_management.GetMovieRequest\x1a .movies_management.MovieResponse\"\x00\x12R\n\x08GetActor\x12\".movies_management.GetActorRequest\x1a .movies_management.ActorResponse\"\x00\x12U\n\x08\x41\x64\x64Movie\x12\".movies_management.AddMovieRequest\x1a#.movies_management.AddMovieResponse\"\x00\x12S\n\x0c\x43hangeRating\x12\x1f.movies_management.ScoreRequest\x1a .movies_management.ScoreResponse\"\x00\x12j\n\x13GetMoviesByDirector\x12-.movies_management.GetMoviesByDirectorRequest\x1a .movies_management.MovieResponse\"\x00\x30\x01\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x17movies_management.proto\x12\x11movies_management\"\x1f\n\x0fGetMovieRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\"]\n\x0f\x41\x64\x64MovieRequest\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x0e\n\x06\x61\x63tors\x18\x03 \x03(\t\x12\x10\n\x08\x64irector\x18\x04 \x01(\t\x12\x0e\n\x06rating\x18\x05 \x01(\x02\"o\n\x10\x41\x64\x64MovieResponse\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x0e\n\x06\x61\x63tors\x18\x03 \x03(\t\x12\x10\n\x08\x64irector\x18\x04 \x01(\t\x12\x0e\n\x06rating\x18\x05 \x01(\x02\x12\x0f\n\x07message\x18\x06 \x01(\t\"[\n\rMovieResponse\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x0e\n\x06\x61\x63tors\x18\x03 \x03(\t\x12\x10\n\x08\x64irector\x18\x04 \x01(\t\x12\x0e\n\x06rating\x18\x05 \x01(\x02\"%\n\x0fGetActorRequest\x12\x12\n\nactor_name\x18\x01 \x01(\t\"D\n\rActorResponse\x12\n\n\x02id\x18\x01 \x01(\t\x12\x12\n\nactor_name\x18\x02 \x01(\t\x12\x13\n\x0bmovie_names\x18\x03 \x03(\t\"2\n\x0cScoreRequest\x12\x12\n\nmovie_name\x18\x01 \x01(\t\x12\x0e\n\x06rating\x18\x02 \x01(\x02\"P\n\rScoreResponse\x12\n\n\x02id\x18\x01 \x01(\t\x12\x12\n\nmovie_name\x18\x02 \x01(\t\x12\x0e\n\x06rating\x18\x03 \x01(\x02\x12\x0f\n\x07message\x18\x04 \x01(\t\".\n\x1aGetMoviesByDirectorRequest\x12\x10\n\x08\x64irector\x18\x01 \x01(\t\"-\n\x17GetMoviesByActorRequest\x12\x12\n\nactor_name\x18\x01 \x01(\t\">\n\nMovieChunk\x12\x30\n\x06movies\x18\x01 \x03(\x0b\x32 .movies_management.MovieResponse\"J\n\x0e\x41\x64\x64MovieResult\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\r\n\x05\x61\x64\x64\x65\x64\x18\x03 \x01(\x08\x12\x0f\n\x07message\x18\x04 \x01(\t\"f\n\x11\x41\x64\x64MoviesResponse\x12\x32\n\x07results\x18\x01 \x03(\x0b\x32!.movies_management.AddMovieResult\x12\r\n\x05\x61\x64\x64\x65\x64\x18\x02 \x01(\x05\x12\x0e\n\x06\x66\x61iled\x18\x03 \x01(\x05\"&\n\x15\x42\x61tchGetMoviesRequest\x12\r\n\x05names\x18\x01 \x03(\t\"[\n\x16\x42\x61tchGetMoviesResponse\x12\x30\n\x06movies\x18\x01 \x03(\x0b\x32 .movies_management.MovieResponse\x12\x0f\n\x07missing\x18\x02 \x03(\t\",\n\x15\x42\x61tchGetActorsRequest\x12\x13\n\x0b\x61\x63tor_names\x18\x01 \x03(\t\"[\n\x16\x42\x61tchGetActorsResponse\x12\x30\n\x06\x61\x63tors\x18\x01 \x03(\x0b\x32 .movies_management.ActorResponse\x12\x0f\n\x07missing\x18\x02 \x03(\t\"H\n\x13SearchMoviesRequest\x12\r\n\x05query\x18\x01 \x01(\t\x12\r\n\x05limit\x18\x02 \x01(\x05\x12\x13\n\x0bprefix_only\x18\x03 \x01(\x08\"\xa3\x01\n\x0cSearchResult\x12\r\n\x05score\x18\x01 \x01(\x02\x12\x14\n\x0cmatched_name\x18\x02 \x01(\t\x12\x31\n\x05movie\x18\x03 \x01(\x0b\x32 .movies_management.MovieResponseH\x00\x12\x31\n\x05\x61\x63tor\x18\x04 \x01(\x0b\x32 .movies_management.ActorResponseH\x00\x42\x08\n\x06result\"\xd5\x01\n\x11ListMoviesRequest\x12\x10\n\x08\x64irector\x18\x01 \x01(\t\x12\r\n\x05\x61\x63tor\x18\x02 \x01(\t\x12\x17\n\nmin_rating\x18\x03 \x01(\x02H\x00\x88\x01\x01\x12\x17\n\nmax_rating\x18\x04 \x01(\x02H\x01\x88\x01\x01\x12,\n\x05order\x18\x05 \x01(\x0e\x32\x1d.movies_management.MovieOrder\x12\x11\n\tpage_size\x18\x06 \x01(\x05\x12\x0e\n\x06\x63ursor\x18\x07 \x01(\tB\r\n\x0b_min_ratingB\r\n\x0b_max_rating\"[\n\x12ListMoviesResponse\x12\x30\n\x06movies\x18\x01 \x03(\x0b\x32 .movies_management.MovieResponse\x12\x13\n\x0bnext_cursor\x18\x02 \x01(\t\"8\n\x15TopRatedMoviesRequest\x12\x10\n\x08\x64irector\x18\x01 \x01(\t\x12\r\n\x05limit\x18\x02 \x01(\x05*A\n\nMovieOrder\x12\x08\n\x04NAME\x10\x00\x12\r\n\tNAME_DESC\x10\x01\x12\n\n\x06RATING\x10\x02\x12\x0e\n\nRATING_ASC\x10\x03\x32\xfb\x08\n\rMoviesService\x12R\n\x08GetMovie\x12\".movies_management.GetMovieRequest\x1a .movies_management.MovieResponse\"\x00\x12R\n\x08GetActor\x12\".movies_management.GetActorRequest\x1a .movies_management.ActorResponse\"\x00\x12U\n\x08\x41\x64\x64Movie\x12\".movies_management.AddMovieRequest\x1a#.movies_management.AddMovieResponse\"\x00\x12S\n\x0c\x43hangeRating\x12\x1f.movies_management.ScoreRequest\x1a .movies_management.ScoreResponse\"\x00\x12j\n\x13GetMoviesByDirector\x12-.movies_management.GetMoviesByDirectorRequest\x1a .movies_management.MovieResponse\"\x00\x30\x01\x12\x61\n\x10GetMoviesByActor\x12*.movies_management.GetMoviesByActorRequest\x1a\x1d.movies_management.MovieChunk\"\x00\x30\x01\x12Y\n\tAddMovies\x12\".movies_management.AddMovieRequest\x1a$.movies_management.AddMoviesResponse\"\x00(\x01\x12g\n\x0e\x42\x61tchGetMovies\x12(.movies_management.BatchGetMoviesRequest\x1a).movies_management.BatchGetMoviesResponse\"\x00\x12g\n\x0e\x42\x61tchGetActors\x12(.movies_management.BatchGetActorsRequest\x1a).movies_management.BatchGetActorsResponse\"\x00\x12[\n\x0cSearchMovies\x12&.movies_management.SearchMoviesRequest\x1a\x1f.movies_management.SearchResult\"\x00\x30\x01\x12[\n\nListMovies\x12$.movies_management.ListMoviesRequest\x1a%.movies_management.ListMoviesResponse\"\x00\x12`\n\x0eTopRatedMovies\x12(.movies_management.TopRatedMoviesRequest\x1a .movies_management.MovieResponse\"\x00\x30\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'movies_management_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
+  _globals['_MOVIEORDER']._serialized_start=1841
+  _globals['_MOVIEORDER']._serialized_end=1906
   _globals['_GETMOVIEREQUEST']._serialized_start=46
   _globals['_GETMOVIEREQUEST']._serialized_end=77
   _globals['_ADDMOVIEREQUEST']._serialized_start=79
@@ -39,6 +41,32 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_SCORERESPONSE']._serialized_end=621
   _globals['_GETMOVIESBYDIRECTORREQUEST']._serialized_start=623
   _globals['_GETMOVIESBYDIRECTORREQUEST']._serialized_end=669
-  _globals['_MOVIESSERVICE']._serialized_start=672
-  _globals['_MOVIESSERVICE']._serialized_end=1135
+  _globals['_GETMOVIESBYACTORREQUEST']._serialized_start=671
+  _globals['_GETMOVIESBYACTORREQUEST']._serialized_end=716
+  _globals['_MOVIECHUNK']._serialized_start=718
+  _globals['_MOVIECHUNK']._serialized_end=780
+  _globals['_ADDMOVIERESULT']._serialized_start=782
+  _globals['_ADDMOVIERESULT']._serialized_end=856
+  _globals['_ADDMOVIESRESPONSE']._serialized_start=858
+  _globals['_ADDMOVIESRESPONSE']._serialized_end=960
+  _globals['_BATCHGETMOVIESREQUEST']._serialized_start=962
+  _globals['_BATCHGETMOVIESREQUEST']._serialized_end=1000
+  _globals['_BATCHGETMOVIESRESPONSE']._serialized_start=1002
+  _globals['_BATCHGETMOVIESRESPONSE']._serialized_end=1093
+  _globals['_BATCHGETACTORSREQUEST']._serialized_start=1095
+  _globals['_BATCHGETACTORSREQUEST']._serialized_end=1139
+  _globals['_BATCHGETACTORSRESPONSE']._serialized_start=1141
+  _globals['_BATCHGETACTORSRESPONSE']._serialized_end=1232
+  _globals['_SEARCHMOVIESREQUEST']._serialized_start=1234
+  _globals['_SEARCHMOVIESREQUEST']._serialized_end=1306
+  _globals['_SEARCHRESULT']._serialized_start=1309
+  _globals['_SEARCHRESULT']._serialized_end=1472
+  _globals['_LISTMOVIESREQUEST']._serialized_start=1475
+  _globals['_LISTMOVIESREQUEST']._serialized_end=1688
+  _globals['_LISTMOVIESRESPONSE']._serialized_start=1690
+  _globals['_LISTMOVIESRESPONSE']._serialized_end=1781
+  _globals['_TOPRATEDMOVIESREQUEST']._serialized_start=1783
+  _globals['_TOPRATEDMOVIESREQUEST']._serialized_end=1839
+  _globals['_MOVIESSERVICE']._serialized_start=1909
+  _globals['_MOVIESSERVICE']._serialized_end=3056
 # @@protoc_insertion_point(module_scope)
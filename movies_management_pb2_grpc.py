@@ -65,6 +65,41 @@ class MoviesServiceStub(object):
                 request_serializer=movies__management__pb2.GetMoviesByDirectorRequest.SerializeToString,
                 response_deserializer=movies__management__pb2.MovieResponse.FromString,
                 _registered_method=True)
+        self.GetMoviesByActor = channel.unary_stream(
+                '/movies_management.MoviesService/GetMoviesByActor',
+                request_serializer=movies__management__pb2.GetMoviesByActorRequest.SerializeToString,
+                response_deserializer=movies__management__pb2.MovieChunk.FromString,
+                _registered_method=True)
+        self.AddMovies = channel.stream_unary(
+                '/movies_management.MoviesService/AddMovies',
+                request_serializer=movies__management__pb2.AddMovieRequest.SerializeToString,
+                response_deserializer=movies__management__pb2.AddMoviesResponse.FromString,
+                _registered_method=True)
+        self.BatchGetMovies = channel.unary_unary(
+                '/movies_management.MoviesService/BatchGetMovies',
+                request_serializer=movies__management__pb2.BatchGetMoviesRequest.SerializeToString,
+                response_deserializer=movies__management__pb2.BatchGetMoviesResponse.FromString,
+                _registered_method=True)
+        self.BatchGetActors = channel.unary_unary(
+                '/movies_management.MoviesService/BatchGetActors',
+                request_serializer=movies__management__pb2.BatchGetActorsRequest.SerializeToString,
+                response_deserializer=movies__management__pb2.BatchGetActorsResponse.FromString,
+                _registered_method=True)
+        self.SearchMovies = channel.unary_stream(
+                '/movies_management.MoviesService/SearchMovies',
+                request_serializer=movies__management__pb2.SearchMoviesRequest.SerializeToString,
+                response_deserializer=movies__management__pb2.SearchResult.FromString,
+                _registered_method=True)
+        self.ListMovies = channel.unary_unary(
+                '/movies_management.MoviesService/ListMovies',
+                request_serializer=movies__management__pb2.ListMoviesRequest.SerializeToString,
+                response_deserializer=movies__management__pb2.ListMoviesResponse.FromString,
+                _registered_method=True)
+        self.TopRatedMovies = channel.unary_stream(
+                '/movies_management.MoviesService/TopRatedMovies',
+                request_serializer=movies__management__pb2.TopRatedMoviesRequest.SerializeToString,
+                response_deserializer=movies__management__pb2.MovieResponse.FromString,
+                _registered_method=True)
 
 
 class MoviesServiceServicer(object):
@@ -106,6 +141,55 @@ class MoviesServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetMoviesByActor(self, request, context):
+        """Streams the full details of every movie of an actor, in the order of their filmography, a chunk at a time
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def AddMovies(self, request_iterator, context):
+        """Adds a stream of movies in batches and returns the result for every movie
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BatchGetMovies(self, request, context):
+        """Retrieves several movies by name in one call
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BatchGetActors(self, request, context):
+        """Retrieves several actors by name in one call
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SearchMovies(self, request, context):
+        """Searches movie and actor names by prefix and with typo tolerance, streaming the best matches first
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ListMovies(self, request, context):
+        """Lists the movies matching the given filters one page at a time; each page carries the cursor of the next
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def TopRatedMovies(self, request, context):
+        """Streams the highest rated movies, of one director or of the whole catalog, best first
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_MoviesServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -134,6 +218,41 @@ def add_MoviesServiceServicer_to_server(servicer, server):
                     request_deserializer=movies__management__pb2.GetMoviesByDirectorRequest.FromString,
                     response_serializer=movies__management__pb2.MovieResponse.SerializeToString,
             ),
+            'GetMoviesByActor': grpc.unary_stream_rpc_method_handler(
+                    servicer.GetMoviesByActor,
+                    request_deserializer=movies__management__pb2.GetMoviesByActorRequest.FromString,
+                    response_serializer=movies__management__pb2.MovieChunk.SerializeToString,
+            ),
+            'AddMovies': grpc.stream_unary_rpc_method_handler(
+                    servicer.AddMovies,
+                    request_deserializer=movies__management__pb2.AddMovieRequest.FromString,
+                    response_serializer=movies__management__pb2.AddMoviesResponse.SerializeToString,
+            ),
+            'BatchGetMovies': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchGetMovies,
+                    request_deserializer=movies__management__pb2.BatchGetMoviesRequest.FromString,
+                    response_serializer=movies__management__pb2.BatchGetMoviesResponse.SerializeToString,
+            ),
+            'BatchGetActors': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchGetActors,
+                    request_deserializer=movies__management__pb2.BatchGetActorsRequest.FromString,
+                    response_serializer=movies__management__pb2.BatchGetActorsResponse.SerializeToString,
+            ),
+            'SearchMovies': grpc.unary_stream_rpc_method_handler(
+                    servicer.SearchMovies,
+                    request_deserializer=movies__management__pb2.SearchMoviesRequest.FromString,
+                    response_serializer=movies__management__pb2.SearchResult.SerializeToString,
+            ),
+            'ListMovies': grpc.unary_unary_rpc_method_handler(
+                    servicer.ListMovies,
+                    request_deserializer=movies__management__pb2.ListMoviesRequest.FromString,
+                    response_serializer=movies__management__pb2.ListMoviesResponse.SerializeToString,
+            ),
+            'TopRatedMovies': grpc.unary_stream_rpc_method_handler(
+                    servicer.TopRatedMovies,
+                    request_deserializer=movies__management__pb2.TopRatedMoviesRequest.FromString,
+                    response_serializer=movies__management__pb2.MovieResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'movies_management.MoviesService', rpc_method_handlers)
@@ -280,3 +399,192 @@ class MoviesService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def GetMoviesByActor(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/movies_management.MoviesService/GetMoviesByActor',
+            movies__management__pb2.GetMoviesByActorRequest.SerializeToString,
+            movies__management__pb2.MovieChunk.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def AddMovies(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/movies_management.MoviesService/AddMovies',
+            movies__management__pb2.AddMovieRequest.SerializeToString,
+            movies__management__pb2.AddMoviesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def BatchGetMovies(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/movies_management.MoviesService/BatchGetMovies',
+            movies__management__pb2.BatchGetMoviesRequest.SerializeToString,
+            movies__management__pb2.BatchGetMoviesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def BatchGetActors(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/movies_management.MoviesService/BatchGetActors',
+            movies__management__pb2.BatchGetActorsRequest.SerializeToString,
+            movies__management__pb2.BatchGetActorsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SearchMovies(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/movies_management.MoviesService/SearchMovies',
+            movies__management__pb2.SearchMoviesRequest.SerializeToString,
+            movies__management__pb2.SearchResult.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ListMovies(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/movies_management.MoviesService/ListMovies',
+            movies__management__pb2.ListMoviesRequest.SerializeToString,
+            movies__management__pb2.ListMoviesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def TopRatedMovies(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/movies_management.MoviesService/TopRatedMovies',
+            movies__management__pb2.TopRatedMoviesRequest.SerializeToString,
+            movies__management__pb2.MovieResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
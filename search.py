@@ -0,0 +1,198 @@
+import heapq
+import re
+from bisect import bisect_left
+import threading
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+"""
+Name search shared by the storage backends: prefix and typo-tolerant matching of
+movie and actor names, using word trigrams.
+
+A name is lowercased and split into words; every word is padded as '  word ' and
+cut into trigrams. A query matches by prefix when each of its words starts a
+word of the name, and fuzzily when enough of its trigrams are found in the name
+(similarity >= FUZZY_THRESHOLD).
+"""
+
+MOVIE = 'movie'
+ACTOR = 'actor'
+
+# Minimum share of the query's trigrams a fuzzy match must contain
+FUZZY_THRESHOLD = 0.5
+
+# Candidate sets this large are not intersected further: checking the shortest
+# candidates directly is cheaper than intersecting long posting lists
+MAX_INTERSECT_CANDIDATES = 5000
+
+# Trigrams found in more names than this are too common to help fuzzy matching
+# and are skipped, which bounds the work done per query
+MAX_FUZZY_POSTINGS = 20000
+
+_WORD = re.compile(r'\w+')
+_EMPTY = array('I')
+
+
+class SearchHit(NamedTuple):
+    kind: str
+    key: str
+    name: str
+    score: float
+
+
+def words(name: str) -> List[str]:
+    return _WORD.findall(name.lower())
+
+
+def trigrams(name_words: List[str], prefix: bool = False) -> Set[str]:
+    """
+    Returns the trigrams of a list of words. With prefix=True every word is taken
+    as possibly incomplete and its trailing trigram is left out.
+    """
+    grams = set()
+    end = '' if prefix else ' '
+    for word in name_words:
+        padded = '  ' + word + end
+        grams.update(padded[j:j + 3] for j in range(len(padded) - 2))
+    return grams
+
+
+def prefix_score(query_words: List[str], name_words: List[str]) -> Optional[float]:
+    """
+    Scores a prefix match between 1 and 2, shorter completions higher and an exact
+    match 2. Returns None if some query word does not start a word of the name.
+    """
+    for query_word in query_words:
+        if not any(word.startswith(query_word) for word in name_words):
+            return None
+    query_length = len(' '.join(query_words))
+    return 1 + query_length / max(len(' '.join(name_words)), query_length)
+
+
+def similarity(query_grams: Set[str], name: str) -> float:
+    """
+    Share of the query's trigrams found in the name, between 0 and 1
+    """
+    return len(query_grams & trigrams(words(name))) / len(query_grams)
+
+
+def rank(hits: Iterable[SearchHit], limit: int) -> List[SearchHit]:
+    """
+    Best `limit` hits, highest score first, then shortest name
+    """
+    return heapq.nsmallest(limit, hits, key=lambda hit: (-hit.score, len(hit.name), hit.name))
+
+
+class SearchIndex:
+    """
+    In-memory trigram index of names, maintained incrementally. Adding a name
+    takes a lock; searches don't.
+
+    Posting lists hold entry ids in increasing order, so a small candidate set is
+    intersected with a long list by binary search. Prefix queries intersect the
+    posting lists of the query's trigrams and then check the candidates, shortest
+    names first, stopping once `limit` matched: a longer name can't score higher.
+    Fuzzy queries count shared trigrams per name over the
+    posting lists, skipping the very common ones (MAX_FUZZY_POSTINGS).
+    """
+
+    def __init__(self):
+        self._entries: List[Tuple[str, str, str]] = []
+        # Per entry: ' ' + the name's words joined by spaces, and its length
+        self._normalized: List[str] = []
+        self._lengths = array('I')
+        self._postings: Dict[str, array] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, kind: str, key: str, name: str):
+        self.add_many([(kind, key, name)])
+
+    def add_many(self, entries: Iterable[Tuple[str, str, str]]):
+        """
+        Indexes (kind, key, name) entries; keys must be unique per kind
+        """
+        prepared = []
+        for entry in entries:
+            name_words = words(entry[2])
+            prepared.append((entry, ' ' + ' '.join(name_words), trigrams(name_words)))
+        with self._lock:
+            postings = self._postings
+            for entry, normalized, grams in prepared:
+                entry_id = len(self._entries)
+                self._normalized.append(normalized)
+                self._lengths.append(len(normalized))
+                for gram in grams:
+                    posting = postings.get(gram)
+                    if posting is None:
+                        posting = postings[gram] = array('I')
+                    posting.append(entry_id)
+                # Appended last: readers ignore ids they can't resolve yet
+                self._entries.append(entry)
+
+    def search(self, query: str, limit: int = 10, fuzzy: bool = True) -> List[SearchHit]:
+        query_words = words(query)
+        if not query_words:
+            return []
+        entries = self._entries
+        count = len(entries)
+
+        hits = {}
+        candidates = self._intersect(trigrams(query_words, prefix=True))
+        # Most candidates match, so checking a few times `limit` of the shortest is usually enough
+        shortest = heapq.nsmallest(limit * 4, candidates, key=self._lengths.__getitem__)
+        self._check_prefix(query_words, shortest, count, limit, hits)
+        if len(hits) < limit < len(candidates):
+            self._check_prefix(query_words, sorted(candidates, key=self._lengths.__getitem__), count, limit, hits)
+
+        if fuzzy and len(hits) < limit:
+            query_grams = trigrams(query_words)
+            shared = Counter()
+            for gram in query_grams:
+                posting = self._postings.get(gram)
+                if posting is not None and len(posting) <= MAX_FUZZY_POSTINGS:
+                    shared.update(posting)
+            for entry_id, shared_count in shared.items():
+                if entry_id < count and entry_id not in hits:
+                    score = shared_count / len(query_grams)
+                    if score >= FUZZY_THRESHOLD:
+                        hits[entry_id] = score
+
+        return rank((SearchHit(*entries[entry_id], score) for entry_id, score in hits.items()), limit)
+
+    def _intersect(self, grams: Set[str]) -> List[int]:
+        """
+        Ids of the entries having all of `grams`, or a superset of them if that is cheaper to check
+        """
+        postings = sorted((self._postings.get(gram, _EMPTY) for gram in grams), key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if not candidates or len(candidates) > MAX_INTERSECT_CANDIDATES:
+                break
+            if len(candidates) * 20 < len(posting):
+                length = len(posting)
+                candidates = [entry_id for entry_id in candidates
+                              if (i := bisect_left(posting, entry_id)) < length and posting[i] == entry_id]
+            else:
+                candidates = sorted(set(candidates).intersection(posting))
+        return candidates
+
+    def _check_prefix(self, query_words: List[str], entry_ids: Iterable[int], count: int, limit: int,
+                      hits: Dict[int, float]):
+        """
+        Scores the entries, in the given order, that match the query by prefix until `limit` did
+        """
+        starts = [' ' + word for word in query_words]
+        query_length = len(' '.join(query_words))
+        for entry_id in entry_ids:
+            if len(hits) == limit:
+                break
+            if entry_id >= count or entry_id in hits:
+                continue
+            normalized = self._normalized[entry_id]
+            if all(start in normalized for start in starts):
+                # Same as prefix_score, on the stored normalized name
+                hits[entry_id] = 1 + query_length / max(len(normalized) - 1, query_length)
@@ -1,4 +1,9 @@
 # Created by NaveenPiedy at 6/18/2024 6:32 AM
+import argparse
+import asyncio
+import base64
+import functools
+import json
 import pprint
 from concurrent import futures
 
@@ -7,88 +12,244 @@ import logging
 
 import movies_management_pb2
 import movies_management_pb2_grpc
-from db_mimic import movies_db, actors_db, Movie, Actor
-from interceptor import LoggingInterceptor
-from jwt_utils import verify_jwt
-
-from errors import NotFoundError, UnauthorizedError, InternalServerError, CustomError
+from cache import LRUCache
+from db_mimic import db, Movie
+from interceptor import AuthInterceptor, LoggingInterceptor, current_call
+from metrics import MetricsInterceptor, registry, start_metrics_server
+from sqlite_store import SQLiteMovieStore
+import trace_logging
+from trace_logging import sampled_call, trace
+
+from search import MOVIE
+from storage import BY_NAME, BY_RATING
+from errors import NotFoundError, UnauthorizedError, InternalServerError, InvalidArgumentError, CustomError
 
 VALID_API_KEY = "secret-api-key"
 
+# Number of streamed AddMovies requests applied to the database at once
+ADD_MOVIES_BATCH_SIZE = 500
+
+# Rejected movies an AddMovies response reports individually; the rest are only counted,
+# so the response of a bulk load stays far below the message size limit
+ADD_MOVIES_MAX_RESULTS = 1000
+
+# Results streamed by SearchMovies when the request sets no limit, and the most it may ask for
+DEFAULT_SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 100
+
+# Movies per MovieChunk streamed by GetMoviesByActor: one message per movie would make
+# gRPC's per-message cost dominate for actors with thousands of credits
+STREAM_CHUNK_SIZE = 100
+
+# Movies per ListMovies page when the request sets no page size, and the most it may ask for
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Movies streamed by TopRatedMovies when the request sets no limit; at most MAX_PAGE_SIZE
+DEFAULT_TOP_RATED = 10
+
+# ListMovies order -> storage order and whether it is descending
+LIST_ORDERS = {
+    movies_management_pb2.NAME: (BY_NAME, False),
+    movies_management_pb2.NAME_DESC: (BY_NAME, True),
+    movies_management_pb2.RATING: (BY_RATING, True),
+    movies_management_pb2.RATING_ASC: (BY_RATING, False),
+}
+
+# Handler threads of the thread-mode server, and the SQLite connections it needs
+MAX_WORKERS = 10
+
+# Number of pre-built GetMovie/GetActor responses kept per cache
+RESPONSE_CACHE_SIZE = 10000
+
+# Accept keepalive pings from idle clients (see client.MoviesClient) as often as every 10 seconds
+SERVER_OPTIONS = [
+    ('grpc.http2.min_ping_interval_without_data_ms', 10000),
+    ('grpc.keepalive_permit_without_calls', 1),
+]
+
+
+_BATCH_GET_MOVIES_FIELDS = movies_management_pb2.BatchGetMoviesResponse.DESCRIPTOR.fields_by_name
+BATCH_MOVIES_FIELD = _BATCH_GET_MOVIES_FIELDS['movies'].number
+BATCH_MISSING_FIELD = _BATCH_GET_MOVIES_FIELDS['missing'].number
+SEARCH_MOVIE_FIELD = movies_management_pb2.SearchResult.DESCRIPTOR.fields_by_name['movie'].number
+_LIST_MOVIES_FIELDS = movies_management_pb2.ListMoviesResponse.DESCRIPTOR.fields_by_name
+CHUNK_MOVIES_FIELD = movies_management_pb2.MovieChunk.DESCRIPTOR.fields_by_name['movies'].number
+LIST_MOVIES_FIELD = _LIST_MOVIES_FIELDS['movies'].number
+LIST_CURSOR_FIELD = _LIST_MOVIES_FIELDS['next_cursor'].number
+
+
+def encode_field(field_number, payload):
+    """
+    Encodes a length-delimited protobuf field (a string, bytes or embedded message),
+    so responses can be assembled from already-encoded messages
+    """
+    header = bytearray([field_number << 3 | 2])
+    length = len(payload)
+    while length > 0x7F:
+        header.append(length & 0x7F | 0x80)
+        length >>= 7
+    header.append(length)
+    return bytes(header) + payload
+
+
+def encode_cursor(order, position):
+    """
+    Builds the opaque ListMovies cursor: the order of the listing and the store's position in it
+    """
+    return base64.urlsafe_b64encode(json.dumps([order, position]).encode()).decode()
+
+
+def decode_cursor(cursor, order):
+    """
+    Returns the store position of a cursor built by encode_cursor for the same order:
+    [name] for the name orders, [rating, name] for the rating orders
+    """
+    try:
+        cursor_order, position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise InvalidArgumentError("Invalid cursor")
+    if cursor_order != order:
+        raise InvalidArgumentError("The cursor belongs to a listing in another order")
+    types = ((int, float), str) if LIST_ORDERS[order][0] == BY_RATING else (str,)
+    if not (isinstance(position, list) and len(position) == len(types) and
+            all(isinstance(value, kind) and not isinstance(value, bool) for value, kind in zip(position, types))):
+        raise InvalidArgumentError("Invalid cursor")
+    return position
+
+
+def serialize_response(response):
+    """
+    Response serializer that sends already-encoded responses as they are
+    """
+    if isinstance(response, bytes):
+        return response
+    return response.SerializeToString()
+
+
+def add_movies_service_to_server(servicer, server):
+    """
+    Registers the servicer like movies_management_pb2_grpc.add_MoviesServiceServicer_to_server, but with
+    serialize_response so handlers can return pre-encoded bytes
+    """
+    service = movies_management_pb2.DESCRIPTOR.services_by_name['MoviesService']
+    handler_types = {
+        (False, False): grpc.unary_unary_rpc_method_handler,
+        (False, True): grpc.unary_stream_rpc_method_handler,
+        (True, False): grpc.stream_unary_rpc_method_handler,
+        (True, True): grpc.stream_stream_rpc_method_handler,
+    }
+    rpc_method_handlers = {}
+    for method in service.methods:
+        handler_type = handler_types[(method.client_streaming, method.server_streaming)]
+        rpc_method_handlers[method.name] = handler_type(
+            getattr(servicer, method.name),
+            request_deserializer=getattr(movies_management_pb2, method.input_type.name).FromString,
+            response_serializer=serialize_response,
+        )
+    generic_handler = grpc.method_handlers_generic_handler(service.full_name, rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers(service.full_name, rpc_method_handlers)
+
 
 class MoviesService(movies_management_pb2_grpc.MoviesServiceServicer):
 
+    def __init__(self, response_cache_size=RESPONSE_CACHE_SIZE, store=None):
+        # Any storage.MovieStorage; the in-memory db_mimic.db by default
+        self.store = store if store is not None else db
+        # Pre-built actor responses keyed by sanitized name, invalidated by the write handlers.
+        # Movie responses don't need a cache: the store keeps every movie pre-serialized.
+        # A shared store is written by other processes too, so nothing is cached for it.
+        self.actor_responses = LRUCache(maxsize=0 if self.store.shared else response_cache_size)
+
     @staticmethod
     def get_metadata(context):
         """
-        Returns metadata of the request
+        Returns metadata of the request, as already parsed by the AuthInterceptor
         """
+        call = current_call.get(None)
+        if call is not None:
+            return call.metadata
         return dict(context.invocation_metadata())
 
     @staticmethod
-    def validate_jwt(metadata, context):
-        token = metadata.get('authorization')
-        trace_id = metadata.get('trace-id')
+    def get_user_id():
+        """
+        Returns the user_id verified by the AuthInterceptor for the current call
+        """
+        call = current_call.get(None)
+        return call.user_id if call is not None else None
+
+    @staticmethod
+    def log_trace(metadata, message, *args):
+        """
+        Logs trace message, formatted with `args` only when written. Only calls the
+        LoggingInterceptor sampled log anything (see trace_logging).
+        """
+        method = sampled_call.get()
+        if method is not None:
+            trace(metadata.get('trace-id', 'unknown'), method, message, *args)
 
-        if not token:
-            context.set_code(grpc.StatusCode.UNAUTHENTICATED)
-            context.set_details("Missing JWT")
-            logging.warning(f"Missing JWT for trace ID: {trace_id}")
-            return None
+    @staticmethod
+    def log_error(metadata, message, *args):
+        """
+        Logs a failed call with the exception being handled, whether or not the call
+        was sampled for tracing
+        """
+        logging.exception('Trace ID: %s - ' + message, metadata.get('trace-id', 'unknown'), *args)
 
-        user_id = verify_jwt(token)
-        if not user_id:
-            context.set_code(grpc.StatusCode.UNAUTHENTICATED)
-            context.set_details("Invalid or expired JWT")
-            logging.warning(f"Invalid or expired JWT for trace ID: {trace_id}")
-            return None
+    def cache_stats(self):
+        """
+        Returns the hit/miss counters of the response caches
+        """
+        return {'actors': self.actor_responses.stats()}
 
-        return user_id
+    def actor_response(self, actor_name):
+        """
+        Returns the ActorResponse for an actor, from the cache when possible, or None if they don't exist
+        """
+        key = actor_name.lower()
+        version = self.actor_responses.version
+        response = self.actor_responses.get(key)
+        if response is None:
+            result_actor = self.store.get_actor(key)
+            if result_actor is None:
+                return None
+            response = movies_management_pb2.ActorResponse(
+                id=result_actor.id,
+                actor_name=result_actor.actor_name,
+                movie_names=result_actor.movie_names
+            )
+            self.actor_responses.put(key, response, version=version)
+        return response
 
-    @staticmethod
-    def log_trace(metadata, message):
+    def invalidate_movies(self, movies):
         """
-        Logs trace message
+        Drops the cached responses of the actors of the given movies
         """
-        trace_id = metadata.get('trace-id', 'unknown')
-        logging.info(f"Trace ID: {trace_id} - {message}")
+        self.actor_responses.invalidate_many([actor.lower() for movie in movies for actor in movie.actors])
 
     def GetMovie(self, request, context):
         """
         Get movie details from database.
         """
         metadata = self.get_metadata(context)
-        self.log_trace(metadata, f"Received request for movie: {request.name}")
+        self.log_trace(metadata, "Received request for movie: %s", request.name)
 
         try:
-            self.validate_jwt(metadata, context)
-        except CustomError as e:
-            context.set_code(e.code)
-            context.set_details(e.message)
-            return movies_management_pb2.MovieResponse()
-
-        try:
-            movie_name = request.name
-            sanitized_movie_name = movie_name.lower()
-            if sanitized_movie_name in movies_db:
-                result_movie = movies_db.get(sanitized_movie_name)
-                return movies_management_pb2.MovieResponse(
-                    id=result_movie.id,
-                    name=result_movie.name,
-                    actors=result_movie.actors,
-                    director=result_movie.director,
-                    rating=result_movie.rating
-                )
+            response = self.store.get_movie_bytes(request.name)
+            if response is not None:
+                return response
             else:
                 # Movie not in database
-                self.log_trace(metadata, f"Movie '{request.name}' not found")
+                self.log_trace(metadata, "Movie '%s' not found", request.name)
                 raise NotFoundError(f"Movie '{request.name}' not found")
         except CustomError as e:
             context.set_code(e.code)
             context.set_details(e.message)
             return movies_management_pb2.MovieResponse()
         except Exception as e:
-            self.log_trace(metadata, f"Error while getting movie: {e}")
+            self.log_error(metadata, "Error while getting movie: %s", e)
             return movies_management_pb2.MovieResponse()
 
     def GetActor(self, request, context):
@@ -96,35 +257,22 @@ class MoviesService(movies_management_pb2_grpc.MoviesServiceServicer):
         Returns Actor details
         """
         metadata = self.get_metadata(context)
-        self.log_trace(metadata, f"Received request for actor: {request.actor_name}")
+        self.log_trace(metadata, "Received request for actor: %s", request.actor_name)
 
         try:
-            self.validate_jwt(metadata, context)
-        except CustomError as e:
-            context.set_code(e.code)
-            context.set_details(e.message)
-            return movies_management_pb2.ActorResponse()
-
-        try:
-            actor_name = request.actor_name
-            sanitized_actor_name = actor_name.lower()
-            if sanitized_actor_name in actors_db:
-                result_actor = actors_db.get(sanitized_actor_name)
-                return movies_management_pb2.ActorResponse(
-                    id=result_actor.id,
-                    actor_name=result_actor.actor_name,
-                    movie_names=result_actor.movie_names
-                )
+            response = self.actor_response(request.actor_name)
+            if response is not None:
+                return response
             else:
                 context.set_code(grpc.StatusCode.NOT_FOUND)
                 context.set_details('Actor not in system')
-                return movies_management_pb2.ActorResponse
+                return movies_management_pb2.ActorResponse()
         except CustomError as e:
             context.set_code(e.code)
             context.set_details(e.message)
             return movies_management_pb2.ActorResponse()
         except Exception as e:
-            self.log_trace(metadata, f"Error while getting actor: {e}")
+            self.log_error(metadata, "Error while getting actor: %s", e)
             raise InternalServerError() from e
 
     def AddMovie(self, request, context):
@@ -132,46 +280,24 @@ class MoviesService(movies_management_pb2_grpc.MoviesServiceServicer):
         Add a new movie to database
         """
         metadata = self.get_metadata(context)
-        self.log_trace(metadata, f"Received request to add movie: {request.name}")
-
-        try:
-            self.validate_jwt(metadata, context)
-        except CustomError as e:
-            context.set_code(e.code)
-            context.set_details(e.message)
-            return movies_management_pb2.MovieResponse()
+        self.log_trace(metadata, "Received request to add movie: %s by user: %s", request.name,
+                       self.get_user_id())
 
         try:
             id = request.id
             movie_name = request.name
-            actor_names = request.actors
+            actor_names = list(request.actors)
             director = request.director
             rating = request.rating
 
             movie = Movie(id, movie_name, actor_names, director, rating)
 
             # If movie already exists, don't add a duplicate
-            if movie_name.lower() in movies_db:
+            if not self.store.add_movie(movie):
                 context.set_code(grpc.StatusCode.ALREADY_EXISTS)
                 context.set_details("Movie Already exists")
                 return movies_management_pb2.AddMovieResponse()
-
-            movies_db[movie_name.lower()] = movie
-
-            # Get the last actor to be added and increment the id
-            last_actor = list(actors_db.keys())[-1]
-            last_actor_id = int(actors_db.get(last_actor).id)
-
-            for actor in actor_names:
-                if actor.lower() in actors_db:
-                    actor_details = actors_db.get(actor.lower())
-                    if movie not in actor_details.movie_names:
-                        actor_movies = actor_details.movie_names
-                        actor_movies.append(movie_name)
-                        actors_db[actor] = Actor(actor_details.id, actor_details.actor_name, actor_movies)
-                else:
-                    last_actor_id += 1
-                    actors_db[actor.lower()] = Actor(id=str(last_actor_id), actor_name=actor, movie_names=[movie_name])
+            self.invalidate_movies([movie])
 
             return movies_management_pb2.AddMovieResponse(
                 id=movie.id,
@@ -186,7 +312,7 @@ class MoviesService(movies_management_pb2_grpc.MoviesServiceServicer):
             context.set_details(e.message)
             return movies_management_pb2.AddMovieResponse()
         except Exception as e:
-            self.log_trace(metadata, f"Error while adding Movie: {e}")
+            self.log_error(metadata, "Error while adding Movie: %s", e)
             raise InternalServerError() from e
 
     def ChangeRating(self, request, context):
@@ -194,25 +320,16 @@ class MoviesService(movies_management_pb2_grpc.MoviesServiceServicer):
         Change the rating for a movie
         """
         metadata = self.get_metadata(context)
-        self.log_trace(metadata, f"Received request to change rating for movie: {request.movie_name}")
-
-        try:
-            self.validate_jwt(metadata, context)
-        except CustomError as e:
-            context.set_code(e.code)
-            context.set_details(e.message)
-            return movies_management_pb2.ScoreReponse()
+        self.log_trace(metadata, "Received request to change rating for movie: %s by user: %s",
+                       request.movie_name, self.get_user_id())
 
         try:
             movie_name = request.movie_name
             rating = request.rating
-            sanitized_movie_name = movie_name.lower()
+            changed = self.store.change_rating(movie_name, rating)
 
-            if sanitized_movie_name in movies_db:
-                result_movie = movies_db.get(sanitized_movie_name)
-                old_rating = result_movie.rating
-                result_movie.rating = rating
-                movies_db[sanitized_movie_name] = result_movie
+            if changed is not None:
+                old_rating, result_movie = changed
                 return movies_management_pb2.ScoreResponse(
                     id=result_movie.id,
                     movie_name=result_movie.name,
@@ -229,7 +346,7 @@ class MoviesService(movies_management_pb2_grpc.MoviesServiceServicer):
             context.set_details(e.message)
             return movies_management_pb2.ScoreResponse()
         except Exception as e:
-            self.log_trace(metadata, f"Error while changing rating: {e}")
+            self.log_error(metadata, "Error while changing rating: %s", e)
             raise InternalServerError() from e
 
 
@@ -238,46 +355,341 @@ class MoviesService(movies_management_pb2_grpc.MoviesServiceServicer):
         Get movies by director and stream the response
         """
         metadata = self.get_metadata(context)
-        self.log_trace(metadata, f"Received request for movies by director: {request.director}")
+        self.log_trace(metadata, "Received request for movies by director: %s", request.director)
 
         try:
-            self.validate_jwt(metadata, context)
+            director_name = request.director
+            for movie_bytes in self.store.get_movie_bytes_by_director(director_name):
+                yield movie_bytes
         except CustomError as e:
             context.set_code(e.code)
             context.set_details(e.message)
             return
+        except Exception as e:
+            self.log_error(metadata, "Error while streaming movies: %s", e)
+            raise InternalServerError() from e
+
+    def GetMoviesByActor(self, request, context):
+        """
+        Get the movies of an actor, with their details, and stream the response
+        """
+        metadata = self.get_metadata(context)
+        self.log_trace(metadata, "Received request for movies by actor: %s", request.actor_name)
 
         try:
-            director_name = request.director
-            for movie in movies_db.values():
-                if movie.director == director_name:
-                    yield movies_management_pb2.MovieResponse(
-                        id=movie.id,
-                        name=movie.name,
-                        actors=movie.actors,
-                        director=movie.director,
-                        rating=movie.rating
-                    )
+            movies = self.store.get_movie_bytes_by_actor(request.actor_name)
+            for first in range(0, len(movies), STREAM_CHUNK_SIZE):
+                # Built straight from the stored MovieResponse bytes, see encode_field
+                yield b''.join(encode_field(CHUNK_MOVIES_FIELD, movie_bytes)
+                               for movie_bytes in movies[first:first + STREAM_CHUNK_SIZE])
         except CustomError as e:
             context.set_code(e.code)
             context.set_details(e.message)
             return
         except Exception as e:
-            self.log_trace(metadata, f"Error while streaming movies: {e}")
+            self.log_error(metadata, "Error while streaming movies: %s", e)
             raise InternalServerError() from e
 
+    def SearchMovies(self, request, context):
+        """
+        Search movie and actor names and stream the best matches first
+        """
+        metadata = self.get_metadata(context)
+        self.log_trace(metadata, "Received search for: %s", request.query)
 
-def serve():
-    logging.basicConfig(level=logging.INFO)
+        try:
+            limit = min(request.limit or DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT)
+            if limit < 0:
+                raise InvalidArgumentError("limit must not be negative")
+            for hit in self.store.search(request.query, limit, fuzzy=not request.prefix_only):
+                if hit.kind == MOVIE:
+                    movie_bytes = self.store.get_movie_bytes(hit.key)
+                    if movie_bytes is not None:
+                        # The stored MovieResponse is appended as the `movie` field, see encode_field
+                        header = movies_management_pb2.SearchResult(score=hit.score, matched_name=hit.name)
+                        yield header.SerializeToString() + encode_field(SEARCH_MOVIE_FIELD, movie_bytes)
+                else:
+                    actor = self.actor_response(hit.key)
+                    if actor is not None:
+                        yield movies_management_pb2.SearchResult(score=hit.score, matched_name=hit.name, actor=actor)
+        except CustomError as e:
+            context.set_code(e.code)
+            context.set_details(e.message)
+            return
+        except Exception as e:
+            self.log_error(metadata, "Error while searching: %s", e)
+            raise InternalServerError() from e
+
+    def ListMovies(self, request, context):
+        """
+        List one page of the movies matching the request's filters
+        """
+        metadata = self.get_metadata(context)
+        self.log_trace(metadata, "Received request to list movies, director: %r, actor: %r, cursor: %r",
+                       request.director, request.actor, request.cursor)
+
+        try:
+            page_size = min(request.page_size or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+            if page_size < 0:
+                raise InvalidArgumentError("page_size must not be negative")
+            if request.order not in LIST_ORDERS:
+                raise InvalidArgumentError(f"Unknown order {request.order}")
+            order, descending = LIST_ORDERS[request.order]
+            movies, position = self.store.list_movies(
+                director=request.director or None,
+                actor=request.actor or None,
+                min_rating=request.min_rating if request.HasField('min_rating') else None,
+                max_rating=request.max_rating if request.HasField('max_rating') else None,
+                order=order,
+                descending=descending,
+                limit=page_size,
+                after=decode_cursor(request.cursor, request.order) if request.cursor else None)
+            # Built straight from the stored MovieResponse bytes, see encode_field
+            response = [encode_field(LIST_MOVIES_FIELD, movie_bytes) for movie_bytes in movies]
+            if position is not None:
+                response.append(encode_field(LIST_CURSOR_FIELD, encode_cursor(request.order, position).encode()))
+            return b''.join(response)
+        except CustomError as e:
+            context.set_code(e.code)
+            context.set_details(e.message)
+            return movies_management_pb2.ListMoviesResponse()
+        except Exception as e:
+            self.log_error(metadata, "Error while listing movies: %s", e)
+            raise InternalServerError() from e
+
+    def TopRatedMovies(self, request, context):
+        """
+        Stream the highest rated movies, read from the rating index
+        """
+        metadata = self.get_metadata(context)
+        self.log_trace(metadata, "Received request for top rated movies, director: %r", request.director)
+
+        try:
+            limit = min(request.limit or DEFAULT_TOP_RATED, MAX_PAGE_SIZE)
+            if limit < 0:
+                raise InvalidArgumentError("limit must not be negative")
+            movies, _ = self.store.list_movies(director=request.director or None, order=BY_RATING,
+                                               descending=True, limit=limit)
+            for movie_bytes in movies:
+                yield movie_bytes
+        except CustomError as e:
+            context.set_code(e.code)
+            context.set_details(e.message)
+            return
+        except Exception as e:
+            self.log_error(metadata, "Error while streaming top rated movies: %s", e)
+            raise InternalServerError() from e
+
+    def AddMovies(self, request_iterator, context):
+        """
+        Add a stream of movies to database, applied in batches
+        """
+        metadata = self.get_metadata(context)
+        self.log_trace(metadata, "Received request to add a stream of movies by user: %s", self.get_user_id())
+
+        try:
+            response = movies_management_pb2.AddMoviesResponse()
+            batch = []
+            for request in request_iterator:
+                batch.append(request)
+                if len(batch) == ADD_MOVIES_BATCH_SIZE:
+                    self.add_batch(batch, response)
+                    batch = []
+            if batch:
+                self.add_batch(batch, response)
+
+            self.log_trace(metadata, "Added %s movies, %s failed", response.added, response.failed)
+            return response
+        except CustomError as e:
+            context.set_code(e.code)
+            context.set_details(e.message)
+            return movies_management_pb2.AddMoviesResponse()
+        except Exception as e:
+            self.log_error(metadata, "Error while adding Movies: %s", e)
+            raise InternalServerError() from e
+
+    def add_batch(self, requests, response):
+        """
+        Stores a batch of AddMovieRequests and counts them on the response, recording
+        the results of the first ADD_MOVIES_MAX_RESULTS rejected movies
+        """
+        batch = [Movie(request.id, request.name, list(request.actors), request.director, request.rating)
+                 for request in requests]
+        results = self.store.add_movies(batch)
+        self.invalidate_movies([movie for movie, added in zip(batch, results) if added])
+        for movie, added in zip(batch, results):
+            if added:
+                response.added += 1
+                continue
+            response.failed += 1
+            if len(response.results) < ADD_MOVIES_MAX_RESULTS:
+                response.results.add(id=movie.id, name=movie.name, added=False, message="Movie Already exists")
+
+    def BatchGetMovies(self, request, context):
+        """
+        Get several movies from database, authenticating once for the batch
+        """
+        metadata = self.get_metadata(context)
+        self.log_trace(metadata, "Received request for %s movies", len(request.names))
+
+        try:
+            # Built straight from the stored MovieResponse bytes, see encode_field
+            movies = []
+            missing = []
+            for movie_name in request.names:
+                movie_bytes = self.store.get_movie_bytes(movie_name)
+                if movie_bytes is not None:
+                    movies.append(encode_field(BATCH_MOVIES_FIELD, movie_bytes))
+                else:
+                    missing.append(encode_field(BATCH_MISSING_FIELD, movie_name.encode()))
+            return b''.join(movies + missing)
+        except CustomError as e:
+            context.set_code(e.code)
+            context.set_details(e.message)
+            return movies_management_pb2.BatchGetMoviesResponse()
+        except Exception as e:
+            self.log_error(metadata, "Error while getting movies: %s", e)
+            raise InternalServerError() from e
+
+    def BatchGetActors(self, request, context):
+        """
+        Get several actors from database, authenticating once for the batch
+        """
+        metadata = self.get_metadata(context)
+        self.log_trace(metadata, "Received request for %s actors", len(request.actor_names))
+
+        try:
+            response = movies_management_pb2.BatchGetActorsResponse()
+            for actor_name in request.actor_names:
+                actor_response = self.actor_response(actor_name)
+                if actor_response is not None:
+                    response.actors.append(actor_response)
+                else:
+                    response.missing.append(actor_name)
+            return response
+        except CustomError as e:
+            context.set_code(e.code)
+            context.set_details(e.message)
+            return movies_management_pb2.BatchGetActorsResponse()
+        except Exception as e:
+            self.log_error(metadata, "Error while getting actors: %s", e)
+            raise InternalServerError() from e
+
+
+def create_server(address='[::]:50051', options=None, store=None, metrics=registry):
+    """
+    Builds the server with the service and interceptors registered, without starting it.
+    `store` is the storage.MovieStorage to serve, db_mimic.db by default.
+    Calls are recorded in the metrics.Metrics `metrics`, or not at all with None.
+    Returns the server and the port it is bound to.
+    """
+    interceptors = (AuthInterceptor(), LoggingInterceptor())  # Add the interceptors here
+    if metrics is not None:
+        interceptors = (MetricsInterceptor(metrics),) + interceptors
     server = grpc.server(
-        futures.ThreadPoolExecutor(max_workers=10),
-        interceptors=(LoggingInterceptor(),)  # Add the interceptor here
+        futures.ThreadPoolExecutor(max_workers=MAX_WORKERS),
+        interceptors=interceptors,
+        options=SERVER_OPTIONS + list(options or [])
     )
-    movies_management_pb2_grpc.add_MoviesServiceServicer_to_server(MoviesService(), server)
-    server.add_insecure_port('[::]:50051')
+    add_movies_service_to_server(MoviesService(store=store), server)
+    port = server.add_insecure_port(address)
+    return server, port
+
+
+def serve(address='[::]:50051', store=None):
+    logging.basicConfig(level=logging.INFO)
+    server, _ = create_server(address, store=store)
     server.start()
     server.wait_for_termination()
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Movies Management gRPC server")
+    parser.add_argument('--mode', choices=('thread', 'aio'), default='thread',
+                        help="thread: ThreadPoolExecutor server, aio: grpc.aio asyncio server")
+    parser.add_argument('--address', default='[::]:50051')
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of server processes sharing the port with SO_REUSEPORT, 0 for one per core")
+    parser.add_argument('--storage', choices=('memory', 'sqlite'), default='memory',
+                        help="memory: in-process db_mimic store, sqlite: SQLite database shared by all workers")
+    parser.add_argument('--sqlite-path', default='movies.db')
+    parser.add_argument('--snapshot',
+                        help="start from this snapshot file, memory-mapped and decoded lazily")
+    parser.add_argument('--data-dir',
+                        help="persist the store in this directory (write-ahead log + snapshots) and restore it on start")
+    parser.add_argument('--sync-every', type=int, default=1,
+                        help="fsync the write-ahead log every N writes, 0 to only sync on --sync-interval")
+    parser.add_argument('--sync-interval', type=float, default=None,
+                        help="also fsync the write-ahead log every this many seconds")
+    parser.add_argument('--snapshot-every', type=int, default=100_000,
+                        help="write a compacted snapshot every N logged writes")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="serve Prometheus metrics at http://<host>:PORT/metrics")
+    parser.add_argument('--log-format', choices=('text', 'json'), default='text',
+                        help="json: one JSON object per log line, with the trace ID and method of trace messages")
+    parser.add_argument('--trace-sample', type=float, default=1.0,
+                        help="share of calls whose trace messages are logged, 0 to disable trace logging")
+    parser.add_argument('--trace-sample-method', action='append', default=[], metavar='METHOD=RATE',
+                        help="trace sample rate of one method, e.g. GetMovie=0.01; may be repeated")
+    parser.add_argument('--trace-limit', type=float, default=None,
+                        help="log the trace messages of at most this many calls per method per second")
+    args = parser.parse_args()
+
+    method_rates = {}
+    for option in args.trace_sample_method:
+        method, _, rate = option.partition('=')
+        try:
+            method_rates[method] = float(rate)
+        except ValueError:
+            parser.error(f"--trace-sample-method expects METHOD=RATE, got {option!r}")
+    args.log_options = dict(log_format=args.log_format, rate=args.trace_sample, method_rates=method_rates,
+                            per_second=args.trace_limit)
+
+    if args.metrics_port is not None and args.workers != 1:
+        parser.error("--metrics-port needs a single worker, the metrics are per process")
+
+    store_factory = None
+    if args.storage == 'sqlite':
+        if args.snapshot or args.data_dir:
+            parser.error("--snapshot and --data-dir only apply to --storage memory")
+        store_factory = functools.partial(SQLiteMovieStore, args.sqlite_path, MAX_WORKERS)
+
+    if args.data_dir:
+        if args.workers != 1:
+            parser.error("--data-dir needs a single worker, the store is per process")
+        if args.snapshot:
+            parser.error("--data-dir restores from its own snapshot, drop --snapshot")
+        db.enable_persistence(args.data_dir, sync_every=args.sync_every, sync_interval=args.sync_interval,
+                              snapshot_every=args.snapshot_every)
+
+    try:
+        run(args, store_factory)
+    finally:
+        db.close()
+        trace_logging.shutdown()
+
+
+def run(args, store_factory=None):
+    trace_logging.configure(**args.log_options)
+    if args.workers != 1:
+        from supervisor import Supervisor
+        Supervisor(args.address, args.workers, args.mode, args.snapshot, store_factory, args.log_options).run()
+        return
+
+    if args.snapshot:
+        db.load_snapshot(args.snapshot)
+    if args.metrics_port is not None:
+        start_metrics_server(args.metrics_port)
+    store = store_factory() if store_factory is not None else db
+    try:
+        if args.mode == 'aio':
+            import aio_server
+            asyncio.run(aio_server.serve(args.address, store))
+        else:
+            serve(args.address, store)
+    finally:
+        store.close()
+
+
 if __name__ == '__main__':
-    serve()
+    main()
@@ -0,0 +1,155 @@
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from typing import BinaryIO, Iterable, Iterator, Optional, Tuple
+
+"""
+Memory-mapped snapshot of a MovieStore: the movies, actors and the director index,
+each stored as an on-disk hash table that is looked up in place. Nothing is decoded
+at load time; the store decodes a record the first time it is accessed.
+
+Layout (little-endian, sections 8-byte aligned):
+    header   MAGIC, wal_seq, max_actor_id, then per table:
+             record count, slot count, entries offset, slots offset
+    records  per record: u32 key length, u32 value length, key, value
+    entries  per table: u64 record offset, indexed by record number
+    slots    per table: u32 record number + 1 (0 = empty), open addressing on crc32(key)
+
+Movie values are encoded MovieResponses, so they can be sent as they are; actor
+values are encoded ActorResponses; director values are the sanitized names of the
+director's movies joined by NUL.
+"""
+
+MAGIC = b'MVSNAP01'
+TABLES = ('movies', 'actors', 'directors')
+
+_HEADER = struct.Struct('<8sqq' + 'QQQQ' * len(TABLES))
+_RECORD = struct.Struct('<II')
+
+
+def _fsync_directory(directory: str):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _pad(file: BinaryIO):
+    padding = -file.tell() % 8
+    if padding:
+        file.write(b'\0' * padding)
+
+
+def _slot_count(records: int) -> int:
+    slots = 8
+    while slots < records * 2:
+        slots *= 2
+    return slots
+
+
+def write_mapped_snapshot(path: str, tables: Iterable[Iterable[Tuple[bytes, bytes]]],
+                          wal_seq: int = 0, max_actor_id: int = 0):
+    """
+    Writes the (key, value) records of the movies, actors and directors tables, in
+    that order. Keys must be unique within a table. The file is replaced atomically.
+    """
+    tmp_path = path + '.tmp'
+    table_headers = []
+    with open(tmp_path, 'wb') as file:
+        file.write(b'\0' * _HEADER.size)
+        _pad(file)
+
+        for records in tables:
+            offsets = array('Q')
+            hashes = array('I')
+            for key, value in records:
+                offsets.append(file.tell())
+                hashes.append(zlib.crc32(key))
+                file.write(_RECORD.pack(len(key), len(value)))
+                file.write(key)
+                file.write(value)
+
+            slot_count = _slot_count(len(offsets))
+            mask = slot_count - 1
+            slots = array('I', bytes(4 * slot_count))
+            for record, key_hash in enumerate(hashes, 1):
+                slot = key_hash & mask
+                while slots[slot]:
+                    slot = (slot + 1) & mask
+                slots[slot] = record
+
+            _pad(file)
+            entries_offset = file.tell()
+            offsets.tofile(file)
+            slots_offset = file.tell()
+            slots.tofile(file)
+            _pad(file)
+            table_headers += [len(offsets), slot_count, entries_offset, slots_offset]
+
+        file.seek(0)
+        file.write(_HEADER.pack(MAGIC, wal_seq, max_actor_id, *table_headers))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+    _fsync_directory(os.path.dirname(os.path.abspath(path)))
+
+
+class _Table:
+    """
+    One hash table of a MappedSnapshot
+    """
+
+    def __init__(self, data: memoryview, count: int, slot_count: int, entries_offset: int, slots_offset: int):
+        self._data = data
+        self.count = count
+        self._mask = slot_count - 1
+        self._entries = data[entries_offset:entries_offset + 8 * count].cast('Q')
+        self._slots = data[slots_offset:slots_offset + 4 * slot_count].cast('I')
+
+    def _record(self, number: int) -> Tuple[memoryview, memoryview]:
+        offset = self._entries[number]
+        key_length, value_length = _RECORD.unpack_from(self._data, offset)
+        key_start = offset + _RECORD.size
+        value_start = key_start + key_length
+        return self._data[key_start:value_start], self._data[value_start:value_start + value_length]
+
+    def get(self, key: bytes) -> Optional[memoryview]:
+        slot = zlib.crc32(key) & self._mask
+        while True:
+            number = self._slots[slot]
+            if not number:
+                return None
+            record_key, value = self._record(number - 1)
+            if record_key == key:
+                return value
+            slot = (slot + 1) & self._mask
+
+    def __contains__(self, key: bytes) -> bool:
+        return self.get(key) is not None
+
+    def items(self) -> Iterator[Tuple[memoryview, memoryview]]:
+        for number in range(self.count):
+            yield self._record(number)
+
+
+class MappedSnapshot:
+    """
+    Read-only view of a snapshot file. The file is mapped, not read: pages are
+    loaded by the OS as records are looked up and are shared between processes
+    that map the same file.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        data = memoryview(self._mmap)
+        header = _HEADER.unpack_from(data)
+        if header[0] != MAGIC:
+            raise ValueError(f"{path} is not a movie store snapshot")
+        self.wal_seq = header[1]
+        self.max_actor_id = header[2]
+        self.movies, self.actors, self.directors = (
+            _Table(data, *header[3 + 4 * i:7 + 4 * i]) for i in range(len(TABLES)))
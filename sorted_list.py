@@ -0,0 +1,189 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Iterable, List, Optional
+
+"""
+Sorted container used by the secondary indexes of the in-memory store. Items
+are kept in sorted runs of at most 2 * LOAD items, so adding or removing one
+moves at most that many references, and finding a position is a binary search
+over the runs' maxima and then within one run, whatever the size of the list.
+"""
+
+# Items per run after a split; runs are split when they grow past twice this
+LOAD = 500
+
+
+class SortedList:
+    """
+    List of comparable items kept in sorted order; duplicates are allowed.
+
+    Thread-safe: every method takes the lock, and page() holds it for at most
+    `limit` items, so a reader paging deep into the list never blocks writers
+    for longer than a shallow one does.
+    """
+
+    def __init__(self, items: Iterable = (), load: int = LOAD):
+        self._load = load
+        self._runs: List[list] = []
+        self._maxes: list = []
+        self._length = 0
+        self._lock = threading.Lock()
+        self.update(items)
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        with self._lock:
+            runs = [list(run) for run in self._runs]
+        for run in runs:
+            yield from run
+
+    def add(self, item):
+        with self._lock:
+            self._add(item)
+
+    def _add(self, item):
+        runs, maxes = self._runs, self._maxes
+        if not runs:
+            runs.append([item])
+            maxes.append(item)
+        else:
+            i = bisect_right(maxes, item)
+            if i == len(runs):
+                i -= 1
+                runs[i].append(item)
+                maxes[i] = item
+            else:
+                insort(runs[i], item)
+            run = runs[i]
+            if len(run) > 2 * self._load:
+                half = self._load
+                runs[i:i + 1] = [run[:half], run[half:]]
+                maxes[i:i + 1] = [run[half - 1], run[-1]]
+        self._length += 1
+
+    def update(self, items: Iterable):
+        """
+        Adds many items. A batch larger than the list rebuilds the runs from one sort
+        instead of inserting item by item.
+        """
+        items = sorted(items)
+        if not items:
+            return
+        with self._lock:
+            if len(items) < self._length:
+                for item in items:
+                    self._add(item)
+                return
+            for run in self._runs:
+                items.extend(run)
+            items.sort()
+            load = self._load
+            self._runs = [items[i:i + load] for i in range(0, len(items), load)]
+            self._maxes = [run[-1] for run in self._runs]
+            self._length = len(items)
+
+    def remove(self, item):
+        """
+        Removes one occurrence of `item`; raises ValueError if there is none
+        """
+        with self._lock:
+            runs, maxes = self._runs, self._maxes
+            i = bisect_left(maxes, item)
+            if i < len(runs):
+                run = runs[i]
+                j = bisect_left(run, item)
+                if j < len(run) and run[j] == item:
+                    del run[j]
+                    if run:
+                        maxes[i] = run[-1]
+                    else:
+                        del runs[i]
+                        del maxes[i]
+                    self._length -= 1
+                    return
+            raise ValueError(f'{item!r} not in list')
+
+    def add_missing(self, items: Iterable) -> list:
+        """
+        Adds, set-like, the items that are not in the list yet and returns them
+        """
+        added = []
+        with self._lock:
+            for item in items:
+                if not self._contains(item):
+                    self._add(item)
+                    added.append(item)
+        return added
+
+    def __contains__(self, item):
+        with self._lock:
+            return self._contains(item)
+
+    def _contains(self, item) -> bool:
+        i = bisect_left(self._maxes, item)
+        if i == len(self._runs):
+            return False
+        run = self._runs[i]
+        j = bisect_left(run, item)
+        return j < len(run) and run[j] == item
+
+    def page(self, limit: int, after: Any = None, low: Any = None, high: Any = None,
+             reverse: bool = False) -> list:
+        """
+        Returns up to `limit` items x with low <= x < high, in ascending order, or
+        descending with reverse=True, starting after `after` in that order. Bounds
+        that are None are open. Takes O(log n + limit).
+        """
+        with self._lock:
+            if not self._runs:
+                return []
+            if reverse:
+                i, j = min([self._position(bound, bisect_left) for bound in (after, high) if bound is not None],
+                           default=(len(self._runs), 0))
+                return self._backward(i, j, limit, low)
+            positions = [(0, 0)]
+            if after is not None:
+                positions.append(self._position(after, bisect_right))
+            if low is not None:
+                positions.append(self._position(low, bisect_left))
+            i, j = max(positions)
+            return self._forward(i, j, limit, high)
+
+    def _position(self, item, bisect):
+        """
+        Run and offset of the first item >= `item` (bisect_left) or > `item` (bisect_right)
+        """
+        i = bisect(self._maxes, item)
+        if i == len(self._runs):
+            return i, 0
+        return i, bisect(self._runs[i], item)
+
+    def _forward(self, i: int, j: int, limit: int, high: Optional[Any]) -> list:
+        result = []
+        runs = self._runs
+        while i < len(runs) and len(result) < limit:
+            for item in runs[i][j:j + limit - len(result)]:
+                if high is not None and item >= high:
+                    return result
+                result.append(item)
+            i, j = i + 1, 0
+        return result
+
+    def _backward(self, i: int, j: int, limit: int, low: Optional[Any]) -> list:
+        """
+        Items before the position (i, j), last first
+        """
+        result = []
+        runs = self._runs
+        if i == len(runs):
+            i, j = i - 1, len(runs[-1])
+        while i >= 0 and len(result) < limit:
+            for item in reversed(runs[i][max(0, j - (limit - len(result))):j]):
+                if low is not None and item < low:
+                    return result
+                result.append(item)
+            i -= 1
+            j = len(runs[i]) if i >= 0 else 0
+        return result
@@ -0,0 +1,299 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+from db_mimic import Actor, Movie, decode_movie, encode_movie
+from search import ACTOR, MOVIE, FUZZY_THRESHOLD, SearchHit, prefix_score, rank, similarity, trigrams, words
+from storage import BY_RATING, BY_NAME, MovieStorage
+
+"""
+SQLite storage backend. Unlike the in-memory MovieStore, the catalog is not
+limited by RAM and several server processes can share one database file.
+"""
+
+# Rows fetched from the name index per search, before ranking
+SEARCH_CANDIDATES = 500
+
+# Compiled statements kept per connection. Every query below is a constant, and the
+# list_movies queries only vary by the filters set and the order, so they are all reused.
+STATEMENT_CACHE_SIZE = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS movies (
+    seq INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    director TEXT NOT NULL,
+    rating REAL NOT NULL,
+    encoded BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS movies_director ON movies (director);
+CREATE INDEX IF NOT EXISTS movies_director_key ON movies (director, key);
+CREATE INDEX IF NOT EXISTS movies_rating ON movies (rating, key);
+CREATE INDEX IF NOT EXISTS movies_director_rating ON movies (director, rating, key);
+CREATE TABLE IF NOT EXISTS actors (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS movie_actors (
+    actor_key TEXT NOT NULL,
+    movie_seq INTEGER NOT NULL,
+    PRIMARY KEY (actor_key, movie_seq)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS names USING fts5 (name, kind UNINDEXED, key UNINDEXED, tokenize = 'trigram');
+"""
+
+SELECT_MOVIE = "SELECT encoded FROM movies WHERE key = ?"
+SELECT_MOVIES_BY_DIRECTOR = "SELECT rating, encoded FROM movies WHERE director = ? ORDER BY seq"
+SELECT_ACTOR = "SELECT id, name FROM actors WHERE key = ?"
+SELECT_FILMOGRAPHY = """
+SELECT movies.name FROM movie_actors JOIN movies ON movies.seq = movie_actors.movie_seq
+WHERE movie_actors.actor_key = ? ORDER BY movie_actors.movie_seq
+"""
+SELECT_MOVIES_BY_ACTOR = """
+SELECT movies.encoded FROM movie_actors JOIN movies ON movies.seq = movie_actors.movie_seq
+WHERE movie_actors.actor_key = ? ORDER BY movie_actors.movie_seq
+"""
+COUNT_MOVIES = "SELECT count(*) FROM movies"
+COUNT_ACTORS = "SELECT count(*) FROM actors"
+SELECT_RATING = "SELECT rating, encoded FROM movies WHERE key = ?"
+INSERT_MOVIE = "INSERT OR IGNORE INTO movies (key, name, director, rating, encoded) VALUES (?, ?, ?, ?, ?)"
+INSERT_ACTOR = "INSERT OR IGNORE INTO actors (key, name) VALUES (?, ?)"
+INSERT_MOVIE_ACTOR = "INSERT OR IGNORE INTO movie_actors (actor_key, movie_seq) VALUES (?, ?)"
+INSERT_NAME = "INSERT INTO names (name, kind, key) VALUES (?, ?, ?)"
+SEARCH_SUBSTRING = "SELECT kind, key, name FROM names WHERE name LIKE ? ORDER BY length(name) LIMIT ?"
+SEARCH_TRIGRAMS = "SELECT kind, key, name FROM names WHERE names MATCH ? ORDER BY rank LIMIT ?"
+SEARCH_MOVIE_KEYS = "SELECT key, name FROM movies WHERE key >= ? AND key < ? ORDER BY length(key) LIMIT ?"
+SEARCH_ACTOR_KEYS = "SELECT key, name FROM actors WHERE key >= ? AND key < ? ORDER BY length(key) LIMIT ?"
+UPDATE_RATING = "UPDATE movies SET rating = ?, encoded = ? WHERE key = ?"
+LIST_MOVIES = "SELECT {columns}, encoded FROM movies WHERE {conditions} ORDER BY {ordering} LIMIT ?"
+LIST_ACTOR_CONDITION = "seq IN (SELECT movie_seq FROM movie_actors WHERE actor_key = ?)"
+
+
+class ConnectionPool:
+    """
+    A fixed number of connections shared by the calling threads. A thread holds a
+    connection for one operation; size it to the server's executor so no handler
+    thread ever waits for one.
+    """
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self._connections = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._size = size
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit: reads need no transaction, writes open theirs explicitly
+        connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False,
+                                     cached_statements=STATEMENT_CACHE_SIZE, timeout=30)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+
+    @contextmanager
+    def connection(self):
+        try:
+            connection = self._connections.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self._size
+                if create:
+                    self._created += 1
+            connection = self._connect() if create else self._connections.get()
+        try:
+            yield connection
+        finally:
+            self._connections.put(connection)
+
+    def close(self):
+        while True:
+            try:
+                self._connections.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class SQLiteMovieStore(MovieStorage):
+    """
+    MovieStorage backed by an SQLite database, with indexes on movie name,
+    director and actor. Movies are stored as their encoded MovieResponse, so reads
+    return the bytes as they are. Writes are batched into one transaction per call.
+
+    Names are searched through an FTS5 trigram index; candidates are then scored
+    with the same functions as the in-memory SearchIndex.
+
+    The database may be written by other processes, such as the other workers of a
+    multi-process server.
+    """
+
+    shared = True
+    blocking = True
+
+    def __init__(self, path: str, pool_size: int = 10):
+        self._pool = ConnectionPool(path, pool_size)
+        with self._pool.connection() as connection:
+            connection.executescript(SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        with self._pool.connection() as connection:
+            # IMMEDIATE takes the write lock up front, so read-modify-write is atomic
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def get_movie(self, name: str) -> Optional[Movie]:
+        with self._pool.connection() as connection:
+            row = connection.execute(SELECT_RATING, (name.lower(),)).fetchone()
+        # The encoded rating is a float32, the column keeps the rating as it was given
+        return decode_movie(row[1]).with_rating(row[0]) if row is not None else None
+
+    def get_movie_bytes(self, name: str) -> Optional[bytes]:
+        with self._pool.connection() as connection:
+            row = connection.execute(SELECT_MOVIE, (name.lower(),)).fetchone()
+        return row[0] if row is not None else None
+
+    def get_actor(self, name: str) -> Optional[Actor]:
+        key = name.lower()
+        with self._pool.connection() as connection:
+            row = connection.execute(SELECT_ACTOR, (key,)).fetchone()
+            if row is None:
+                return None
+            movies = [movie_name for movie_name, in connection.execute(SELECT_FILMOGRAPHY, (key,))]
+        return Actor(str(row[0]), row[1], movies)
+
+    def get_movies_by_director(self, director: str) -> List[Movie]:
+        with self._pool.connection() as connection:
+            return [decode_movie(data).with_rating(rating)
+                    for rating, data in connection.execute(SELECT_MOVIES_BY_DIRECTOR, (director,))]
+
+    def get_movie_bytes_by_director(self, director: str) -> List[bytes]:
+        with self._pool.connection() as connection:
+            return [data for _, data in connection.execute(SELECT_MOVIES_BY_DIRECTOR, (director,))]
+
+    def get_movie_bytes_by_actor(self, name: str) -> List[bytes]:
+        with self._pool.connection() as connection:
+            return [data for data, in connection.execute(SELECT_MOVIES_BY_ACTOR, (name.lower(),))]
+
+    def movie_count(self) -> int:
+        with self._pool.connection() as connection:
+            return connection.execute(COUNT_MOVIES).fetchone()[0]
+
+    def actor_count(self) -> int:
+        with self._pool.connection() as connection:
+            return connection.execute(COUNT_ACTORS).fetchone()[0]
+
+    def add_movies(self, movies: List[Movie]) -> List[bool]:
+        added = []
+        with self._transaction() as connection:
+            for movie in movies:
+                cursor = connection.execute(INSERT_MOVIE, (movie.name.lower(), movie.name, movie.director,
+                                                           movie.rating, encode_movie(movie)))
+                if not cursor.rowcount:
+                    added.append(False)
+                    continue
+                added.append(True)
+                movie_seq = cursor.lastrowid
+                connection.execute(INSERT_NAME, (movie.name, MOVIE, movie.name.lower()))
+                actors = {}
+                for actor in movie.actors:
+                    actors.setdefault(actor.lower(), actor)
+                for key, actor in actors.items():
+                    if connection.execute(INSERT_ACTOR, (key, actor)).rowcount:
+                        connection.execute(INSERT_NAME, (actor, ACTOR, key))
+                connection.executemany(INSERT_MOVIE_ACTOR, ((key, movie_seq) for key in actors))
+        return added
+
+    def change_rating(self, name: str, rating: float) -> Optional[Tuple[float, Movie]]:
+        key = name.lower()
+        with self._transaction() as connection:
+            row = connection.execute(SELECT_RATING, (key,)).fetchone()
+            if row is None:
+                return None
+            old_rating, data = row
+            updated = decode_movie(data).with_rating(rating)
+            connection.execute(UPDATE_RATING, (rating, encode_movie(updated), key))
+        return old_rating, updated
+
+    def list_movies(self, director: Optional[str] = None, actor: Optional[str] = None,
+                    min_rating: Optional[float] = None, max_rating: Optional[float] = None,
+                    order: str = BY_NAME, descending: bool = False, limit: int = 50,
+                    after: Optional[list] = None) -> Tuple[List[bytes], Optional[list]]:
+        """
+        Keyset pagination: the page starts with a seek on the key, (rating, key) or
+        director-prefixed index, or the actor's rows of movie_actors, instead of
+        skipping over the previous pages
+        """
+        columns = 'rating, key' if order == BY_RATING else 'key'
+        # Resuming by rating, the index scan must start at the cursor: a unary + keeps
+        # SQLite from starting it at the rating bound on that side instead
+        resumed = bool(after) and order == BY_RATING
+        conditions = []
+        parameters = []
+        for condition, value in (("director = ?", director),
+                                 (LIST_ACTOR_CONDITION, actor.lower() if actor is not None else None),
+                                 ("+rating >= ?" if resumed and not descending else "rating >= ?", min_rating),
+                                 ("+rating <= ?" if resumed and descending else "rating <= ?", max_rating)):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+        if after:
+            # A row value comparison, which SQLite serves from the index
+            conditions.append(f"({columns}) {'<' if descending else '>'} ({', '.join('?' * len(after))})")
+            parameters.extend(after)
+        direction = ' DESC' if descending else ''
+        query = LIST_MOVIES.format(columns=columns, conditions=' AND '.join(conditions) or '1',
+                                   ordering=', '.join(column + direction for column in columns.split(', ')))
+        with self._pool.connection() as connection:
+            # One row past the page tells whether there is a next one
+            rows = connection.execute(query, parameters + [limit + 1]).fetchall()
+        if len(rows) > limit:
+            return [row[-1] for row in rows[:limit]], list(rows[limit - 1][:-1])
+        return [row[-1] for row in rows], None
+
+    def search(self, query: str, limit: int = 10, fuzzy: bool = True) -> List[SearchHit]:
+        query_words = words(query)
+        if not query_words:
+            return []
+
+        hits = {}
+        with self._pool.connection() as connection:
+            longest = max(query_words, key=len)
+            if len(longest) >= 3:
+                # The trigram index serves LIKE patterns of 3+ characters. A '_' in the
+                # word matches any character, which is fine: candidates are checked below.
+                rows = connection.execute(SEARCH_SUBSTRING, ('%' + longest + '%', SEARCH_CANDIDATES))
+            else:
+                # Too short for the trigram index: match the start of the name through the key indexes
+                prefix = ' '.join(query_words)
+                key_range = (prefix, prefix + '\uffff', SEARCH_CANDIDATES)
+                rows = [(MOVIE, key, name) for key, name in connection.execute(SEARCH_MOVIE_KEYS, key_range)]
+                rows += [(ACTOR, key, name) for key, name in connection.execute(SEARCH_ACTOR_KEYS, key_range)]
+            for kind, key, name in rows:
+                score = prefix_score(query_words, words(name))
+                if score is not None:
+                    hits[kind, key] = SearchHit(kind, key, name, score)
+
+            # The FTS trigrams are cut from the plain name, which has no double spaces
+            grams = [gram for gram in trigrams(query_words) if '  ' not in gram]
+            if fuzzy and len(hits) < limit and grams:
+                query_grams = trigrams(query_words)
+                match = ' OR '.join('"' + gram.replace('"', '""') + '"' for gram in grams)
+                for kind, key, name in connection.execute(SEARCH_TRIGRAMS, (match, SEARCH_CANDIDATES)):
+                    if (kind, key) not in hits:
+                        score = similarity(query_grams, name)
+                        if score >= FUZZY_THRESHOLD:
+                            hits[kind, key] = SearchHit(kind, key, name, score)
+        return rank(hits.values(), limit)
+
+    def close(self):
+        self._pool.close()
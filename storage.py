@@ -0,0 +1,115 @@
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from db_mimic import Actor, Movie
+    from search import SearchHit
+
+"""
+The storage interface MoviesService depends on. db_mimic.MovieStore keeps the
+catalog in memory; sqlite_store.SQLiteMovieStore keeps it in an SQLite database.
+"""
+
+# Orders of list_movies
+BY_NAME = 'name'
+BY_RATING = 'rating'
+
+
+class MovieStorage(ABC):
+    """
+    A catalog of movies and actors.
+
+    Movie and actor names are looked up case-insensitively; directors are matched
+    exactly. Implementations must be safe to call from many threads at once.
+    """
+
+    # Whether other processes may write to the same catalog. Responses built from
+    # a shared store can't be cached: its writes don't invalidate them.
+    shared = False
+
+    # Whether calls may wait on I/O, such as a database or a log on disk. The aio
+    # server runs the calls of blocking stores in threads, off its event loop.
+    blocking = False
+
+    @abstractmethod
+    def get_movie(self, name: str) -> Optional['Movie']:
+        ...
+
+    @abstractmethod
+    def get_movie_bytes(self, name: str) -> Optional[bytes]:
+        """
+        Returns the encoded MovieResponse of a movie
+        """
+
+    @abstractmethod
+    def get_actor(self, name: str) -> Optional['Actor']:
+        ...
+
+    @abstractmethod
+    def get_movies_by_director(self, director: str) -> List['Movie']:
+        ...
+
+    @abstractmethod
+    def get_movie_bytes_by_director(self, director: str) -> List[bytes]:
+        """
+        Returns the encoded MovieResponses of a director's movies, in the order they were added
+        """
+
+    @abstractmethod
+    def get_movie_bytes_by_actor(self, name: str) -> List[bytes]:
+        """
+        Returns the encoded MovieResponses of an actor's movies, in the order of their filmography
+        """
+
+    @abstractmethod
+    def movie_count(self) -> int:
+        ...
+
+    @abstractmethod
+    def actor_count(self) -> int:
+        ...
+
+    def add_movie(self, movie: 'Movie') -> bool:
+        """
+        Stores a movie, registers it with its actors and director.
+        Returns False if a movie with the same name already exists.
+        """
+        return self.add_movies([movie])[0]
+
+    @abstractmethod
+    def add_movies(self, movies: List['Movie']) -> List[bool]:
+        """
+        Stores a batch of movies. Returns, per movie, whether it was added.
+        """
+
+    @abstractmethod
+    def change_rating(self, name: str, rating: float) -> Optional[Tuple[float, 'Movie']]:
+        """
+        Updates the rating of a movie. Returns the old rating and the updated movie,
+        or None if the movie does not exist.
+        """
+
+    @abstractmethod
+    def list_movies(self, director: Optional[str] = None, actor: Optional[str] = None,
+                    min_rating: Optional[float] = None, max_rating: Optional[float] = None,
+                    order: str = BY_NAME, descending: bool = False, limit: int = 50,
+                    after: Optional[list] = None) -> Tuple[List[bytes], Optional[list]]:
+        """
+        Returns the encoded MovieResponses of up to `limit` movies matching every
+        given filter, ordered by name or by rating (BY_NAME, BY_RATING; movies with
+        the same rating by name), and the position of the last one. Passing that
+        position back as `after` resumes the listing right after it; it is None
+        when there is nothing left. Positions are JSON-serializable lists.
+        """
+
+    @abstractmethod
+    def search(self, query: str, limit: int = 10, fuzzy: bool = True) -> List['SearchHit']:
+        """
+        Searches movie and actor names (see search.py). Returns at most `limit`
+        hits, best first; with fuzzy=False only prefix matches.
+        """
+
+    def close(self):
+        """
+        Releases the resources held by the store
+        """
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import multiprocessing
+import signal
+import time
+
+# Let every worker bind the same port; the kernel spreads new connections across them
+REUSE_PORT_OPTIONS = [('grpc.so_reuseport', 1)]
+
+# Seconds in-flight RPCs get to finish when a worker is asked to stop
+SHUTDOWN_GRACE = 5
+
+
+def _run_thread_worker(address, store):
+    import server
+
+    grpc_server, _ = server.create_server(address, options=REUSE_PORT_OPTIONS, store=store)
+    grpc_server.start()
+    signal.signal(signal.SIGTERM, lambda *_: grpc_server.stop(SHUTDOWN_GRACE))
+    grpc_server.wait_for_termination()
+
+
+async def _run_aio_worker(address, store):
+    import aio_server
+
+    grpc_server, _ = aio_server.create_server(address, options=REUSE_PORT_OPTIONS, store=store)
+    await grpc_server.start()
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGTERM, lambda: asyncio.ensure_future(grpc_server.stop(SHUTDOWN_GRACE)))
+    await grpc_server.wait_for_termination()
+
+
+def _worker_main(address, mode, snapshot=None, store_factory=None, log_options=None):
+    import trace_logging
+
+    trace_logging.configure(**(log_options or {}))
+    if snapshot:
+        from db_mimic import db
+        db.load_snapshot(snapshot)
+    store = store_factory() if store_factory is not None else None
+    # Ctrl+C goes to the whole process group; leave shutdown to the supervisor
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        if mode == 'aio':
+            asyncio.run(_run_aio_worker(address, store))
+        else:
+            _run_thread_worker(address, store)
+    finally:
+        trace_logging.shutdown()
+
+
+class Supervisor:
+    """
+    Runs N server processes that all bind the same address with SO_REUSEPORT.
+
+    Each worker imports db_mimic itself, so the catalog is replicated per process:
+    writes made through one worker are not visible to the others. Workers that die
+    are restarted; SIGTERM/SIGINT stop all workers gracefully.
+
+    With `snapshot`, every worker maps the same snapshot file, so the catalog is
+    loaded instantly and its pages are shared between the workers.
+
+    `store_factory` is a picklable callable (e.g. a functools.partial of
+    SQLiteMovieStore) each worker calls to open the storage.MovieStorage it serves;
+    with a shared database, writes through one worker are seen by all of them.
+
+    `log_options` are the trace_logging.configure() arguments of the workers.
+    """
+
+    def __init__(self, address='[::]:50051', workers=None, mode='thread', snapshot=None, store_factory=None,
+                 log_options=None):
+        self.address = address
+        self.workers = workers or multiprocessing.cpu_count()
+        self.mode = mode
+        self.snapshot = snapshot
+        self.store_factory = store_factory
+        self.log_options = log_options
+        # spawn, not fork: gRPC's core does not survive being forked once initialised
+        self._context = multiprocessing.get_context('spawn')
+        self._processes = []
+        self._stopping = False
+
+    def _start_worker(self):
+        process = self._context.Process(
+            target=_worker_main, args=(self.address, self.mode, self.snapshot, self.store_factory, self.log_options),
+            daemon=True)
+        process.start()
+        logging.info("Started worker pid %s", process.pid)
+        return process
+
+    def stop(self, *_):
+        self._stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        self._processes = [self._start_worker() for _ in range(self.workers)]
+        while not self._stopping:
+            for i, process in enumerate(self._processes):
+                if not process.is_alive() and not self._stopping:
+                    logging.warning("Worker pid %s exited with %s, restarting", process.pid, process.exitcode)
+                    self._processes[i] = self._start_worker()
+            time.sleep(0.5)
+
+        logging.info("Stopping workers")
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self._processes:
+            process.join(SHUTDOWN_GRACE + 1)
+            if process.is_alive():
+                process.kill()
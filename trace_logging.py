@@ -0,0 +1,163 @@
+import contextvars
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+"""
+Trace logging of the servers. Handlers only log during the calls the
+LoggingInterceptor samples, records are formatted lazily, and handlers write
+from a background thread, so a call that logs pays for little more than
+putting a record on a queue.
+"""
+
+# Logger of the per-call trace messages
+logger = logging.getLogger('movies.trace')
+
+# Set, for the duration of a call picked by the trace sampler, to its method name
+sampled_call = contextvars.ContextVar('sampled_call', default=None)
+
+# Records the background handler may hold before new ones are dropped
+QUEUE_SIZE = 10_000
+
+TEXT_FORMAT = '%(levelname)s:%(name)s:%(message)s'
+
+
+class TraceSampler:
+    """
+    Picks the calls whose trace messages are logged: a `rate` share of all calls,
+    overridden per method by `method_rates` (keyed by short or full method name),
+    and at most `per_second` calls per method each second if set.
+    """
+
+    def __init__(self, rate: float = 1.0, method_rates: Optional[Dict[str, float]] = None,
+                 per_second: Optional[float] = None):
+        self.configure(rate, method_rates, per_second)
+
+    def configure(self, rate: float = 1.0, method_rates: Optional[Dict[str, float]] = None,
+                  per_second: Optional[float] = None):
+        self.rate = rate
+        self.method_rates = dict(method_rates or {})
+        self.per_second = per_second
+        # Method -> [tokens, time of the last refill] of its rate limit
+        self._buckets: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def sample(self, method: str) -> bool:
+        rate = self.method_rates.get(method)
+        if rate is None:
+            rate = self.method_rates.get(method.rpartition('/')[2], self.rate)
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return False
+        if self.per_second is None:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(method)
+            if bucket is None:
+                bucket = self._buckets[method] = [self.per_second, now]
+            bucket[0] = min(self.per_second, bucket[0] + (now - bucket[1]) * self.per_second)
+            bucket[1] = now
+            if bucket[0] < 1:
+                return False
+            bucket[0] -= 1
+            return True
+
+
+# Sampler of the LoggingInterceptors; every call is traced until configure() says otherwise
+sampler = TraceSampler()
+
+
+def trace(trace_id: str, method: str, message: str, *args):
+    """
+    Logs a trace message, formatted with `args` only once a handler writes it
+    """
+    logger.info('Trace ID: %s - ' + message, trace_id, *args, extra={'trace_id': trace_id, 'method': method})
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line, with the trace ID and method of trace messages
+    """
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in ('trace_id', 'method'):
+            if field in record.__dict__:
+                entry[field] = record.__dict__[field]
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class BackgroundHandler(QueueHandler):
+    """
+    Hands records to a QueueListener thread unformatted. The stock QueueHandler
+    formats every record on the logging thread before queueing it; this one leaves
+    that to the listener.
+
+    The queue is a SimpleQueue, an order of magnitude cheaper to put to than a
+    bounded queue.Queue; records that find QUEUE_SIZE others waiting are dropped
+    and counted instead.
+    """
+
+    def __init__(self, record_queue: queue.SimpleQueue):
+        super().__init__(record_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        if self.queue.qsize() >= QUEUE_SIZE:
+            self.dropped += 1
+        else:
+            self.queue.put_nowait(record)
+
+
+_listener: Optional[QueueListener] = None
+
+
+def configure(log_format: str = 'text', level: int = logging.INFO, rate: float = 1.0,
+              method_rates: Optional[Dict[str, float]] = None, per_second: Optional[float] = None,
+              background: bool = True, stream=None):
+    """
+    Sets up the root logger of a server process: `log_format` 'text' or 'json'
+    lines to `stream` (stderr by default), written from a background thread unless
+    background=False, and the trace sampler (see TraceSampler). Replaces any
+    previous configuration.
+    """
+    global _listener
+    shutdown()
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter() if log_format == 'json' else logging.Formatter(TEXT_FORMAT))
+    if background:
+        _listener = QueueListener(queue.SimpleQueue(), handler)
+        _listener.start()
+        handler = BackgroundHandler(_listener.queue)
+    root = logging.getLogger()
+    for previous in root.handlers[:]:
+        root.removeHandler(previous)
+    root.addHandler(handler)
+    root.setLevel(level)
+    sampler.configure(rate, method_rates, per_second)
+
+
+def shutdown():
+    """
+    Writes the queued records and stops the background thread, if any
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
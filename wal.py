@@ -0,0 +1,116 @@
+import json
+import os
+import threading
+from typing import Iterator, List, Optional
+
+"""
+Durability for the MovieStore: an append-only write-ahead log split into numbered
+segments. A snapshot (see snapshot.py) records the first log segment that is not
+folded into it; recovery maps the snapshot and replays the segments from there on.
+"""
+
+
+def _segment_name(seq: int) -> str:
+    return f'wal-{seq:08d}.log'
+
+
+class WriteAheadLog:
+    """
+    Append-only log of JSON records.
+
+    sync_every controls the durability/throughput trade-off: the log is flushed and
+    fsynced after every `sync_every` records, so 1 makes every write durable before
+    it is acknowledged and larger values batch the fsyncs. 0 leaves syncing to
+    `sync_interval`, a period in seconds for a background sync thread, and to close().
+    Records that were not synced yet are lost if the machine crashes.
+    """
+
+    def __init__(self, directory: str, sync_every: int = 1, sync_interval: Optional[float] = None):
+        self.directory = directory
+        self.sync_every = sync_every
+        os.makedirs(directory, exist_ok=True)
+
+        segments = self.segments()
+        self.seq = segments[-1] if segments else 0
+        self._file = open(os.path.join(directory, _segment_name(self.seq)), 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        # Records appended since the last rotation, used to decide when to snapshot
+        self.appended = 0
+
+        self._closed = threading.Event()
+        if sync_interval:
+            thread = threading.Thread(target=self._sync_periodically, args=(sync_interval,), daemon=True)
+            thread.start()
+
+    def segments(self) -> List[int]:
+        """
+        Returns the sequence numbers of the log segments on disk, oldest first
+        """
+        return sorted(int(name[4:-4]) for name in os.listdir(self.directory)
+                      if name.startswith('wal-') and name.endswith('.log'))
+
+    def append(self, record: dict):
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self.appended += 1
+            self._unsynced += 1
+            if self.sync_every and self._unsynced >= self.sync_every:
+                self._sync_locked()
+
+    def sync(self):
+        with self._lock:
+            self._sync_locked()
+
+    def _sync_locked(self):
+        if self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def _sync_periodically(self, interval: float):
+        while not self._closed.wait(interval):
+            self.sync()
+
+    def rotate(self) -> int:
+        """
+        Syncs and closes the current segment and starts a new one. Returns the new sequence number.
+        """
+        with self._lock:
+            self._sync_locked()
+            self._file.close()
+            self.seq += 1
+            self._file = open(os.path.join(self.directory, _segment_name(self.seq)), 'a', encoding='utf-8')
+            self.appended = 0
+            return self.seq
+
+    def remove_segments_before(self, seq: int):
+        for old_seq in self.segments():
+            if old_seq < seq:
+                os.remove(os.path.join(self.directory, _segment_name(old_seq)))
+
+    def close(self):
+        self._closed.set()
+        with self._lock:
+            self._sync_locked()
+            self._file.close()
+
+
+def read_records(directory: str, from_seq: int = 0) -> Iterator[dict]:
+    """
+    Yields the records of every segment starting at `from_seq`, in order. A torn
+    last line, left by a crash in the middle of a write, is skipped.
+    """
+    seqs = sorted(int(name[4:-4]) for name in os.listdir(directory)
+                  if name.startswith('wal-') and name.endswith('.log'))
+    for seq in seqs:
+        if seq < from_seq:
+            continue
+        with open(os.path.join(directory, _segment_name(seq)), encoding='utf-8') as segment:
+            for line in segment:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    if line.endswith('\n'):
+                        raise